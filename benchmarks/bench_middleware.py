@@ -0,0 +1,128 @@
+"""
+미들웨어 요청당 오버헤드 벤치마크
+
+기존 BaseHTTPMiddleware 구현(패스스루 상태)과 현재 순수 ASGI 구현을
+같은 설정으로 비교합니다. 네트워크 없이 httpx.ASGITransport로 앱을 직접 호출합니다.
+
+실행:
+    uv run python benchmarks/bench_middleware.py [요청 수]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from hyukebox.middleware import (
+    OAuthMiddleware,
+    OriginValidationMiddleware,
+    RateLimitMiddleware
+)
+
+
+# ------------------------------------------------------------
+# 기존 구현 (BaseHTTPMiddleware 기반) - 비교용
+# ------------------------------------------------------------
+
+class LegacyOAuthMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        if request.url.path == "/health":
+            return await call_next(request)
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return JSONResponse({"error": "Missing or invalid Authorization header"}, status_code=401)
+        # 개발 모드 (OAUTH_TOKEN_URL 미설정): 모든 토큰 허용
+        return await call_next(request)
+
+
+class LegacyOriginValidationMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        allowed_origins = os.getenv("ALLOWED_ORIGINS", "").split(",")
+        origin = request.headers.get("Origin")
+        if origin and allowed_origins and allowed_origins[0]:
+            if origin not in allowed_origins:
+                return JSONResponse({"error": "Origin not allowed"}, status_code=403)
+        return await call_next(request)
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+# ------------------------------------------------------------
+
+async def _plain(request):
+    return PlainTextResponse("ok")
+
+
+async def _stream(request):
+    async def body():
+        for _ in range(10):
+            yield b"data: chunk\n\n"
+    return StreamingResponse(body(), media_type="text/event-stream")
+
+
+def _build_app(middleware: list) -> Starlette:
+    return Starlette(
+        routes=[Route("/plain", _plain), Route("/stream", _stream)],
+        middleware=middleware
+    )
+
+
+async def _run(app: Starlette, path: str, n: int) -> float:
+    """요청 n개를 순차 실행하고 요청당 평균 시간(µs) 반환"""
+    transport = httpx.ASGITransport(app=app)
+    headers = {
+        "Authorization": "Bearer bench-token",
+        "Origin": "https://claude.ai",
+    }
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(min(n, 200)):  # 워밍업
+            await client.get(path, headers=headers)
+        start = time.perf_counter()
+        for _ in range(n):
+            response = await client.get(path, headers=headers)
+            assert response.status_code == 200, response.status_code
+        elapsed = time.perf_counter() - start
+    return elapsed / n * 1e6
+
+
+async def main(n: int) -> None:
+    os.environ.setdefault("ALLOWED_ORIGINS", "https://claude.ai,https://example.com")
+    os.environ.pop("OAUTH_TOKEN_URL", None)
+    os.environ.pop("OAUTH_JWKS_URL", None)
+
+    stacks = {
+        "none": [],
+        "legacy (BaseHTTPMiddleware)": [
+            Middleware(LegacyOriginValidationMiddleware),
+            Middleware(LegacyRateLimitMiddleware),
+            Middleware(LegacyOAuthMiddleware),
+        ],
+        "asgi": [
+            Middleware(OriginValidationMiddleware),
+            Middleware(RateLimitMiddleware, rate_limit=f"{n * 10}/second"),
+            Middleware(OAuthMiddleware),
+        ],
+    }
+
+    baseline = {}
+    print(f"requests per case: {n}")
+    for path in ("/plain", "/stream"):
+        for name, middleware in stacks.items():
+            per_request = await _run(_build_app(middleware), path, n)
+            if name == "none":
+                baseline[path] = per_request
+            overhead = per_request - baseline[path]
+            print(f"{path:8s} {name:28s} {per_request:8.1f} µs/req  (overhead {overhead:+7.1f} µs)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
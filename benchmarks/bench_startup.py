@@ -0,0 +1,98 @@
+"""
+콜드 스타트 벤치마크 (stdio 클라이언트는 세션마다 서버 프로세스를 새로 띄움)
+
+- import: `import hyukebox.__main__`에 걸리는 시간과 가장 느린 모듈
+- initialize: `python -m hyukebox` 실행부터 MCP initialize 응답까지 걸리는 시간
+
+중앙값이 예산(ms)을 넘으면 종료 코드 1을 반환합니다.
+업스트림 워밍업은 끄고(HTTP_WARMUP=false) 네트워크 없이 측정합니다.
+
+실행:
+    uv run python benchmarks/bench_startup.py [반복 횟수] [예산 ms]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "bench-startup", "version": "0"},
+    },
+}
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("LASTFM_API_KEY", "bench")
+    env["HTTP_WARMUP"] = "false"
+    env["MCP_TRANSPORT"] = "stdio"
+    env["PYTHONWARNINGS"] = "ignore"
+    return env
+
+
+def _import_profile() -> tuple[float, list[tuple[int, str]]]:
+    """(import 총 시간 ms, 자체 시간 상위 모듈 [(µs, 이름)])"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import hyukebox.__main__"],
+        env=_env(), capture_output=True, text=True, check=True
+    )
+    modules = []
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(self_us), name.strip()))
+        if name.strip() == "hyukebox.__main__":
+            total = int(cumulative_us) / 1000
+    modules.sort(reverse=True)
+    return total, modules[:10]
+
+
+def _time_to_initialize() -> float:
+    """프로세스 시작부터 initialize 응답까지 ms"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "hyukebox"],
+        env=_env(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        process.stdin.write(json.dumps(_INITIALIZE) + "\n")
+        process.stdin.flush()
+        response = json.loads(process.stdout.readline())
+        elapsed = (time.perf_counter() - start) * 1000
+        assert response.get("id") == 1 and "result" in response, response
+        return elapsed
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main(runs: int, budget_ms: float) -> int:
+    import_ms, slowest = _import_profile()
+    print(f"import hyukebox.__main__: {import_ms:.0f} ms")
+    print("slowest modules (self time):")
+    for self_us, name in slowest:
+        print(f"  {self_us / 1000:7.1f} ms  {name}")
+
+    samples = [_time_to_initialize() for _ in range(runs)]
+    median = statistics.median(samples)
+    print(f"time to initialize: median {median:.0f} ms, min {min(samples):.0f} ms, max {max(samples):.0f} ms ({runs} runs)")
+    print(f"budget: {budget_ms:.0f} ms -> {'OK' if median <= budget_ms else 'OVER BUDGET'}")
+    return 0 if median <= budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 2500
+    ))
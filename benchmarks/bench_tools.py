@@ -0,0 +1,277 @@
+"""
+툴 벤치마크: search_song / describe_song / recommend_songs
+
+업스트림은 benchmarks/standins.py의 로컬 대역으로 교체하고(네트워크 없음),
+툴마다 동시성 단계별로 요청을 보내 처리량, p50/p95/p99 지연, 호출당 메모리 할당을
+측정합니다. 결과는 JSON으로 저장하며 --compare로 이전 결과와 비교할 수 있습니다.
+
+실행:
+    uv run python benchmarks/bench_tools.py
+    uv run python benchmarks/bench_tools.py --tools search_song --concurrency 1,16,64 --requests 500
+    uv run python benchmarks/bench_tools.py --latency openai=1500 --errors lastfm=0.05 --compare old.json
+
+캐시 효과를 보려면 --songs로 곡 풀 크기를 줄이세요 (기본: 요청마다 다른 곡 = 콜드 캐시).
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# 서버 설정은 처음 사용할 때 읽으므로 import 전에 벤치마크 환경 구성
+os.environ.setdefault("HYUKEBOX_CACHE_DIR", tempfile.mkdtemp(prefix="hyukebox-bench-"))
+os.environ["HTTP_WARMUP"] = "false"
+for _key in ("LASTFM_API_KEY", "TAVILY_API_KEY", "OPENAI_API_KEY"):
+    os.environ.setdefault(_key, "bench")
+
+from hyukebox import server  # noqa: E402
+from hyukebox.config import get_settings  # noqa: E402
+from hyukebox.metrics import is_error_result  # noqa: E402
+
+from standins import StandIns, UpstreamProfile, DEFAULT_PROFILES  # noqa: E402
+
+TOOLS = {
+    "search_song": server.search_song.fn,
+    "describe_song": server.describe_song.fn,
+    "recommend_songs": server.recommend_songs,
+}
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value, "mean": value, "max": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50": cuts[49],
+        "p95": cuts[94],
+        "p99": cuts[98],
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+    }
+
+
+def _reset_caches() -> None:
+    """시나리오 간 메모리 캐시 비우기 (서사/역색인 디스크 캐시는 곡 이름이 달라 겹치지 않음)"""
+    server.get_lastfm_cache().clear()
+
+
+async def _run_level(tool: str, concurrency: int, requests: int, songs: int, prefix: str) -> dict:
+    func = TOOLS[tool]
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            song = i % songs
+            start = time.perf_counter()
+            try:
+                result = await func(f"{prefix} artist {song}", f"{prefix} song {song}")
+                failed = is_error_result(result)
+            except Exception:
+                failed = True
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": requests / elapsed,
+        "latency_ms": _percentiles(latencies),
+    }
+
+
+async def _measure_allocations(tool: str, calls: int, prefix: str, standins: StandIns) -> dict:
+    """지연 없이 순차 호출하며 호출당 tracemalloc 최대 할당량과 잔류 블록 수 측정"""
+    func = TOOLS[tool]
+    standins.latency_scale = 0.0
+    await func(f"{prefix} warmup", f"{prefix} warmup")  # 첫 호출 초기화 비용 제외
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    peaks = []
+    try:
+        for i in range(calls):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await func(f"{prefix} artist {i}", f"{prefix} song {i}")
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - current)
+    finally:
+        tracemalloc.stop()
+        standins.latency_scale = 1.0
+    gc.collect()
+
+    return {
+        "calls": calls,
+        "peak_kib_per_call": statistics.fmean(peaks) / 1024,
+        "retained_blocks_per_call": (sys.getallocatedblocks() - blocks_before) / calls,
+    }
+
+
+async def run(args) -> dict:
+    profiles = {name: UpstreamProfile(**profile.to_dict()) for name, profile in DEFAULT_PROFILES.items()}
+    for name, value in _parse_pairs(args.latency):
+        profiles[name].latency_ms = value
+    for name, value in _parse_pairs(args.errors):
+        profiles[name].error_rate = value
+    for profile in profiles.values():
+        profile.jitter = args.jitter
+        profile.error_status = args.error_status
+
+    standins = StandIns(profiles, seed=args.seed)
+    standins.install()
+
+    results = []
+    for tool in args.tools:
+        for concurrency in args.concurrency:
+            _reset_caches()
+            standins.reset_counters()
+            prefix = f"{tool}-c{concurrency}"
+            level = await _run_level(tool, concurrency, args.requests, args.songs or args.requests, prefix)
+            level.update({
+                "tool": tool,
+                "concurrency": concurrency,
+                "upstream_calls": dict(standins.calls),
+                "upstream_errors": dict(standins.errors),
+            })
+            results.append(level)
+            _print_result(level)
+
+        if args.alloc_calls:
+            _reset_caches()
+            alloc = await _measure_allocations(tool, args.alloc_calls, f"{tool}-alloc", standins)
+            for level in results:
+                if level["tool"] == tool:
+                    level["allocations"] = alloc
+            print(f"{tool:16s} alloc: {alloc['peak_kib_per_call']:8.1f} KiB peak/call, "
+                  f"{alloc['retained_blocks_per_call']:+.1f} retained blocks/call")
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {
+                "llm_eval_top_k": get_settings().llm_eval_top_k,
+            },
+            "config": {
+                "requests": args.requests,
+                "songs": args.songs or args.requests,
+                "seed": args.seed,
+                "profiles": {name: profile.to_dict() for name, profile in profiles.items()},
+            },
+        },
+        "results": results,
+    }
+
+
+def _print_result(level: dict) -> None:
+    latency = level["latency_ms"]
+    print(
+        f"{level['tool']:16s} c={level['concurrency']:<4d} "
+        f"{level['throughput_rps']:8.1f} req/s  "
+        f"p50 {latency['p50']:8.1f}  p95 {latency['p95']:8.1f}  p99 {latency['p99']:8.1f} ms  "
+        f"errors {level['errors']}/{level['requests']}  upstream {level['upstream_calls']}"
+    )
+
+
+def _compare(current: dict, baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())
+    previous = {(r["tool"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\ncompared with {baseline_path} ({baseline['meta'].get('git_commit') or '?'}):")
+    for result in current["results"]:
+        old = previous.get((result["tool"], result["concurrency"]))
+        if old is None:
+            continue
+
+        def delta(new: float, before: float) -> str:
+            return f"{(new - before) / before * 100:+6.1f}%" if before else "   n/a"
+
+        print(
+            f"{result['tool']:16s} c={result['concurrency']:<4d} "
+            f"throughput {delta(result['throughput_rps'], old['throughput_rps'])}  "
+            f"p50 {delta(result['latency_ms']['p50'], old['latency_ms']['p50'])}  "
+            f"p95 {delta(result['latency_ms']['p95'], old['latency_ms']['p95'])}  "
+            f"p99 {delta(result['latency_ms']['p99'], old['latency_ms']['p99'])}"
+        )
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _parse_pairs(value: str | None) -> list[tuple[str, float]]:
+    """ "lastfm=80,openai=1500" → [("lastfm", 80.0), ("openai", 1500.0)]"""
+    pairs = []
+    for item in filter(None, (value or "").split(",")):
+        name, _, number = item.partition("=")
+        if name not in DEFAULT_PROFILES:
+            raise SystemExit(f"unknown upstream: {name} (lastfm, tavily, openai)")
+        pairs.append((name, float(number)))
+    return pairs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", default=",".join(TOOLS), type=lambda v: v.split(","))
+    parser.add_argument("--concurrency", default="1,8,32", type=lambda v: [int(x) for x in v.split(",")])
+    parser.add_argument("--requests", default=100, type=int, help="동시성 단계별 요청 수")
+    parser.add_argument("--songs", default=0, type=int, help="곡 풀 크기 (0: 요청마다 다른 곡)")
+    parser.add_argument("--latency", help="업스트림별 지연 중앙값 ms (예: lastfm=80,openai=1500)")
+    parser.add_argument("--jitter", default=0.3, type=float, help="지연 로그정규 sigma")
+    parser.add_argument("--errors", help="업스트림별 오류율 (예: lastfm=0.05)")
+    parser.add_argument("--error-status", default=503, type=int)
+    parser.add_argument("--alloc-calls", default=20, type=int, help="할당량 측정 호출 수 (0: 생략)")
+    parser.add_argument("--seed", default=0, type=int)
+    parser.add_argument("--output", type=Path, help="결과 JSON 경로 (기본: benchmarks/results/<시각>.json)")
+    parser.add_argument("--compare", type=Path, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    unknown = set(args.tools) - set(TOOLS)
+    if unknown:
+        raise SystemExit(f"unknown tools: {', '.join(sorted(unknown))}")
+
+    # 업스트림 대역이 처리량을 제한하지 않도록 스케줄러 한도를 넉넉하게 (환경변수로 덮어쓰기 가능)
+    for name in DEFAULT_PROFILES:
+        os.environ.setdefault(f"{name.upper()}_RATE", "100000/second")
+        os.environ.setdefault(f"{name.upper()}_MAX_CONCURRENCY", "256")
+
+    result = asyncio.run(run(args))
+
+    output = args.output or Path(__file__).parent / "results" / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, ensure_ascii=False, indent=2))
+    print(f"\nresults: {output}")
+
+    if args.compare:
+        _compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
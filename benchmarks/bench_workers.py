@@ -0,0 +1,228 @@
+"""
+HTTP 워커 수 확장성 벤치마크 (MCP_WORKERS)
+
+워커 수별로 `hyukebox.app.serve`를 띄우고(stateless 모드, 업스트림은 standins.py 대역),
+여러 클라이언트 프로세스에서 tools/call을 보내 처리량과 지연을 측정합니다.
+업스트림 지연은 기본 0이라(--latency-scale) 서버 CPU가 병목이 되며,
+워커 1개 대비 처리량 비율(효율 = rps_n / (rps_1 × n))로 선형 확장 여부를 봅니다.
+부하 생성기도 CPU를 쓰므로 코어 수보다 많은 워커는 의미가 없습니다.
+
+실행:
+    uv run python benchmarks/bench_workers.py
+    uv run python benchmarks/bench_workers.py --workers 1,2,4,8 --requests 4000 --clients 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import httpx
+
+BENCH_DIR = Path(__file__).parent
+_ACCEPT = "application/json, text/event-stream"
+
+
+# ------------------------------------------------------------
+# 서버 쪽: 업스트림 대역을 설치하는 앱 factory (워커 프로세스에서 import)
+# ------------------------------------------------------------
+
+def create_app():
+    """hyukebox.app.create_app + 서버 lifespan 시작 후 업스트림 대역 설치"""
+    from hyukebox.app import create_app as create_hyukebox_app
+    from standins import StandIns
+
+    app = create_hyukebox_app()
+    inner = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with inner(app) as state:
+            standins = StandIns(seed=os.getpid())
+            standins.latency_scale = float(os.environ.get("BENCH_LATENCY_SCALE", "0"))
+            standins.install()
+            yield state
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(workers: int, port: int, latency_scale: float) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(BENCH_DIR), str(BENCH_DIR.parent), env.get("PYTHONPATH")])),
+        "PYTHONWARNINGS": "ignore",
+        "MCP_WORKERS": str(workers),
+        "MCP_STATELESS": "true",
+        "METRICS_ENABLED": "false",
+        "HTTP_WARMUP": "false",
+        "RATE_LIMIT": "100000000/second",
+        "BENCH_LATENCY_SCALE": str(latency_scale),
+    })
+    env.setdefault("HYUKEBOX_CACHE_DIR", tempfile.mkdtemp(prefix="hyukebox-bench-"))
+    for key in ("LASTFM_API_KEY", "TAVILY_API_KEY", "OPENAI_API_KEY"):
+        env.setdefault(key, "bench")
+    # 업스트림 대역이 처리량을 제한하지 않도록 (워커 수로 나뉘므로 넉넉하게)
+    for name in ("LASTFM", "TAVILY", "OPENAI"):
+        env.setdefault(f"{name}_RATE", "100000000/second")
+        env.setdefault(f"{name}_MAX_CONCURRENCY", "4096")
+
+    return subprocess.Popen(
+        [sys.executable, "-c", f"from hyukebox.app import serve; serve('127.0.0.1', {port}, app='bench_workers:create_app')"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def _request(i: int, tool: str, prefix: str) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": i,
+        "method": "tools/call",
+        "params": {"name": tool, "arguments": {"artist": f"{prefix} artist {i}", "title": f"{prefix} song {i}"}},
+    }
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"server exited with code {process.returncode}")
+        try:
+            response = httpx.post(url, json={"jsonrpc": "2.0", "id": 0, "method": "tools/list"},
+                                  headers={"Accept": _ACCEPT}, timeout=5)
+            if response.status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit("server did not start")
+
+
+# ------------------------------------------------------------
+# 클라이언트 쪽: 부하 생성 프로세스
+# ------------------------------------------------------------
+
+def _client_process(url: str, tool: str, ids: list[int], concurrency: int, prefix: str) -> tuple[list[float], int, float]:
+    """(지연 ms 목록, 오류 수, 걸린 시간) - 별도 프로세스에서 실행"""
+
+    async def run():
+        latencies = []
+        errors = 0
+        queue = list(reversed(ids))
+
+        async with httpx.AsyncClient(
+            timeout=60,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            headers={"Accept": _ACCEPT},
+        ) as client:
+            async def worker():
+                nonlocal errors
+                while queue:
+                    i = queue.pop()
+                    start = time.perf_counter()
+                    try:
+                        response = await client.post(url, json=_request(i, tool, prefix))
+                        failed = response.status_code != 200 or '"isError":true' in response.text
+                    except httpx.HTTPError:
+                        failed = True
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    errors += failed
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return latencies, errors, time.perf_counter() - start
+
+    return asyncio.run(run())
+
+
+def _run_level(url: str, args, workers: int) -> dict:
+    prefix = f"w{workers}-{time.time_ns()}"
+    ids = list(range(args.requests))
+    shards = [ids[i::args.clients] for i in range(args.clients)]
+    per_client = max(1, args.concurrency // args.clients)
+
+    with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+        start = time.perf_counter()
+        results = pool.starmap(_client_process, [(url, args.tool, shard, per_client, prefix) for shard in shards])
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(ms for result in results for ms in result[0])
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "workers": workers,
+        "requests": args.requests,
+        "errors": sum(result[1] for result in results),
+        "elapsed_s": elapsed,
+        "throughput_rps": args.requests / max(result[2] for result in results),
+        "latency_ms": {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98], "mean": statistics.fmean(latencies)},
+    }
+
+
+def main() -> None:
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, max(1, cpus // 2)})
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)), type=lambda v: [int(x) for x in v.split(",")])
+    parser.add_argument("--tool", default="search_song", choices=["search_song", "describe_song"])
+    parser.add_argument("--requests", default=2000, type=int, help="워커 수 단계별 요청 수 (요청마다 다른 곡)")
+    parser.add_argument("--concurrency", default=64, type=int, help="전체 동시 요청 수")
+    parser.add_argument("--clients", default=max(1, cpus // 2), type=int, help="부하 생성 프로세스 수")
+    parser.add_argument("--latency-scale", default=0.0, type=float, help="업스트림 대역 지연 배율 (0: 지연 없음)")
+    parser.add_argument("--output", type=Path, help="결과 JSON 경로 (기본: benchmarks/results/workers-<시각>.json)")
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}/mcp"
+        server = _start_server(workers, port, args.latency_scale)
+        try:
+            _wait_ready(url, server)
+            level = _run_level(url, args, workers)
+        finally:
+            server.terminate()
+            server.wait()
+
+        baseline = results[0]["throughput_rps"] / results[0]["workers"] if results else level["throughput_rps"] / workers
+        level["efficiency"] = level["throughput_rps"] / (baseline * workers)
+        results.append(level)
+        latency = level["latency_ms"]
+        print(
+            f"workers={workers:<3d} {level['throughput_rps']:8.1f} req/s  efficiency {level['efficiency']:5.0%}  "
+            f"p50 {latency['p50']:7.1f}  p95 {latency['p95']:7.1f}  p99 {latency['p99']:7.1f} ms  "
+            f"errors {level['errors']}/{level['requests']}"
+        )
+
+    output = args.output or BENCH_DIR / "results" / f"workers-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "cpus": cpus,
+            "tool": args.tool,
+            "concurrency": args.concurrency,
+            "clients": args.clients,
+            "latency_scale": args.latency_scale,
+        },
+        "results": results,
+    }, indent=2))
+    print(f"\nresults: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+벤치마크용 로컬 업스트림 대역 (Last.fm / Tavily / OpenAI)
+
+httpx.MockTransport로 네트워크 없이 응답하며, 업스트림별 지연 분포
+(로그정규: 중앙값 × exp(jitter × N(0, 1)))와 오류율을 설정할 수 있습니다.
+응답 내용은 요청(곡/태그)에서 결정적으로 만들어지므로 실행 간 비교가 가능합니다.
+
+서버 코드와 같은 경로를 타도록 실제 클라이언트처럼 ResilientTransport/ScheduledTransport로 감싸
+hyukebox.clients의 공유 클라이언트 자리에 설치합니다.
+
+RespStandIn은 공유 캐시 Redis 백엔드를 확인하기 위한 로컬 RESP 서버입니다.
+"""
+import asyncio
+import json
+import random
+import time
+import zlib
+from collections import Counter
+
+import httpx
+
+from hyukebox import clients
+from hyukebox.resilience import ResilientTransport, get_policy
+from hyukebox.scheduler import ScheduledTransport, get_scheduler
+
+# 스트리밍 응답 조각 크기 (글자)
+_STREAM_CHUNK_CHARS = 16
+
+# 서사 키워드/태그 어휘 (곡마다 결정적으로 골라 키워드 검색이 적당히 겹치도록)
+_VOCABULARY = [
+    "sad", "breakup", "love", "party", "dance", "summer", "night", "rain",
+    "chill", "rock", "indie", "ballad", "hope", "nostalgia", "lonely", "morning",
+    "이별", "그리움", "설렘", "위로", "새벽", "청춘", "추억", "희망",
+]
+
+
+def _seed(*parts: str) -> int:
+    return zlib.crc32("\x1f".join(parts).encode("utf-8"))
+
+
+class UpstreamProfile:
+    """업스트림 하나의 지연/오류 설정
+
+    Args:
+        latency_ms: 지연 중앙값 (ms)
+        jitter: 로그정규 분포 sigma (0이면 고정 지연)
+        error_rate: 오류 응답 비율 (0-1)
+        error_status: 오류 응답 HTTP 상태 코드
+    """
+
+    def __init__(self, latency_ms: float, jitter: float = 0.3, error_rate: float = 0.0, error_status: int = 503):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def to_dict(self) -> dict:
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter": self.jitter,
+            "error_rate": self.error_rate,
+            "error_status": self.error_status,
+        }
+
+
+DEFAULT_PROFILES = {
+    "lastfm": UpstreamProfile(50),
+    "tavily": UpstreamProfile(300),
+    "openai": UpstreamProfile(800),
+}
+
+_HOSTS = {
+    "ws.audioscrobbler.com": "lastfm",
+    "api.tavily.com": "tavily",
+    "api.openai.com": "openai",
+}
+
+
+class StandIns:
+    """업스트림 대역 묶음
+
+    Args:
+        profiles: 업스트림 이름 → UpstreamProfile
+        seed: 지연/오류 난수 seed
+    """
+
+    def __init__(self, profiles: dict[str, UpstreamProfile] | None = None, seed: int = 0):
+        self.profiles = {**DEFAULT_PROFILES, **(profiles or {})}
+        self.latency_scale = 1.0  # 0이면 지연 없이 응답 (할당량 측정 등)
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._rng = random.Random(seed)
+
+    def install(self) -> None:
+        """hyukebox.clients 공유 클라이언트를 대역으로 교체"""
+        for name, (base_url, timeout) in clients.UPSTREAMS.items():
+            clients._clients[name] = httpx.AsyncClient(
+                base_url=base_url,
+                timeout=timeout,
+                transport=ResilientTransport(
+                    ScheduledTransport(httpx.MockTransport(self.handle), get_scheduler(name)),
+                    get_policy(name)
+                ),
+            )
+
+    def reset_counters(self) -> None:
+        self.calls.clear()
+        self.errors.clear()
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        name = _HOSTS.get(request.url.host)
+        if name is None:
+            return httpx.Response(404)
+        profile = self.profiles[name]
+        self.calls[name] += 1
+
+        delay = profile.latency_ms * self._rng.lognormvariate(0.0, profile.jitter) if profile.jitter else profile.latency_ms
+        if delay * self.latency_scale > 0:
+            await asyncio.sleep(delay * self.latency_scale / 1000)
+
+        if profile.error_rate and self._rng.random() < profile.error_rate:
+            self.errors[name] += 1
+            return httpx.Response(profile.error_status, json={"error": "stand-in error"})
+
+        if name == "lastfm":
+            return httpx.Response(200, json=_lastfm(request.url.params))
+        if name == "tavily":
+            return httpx.Response(200, json=_tavily(json.loads(request.content)))
+        return _openai(json.loads(request.content))
+
+
+# ------------------------------------------------------------
+# 응답 생성
+# ------------------------------------------------------------
+
+def _tags_for(*parts: str, count: int = 3) -> list[str]:
+    return random.Random(_seed(*parts)).sample(_VOCABULARY, count)
+
+
+def _lastfm(params) -> dict:
+    method = params.get("method")
+    artist = params.get("artist", "")
+    track = params.get("track", "")
+
+    if method == "track.getInfo":
+        rng = random.Random(_seed(artist, track))
+        return {"track": {
+            "name": track, "artist": {"name": artist}, "album": {"title": f"{track} (Album)"},
+            "playcount": str(rng.randint(1_000, 10_000_000)), "listeners": str(rng.randint(100, 1_000_000)),
+            "toptags": {"tag": [{"name": tag} for tag in _tags_for(artist, track)]},
+        }}
+    if method == "track.getSimilar":
+        rng = random.Random(_seed("similar", artist, track))
+        return {"similartracks": {"track": [
+            {"name": f"similar {rng.randint(0, 9999)}", "artist": {"name": f"artist {rng.randint(0, 999)}"},
+             "match": f"{rng.random():.3f}"}
+            for _ in range(int(params.get("limit", 10)))
+        ]}}
+    if method == "track.getTopTags":
+        return {"toptags": {"tag": [{"name": tag, "count": 100 - i * 10} for i, tag in enumerate(_tags_for(artist, track, count=5))]}}
+    if method == "tag.getTopTracks":
+        tag = params.get("tag", "")
+        limit = int(params.get("limit", 50))
+        page = int(params.get("page", 1))
+        return {"tracks": {
+            "track": [
+                {"name": f"{tag} song {(page - 1) * limit + i}", "artist": {"name": f"{tag} artist {i % 7}"}}
+                for i in range(limit)
+            ],
+            "@attr": {"tag": tag, "page": str(page), "totalPages": "5"},
+        }}
+    if method == "track.search":
+        return {"results": {"trackmatches": {"track": [
+            {"name": f"{track} match {i}", "artist": f"search artist {i}"} for i in range(10)
+        ]}}}
+    if method in ("chart.getTopTracks", "geo.getTopTracks"):
+        return {"tracks": {"track": [
+            {"name": f"chart song {i}", "artist": {"name": f"chart artist {i}"}} for i in range(int(params.get("limit", 50)))
+        ]}}
+    return {"error": 3, "message": "Invalid Method"}
+
+
+def _tavily(body: dict) -> dict:
+    query = body.get("query", "")
+    return {"results": [
+        {"title": f"{query} 가사 {i}", "url": f"https://lyrics.example/{i}", "content": f"{query} 가사와 배경 설명 " * 20}
+        for i in range(body.get("max_results", 3))
+    ]}
+
+
+def _completion(content: str) -> httpx.Response:
+    return httpx.Response(200, json={
+        "choices": [{"message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": len(content) // 4, "completion_tokens": len(content) // 4},
+    })
+
+
+async def _event_stream(content: str):
+    """Chat Completions 스트리밍 (SSE): 조각별 delta → usage 청크 → [DONE]"""
+    for i in range(0, len(content), _STREAM_CHUNK_CHARS):
+        chunk = {"choices": [{"index": 0, "delta": {"content": content[i:i + _STREAM_CHUNK_CHARS]}}]}
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode()
+    usage = {"prompt_tokens": len(content) // 4, "completion_tokens": len(content) // 4}
+    yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode()
+    yield b"data: [DONE]\n\n"
+
+
+def _streamed_completion(content: str) -> httpx.Response:
+    return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=_event_stream(content))
+
+
+def _openai(body: dict) -> httpx.Response:
+    user = body["messages"][-1]["content"]
+
+    if "후보곡 리스트:" in user:
+        # 후보곡 평가: 배치(scores 행렬) 또는 단계별(evaluations)
+        candidates = [line for line in user.split("후보곡 리스트:")[1].splitlines() if " - " in line]
+        if '"scores"' in user:
+            stage_count = max(1, user.count("\n[", 0, user.index("후보곡 리스트:")))
+            rows = []
+            for i, line in enumerate(candidates, 1):
+                rng = random.Random(_seed(line.split(". ", 1)[-1]))
+                rows.append({"id": i, "scores": [rng.randint(0, 100) for _ in range(stage_count)], "reason": "대역 평가"})
+            return _completion(json.dumps({"scores": rows}, ensure_ascii=False))
+        evaluations = []
+        for line in candidates:
+            artist, _, title = line.split(". ", 1)[-1].partition(" - ")
+            evaluations.append({"artist": artist, "title": title, "score": random.Random(_seed(line)).randint(0, 100), "reason": "대역 평가"})
+        return _completion(json.dumps({"evaluations": evaluations}, ensure_ascii=False))
+
+    # 서사 생성: 곡마다 결정적인 3단계 서사
+    stages = []
+    for step in range(1, 4):
+        keywords = _tags_for(user[:200], str(step))
+        stages.append({"step": step, "title": f"{step}단계", "description": " ".join(keywords), "keywords": keywords})
+    narrative = {"summary": "대역 서사 요약", "narrative": {"stage_count": 3, "stages": stages}}
+    content = json.dumps(narrative, ensure_ascii=False)
+    if body.get("stream"):
+        return _streamed_completion(content)
+    return _completion(content)
+
+
+# ------------------------------------------------------------
+# Redis 대역 (RESP2)
+# ------------------------------------------------------------
+
+class RespStandIn:
+    """공유 캐시(CACHE_BACKEND=redis) 확인용 최소 RESP 서버
+
+    HELLO / CLIENT / PING / GET / SET [EX|PX] / DEL만 지원하고, 나머지 명령은 오류로 응답합니다.
+
+        server = RespStandIn()
+        url = await server.start()   # "redis://127.0.0.1:<포트>/0"
+        ...
+        await server.stop()
+    """
+
+    def __init__(self):
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}  # key -> (value, 만료 시각)
+        self.commands: Counter = Counter()
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"redis://{host}:{port}/0"
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.startswith(b"*"):
+                    args = line.split()  # inline 명령
+                else:
+                    args = []
+                    for _ in range(int(line[1:])):
+                        size = int((await reader.readline())[1:])
+                        args.append((await reader.readexactly(size + 2))[:-2])
+                writer.write(self._execute(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _execute(self, args: list[bytes]) -> bytes:
+        command = args[0].upper().decode() if args else ""
+        self.commands[command] += 1
+        if command == "PING":
+            return b"+PONG\r\n"
+        if command == "HELLO":
+            # redis-py 기본값(RESP3) 핸드셰이크: 이후 응답은 RESP2와 같은 형식만 사용
+            protocol = int(args[1]) if len(args) > 1 else 2
+            fields = b"+server\r\n+stand-in\r\n+version\r\n+7.0.0\r\n+proto\r\n:%d\r\n" % protocol
+            return (b"%3\r\n" if protocol == 3 else b"*6\r\n") + fields
+        if command == "CLIENT":
+            return b"+OK\r\n"
+        if command == "GET" and len(args) == 2:
+            value = self._get(args[1])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if command == "SET" and len(args) >= 3:
+            expires_at = None
+            options = [a.upper() for a in args[3:]]
+            if b"PX" in options:
+                expires_at = time.monotonic() + int(args[3 + options.index(b"PX") + 1]) / 1000
+            elif b"EX" in options:
+                expires_at = time.monotonic() + int(args[3 + options.index(b"EX") + 1])
+            self.data[args[1]] = (args[2], expires_at)
+            return b"+OK\r\n"
+        if command == "DEL":
+            removed = sum(self.data.pop(key, None) is not None for key in args[1:])
+            return b":%d\r\n" % removed
+        return b"-ERR unknown command '%s'\r\n" % command.encode()
+
+    def _get(self, key: bytes) -> bytes | None:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
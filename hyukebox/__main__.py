@@ -1,15 +1,23 @@
 """진입점: python -m hyukebox"""
 import os
 import sys
+
+from hyukebox.config import ENV_PATH, get_settings
 from hyukebox.server import mcp
-from hyukebox.middleware import (
-    OAuthMiddleware,
-    OriginValidationMiddleware,
-    RateLimitMiddleware
-)
 
 
 def main():
+    # 설정 로드 및 검증 (.env 포함, Last.fm만 필수)
+    errors = get_settings().validate()
+    if errors:
+        for error in errors:
+            print(f"ERROR: {error}", file=sys.stderr)
+        print(f".env 경로: {ENV_PATH}", file=sys.stderr)
+        sys.exit(1)
+
+    print("Hyukebox MCP Server 초기화 완료", file=sys.stderr)
+    print(f".env 경로: {ENV_PATH}", file=sys.stderr)
+
     # 환경변수로 트랜스포트 선택
     transport = os.getenv("MCP_TRANSPORT", "stdio")
 
@@ -19,32 +27,22 @@ def main():
         mcp.run(transport="stdio")
 
     elif transport == "http":
-        # HTTP 서버 (프로덕션)
+        # HTTP 서버 (프로덕션): MCP_WORKERS개 워커, MCP_STATELESS로 세션 모드 선택
+        # uvicorn/starlette 앱 구성은 stdio 시작 시간에 포함되지 않도록 여기서 import
+        from hyukebox.app import serve
+
         host = os.getenv("MCP_HOST", "0.0.0.0")
         port = int(os.getenv("MCP_PORT", "8000"))
         path = os.getenv("MCP_PATH", "/mcp")
+        settings = get_settings()
 
-        print(f"Starting MCP HTTP server at {host}:{port}{path}...", file=sys.stderr)
-
-        # 미들웨어 설정 (일단 비활성화 - 테스트 후 활성화)
-        # middleware = [
-        #     OAuthMiddleware,
-        #     OriginValidationMiddleware,
-        #     RateLimitMiddleware
-        # ]
-
-        # HTTP 서버 실행
-        # stateless_http=True: 세션 없이 매 요청마다 독립 처리 (테스트용)
-        # stateless_http=False: 세션 기반 (프로덕션 권장)
-        mcp.run(
-            transport="http",
-            host=host,
-            port=port,
-            path=path,
-            stateless_http=True,  # 세션 없이 사용
-            # middleware=middleware,  # 미들웨어 비활성화
-            log_level="info"
+        mode = "stateless" if settings.stateless_http else "session"
+        print(
+            f"Starting MCP HTTP server at {host}:{port}{path} "
+            f"({settings.http_workers} workers, {mode}, cache backend: {settings.cache_backend})...",
+            file=sys.stderr
         )
+        serve(host, port)
 
     else:
         print(f"Unknown transport: {transport}", file=sys.stderr)
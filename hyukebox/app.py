@@ -0,0 +1,100 @@
+"""
+HTTP 서버 (MCP_TRANSPORT=http)
+
+- create_app(): 미들웨어/메트릭 라우트를 붙인 ASGI 앱 (uvicorn factory)
+- serve(): MCP_WORKERS개 워커 프로세스로 실행
+
+워커는 uvicorn 멀티프로세스 supervisor로 띄우며 공개 소켓 하나를 함께 accept합니다.
+워커 사이의 상태는 공유 캐시(CACHE_BACKEND)로 나눕니다.
+세션 모드(MCP_STATELESS=false)에서는 워커마다 127.0.0.1 내부 소켓을 하나 더 열어
+다른 워커가 세션 요청을 전달할 수 있게 합니다 (hyukebox.sessions).
+"""
+import os
+import socket
+from functools import partial
+
+import uvicorn
+from starlette.middleware import Middleware
+from uvicorn.supervisors import Multiprocess
+
+from hyukebox import sessions
+from hyukebox.config import get_settings
+from hyukebox.metrics import metrics_endpoint
+from hyukebox.middleware import (
+    OAuthMiddleware,
+    OriginValidationMiddleware,
+    RateLimitMiddleware
+)
+from hyukebox.server import mcp
+
+
+def create_app():
+    """MCP HTTP ASGI 앱 생성 (워커 프로세스마다 한 번)"""
+    settings = get_settings()
+    path = os.getenv("MCP_PATH", "/mcp")
+
+    # Prometheus 메트릭 (인증 없음: nginx로 외부에 노출하지 말고 내부에서 직접 scrape)
+    # 워커가 여러 개면 scrape마다 다른 워커가 응답하므로 instance 대신 합계로 보세요.
+    if os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "on"):
+        mcp.custom_route("/metrics", methods=["GET"])(metrics_endpoint)
+
+    # 미들웨어 설정 (순수 ASGI, 바깥쪽부터 실행)
+    # 세션 전달은 가장 바깥에서: 담당 워커가 Origin/Rate Limit/OAuth를 한 번만 적용
+    # Rate Limit은 OAuth보다 먼저: 검증되지 않은 토큰의 검증 호출도 IP 한도에 포함
+    # OAuth는 OAUTH_TOKEN_URL 또는 OAUTH_JWKS_URL이 설정된 경우에만 활성화
+    middleware = [
+        Middleware(sessions.SessionAffinityMiddleware),
+        Middleware(OriginValidationMiddleware),
+        Middleware(RateLimitMiddleware),
+    ]
+    if settings.oauth_token_url or settings.oauth_jwks_url:
+        middleware.append(Middleware(OAuthMiddleware))
+
+    # stateless_http=True: 세션 없이 매 요청마다 독립 처리 (워커 수만큼 선형 확장)
+    # stateless_http=False: 세션 기반 (GET 알림 스트림 등, 세션은 만든 워커가 처리)
+    return mcp.http_app(
+        path=path,
+        middleware=middleware,
+        stateless_http=settings.stateless_http,
+    )
+
+
+def _run_worker(config: uvicorn.Config, sockets: list[socket.socket]) -> None:
+    """워커 프로세스 진입점: 세션 모드면 내부 소켓을 열고 공개 소켓과 함께 서비스"""
+    if not get_settings().stateless_http:
+        internal = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        internal.bind(("127.0.0.1", 0))
+        host, port = internal.getsockname()
+        sessions.worker_address = f"{host}:{port}"
+        sockets = [*sockets, internal]
+    uvicorn.Server(config).run(sockets=sockets)
+
+
+def serve(host: str, port: int, app: str = "hyukebox.app:create_app") -> None:
+    """HTTP 서버 실행 (MCP_WORKERS > 1이면 멀티프로세스)
+
+    Args:
+        host: 바인드 주소
+        port: 포트
+        app: ASGI 앱 factory import 경로 (벤치마크에서 교체)
+    """
+    workers = get_settings().http_workers
+    config = uvicorn.Config(
+        app,
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+        lifespan="on",
+        timeout_graceful_shutdown=0,
+        # 워커들이 동시에 import하는 동안(코어가 적으면 수 초) 헬스체크 실패로 재시작되지 않도록
+        timeout_worker_healthcheck=30,
+        log_level="info",
+    )
+
+    if workers == 1:
+        uvicorn.Server(config).run()
+        return
+
+    sock = config.bind_socket()
+    Multiprocess(config, target=partial(_run_worker, config), sockets=[sock]).run()
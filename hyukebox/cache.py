@@ -0,0 +1,146 @@
+"""
+인메모리 TTL + LRU 캐시
+
+Last.fm API 응답처럼 자주 반복되는 조회 결과를 프로세스 메모리에 보관합니다.
+항목 수와 바이트 수 두 가지 한도로 LRU 축출하고, 항목마다 TTL을 가집니다.
+
+stale-while-revalidate: set(stale_ttl=...)로 저장한 항목은 TTL이 지나도 stale_ttl 동안
+lookup()으로 계속 반환되고(stale 표시), 호출자는 revalidate()로 백그라운드 갱신을 예약합니다.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 정규화 (대소문자/연속 공백 차이 무시)"""
+    return " ".join(str(text).split()).casefold()
+
+
+class TTLCache:
+    """항목 수/바이트 한도가 있는 TTL + LRU 캐시
+
+    Args:
+        max_entries: 최대 항목 수
+        max_bytes: 최대 누적 바이트 수 (set 호출 시 전달한 size 합계)
+        default_ttl: TTL 미지정 시 사용할 기본값(초)
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024, default_ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # key -> (fresh_until, expires_at, size, value): fresh_until 이후는 stale, expires_at 이후 제거
+        self._data: OrderedDict[Hashable, tuple[float, float, int, Any]] = OrderedDict()
+        self._bytes = 0
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """캐시 조회 (TTL이 지난 항목은 miss 처리)"""
+        hit = self.lookup(key, allow_stale=False)
+        return default if hit is None else hit[0]
+
+    def lookup(self, key: Hashable, allow_stale: bool = True) -> tuple[Any, bool] | None:
+        """캐시 조회 → (값, stale 여부), 없거나 하드 만료면 None"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        fresh_until, expires_at, size, value = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        stale = fresh_until <= now
+        if stale and not allow_stale:
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        self.stale_hits += stale
+        return value, stale
+
+    def peek(self, key: Hashable) -> Any:
+        """하드 만료 전 값 조회 (stale 포함), 적중/미스 카운터와 LRU 순서는 바꾸지 않음"""
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[3]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None, size: int = 1, stale_ttl: float = 0.0) -> None:
+        """캐시 저장 후 한도를 넘으면 오래된 항목부터 축출
+
+        Args:
+            ttl: 신선한 기간(초)
+            stale_ttl: TTL이 지난 뒤 lookup()으로 stale 값을 반환할 추가 기간(초)
+        """
+        if size > self.max_bytes:
+            return  # 단일 항목이 한도보다 크면 저장하지 않음
+
+        if key in self._data:
+            self._remove(key)
+
+        fresh_until = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        self._data[key] = (fresh_until, fresh_until + stale_ttl, size, value)
+        self._bytes += size
+
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def revalidate(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> None:
+        """stale 항목 백그라운드 갱신 예약 (키당 하나만 실행)
+
+        Args:
+            key: 갱신할 키
+            fetch: 새 값을 가져와 set까지 수행하는 코루틴 팩토리
+        """
+        if key in self._refreshing:
+            return
+        task = asyncio.ensure_future(fetch())
+        self._refreshing[key] = task
+        task.add_done_callback(lambda t: self._revalidate_done(key, t))
+
+    def _revalidate_done(self, key: Hashable, task: asyncio.Task) -> None:
+        self._refreshing.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # 갱신 실패는 무시 (하드 만료 전까지 기존 값 사용)
+
+    def cancel_revalidations(self) -> None:
+        for task in list(self._refreshing.values()):
+            task.cancel()
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        """히트/미스 카운터 및 현재 사용량"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+            "refreshing": len(self._refreshing),
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
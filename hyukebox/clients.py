@@ -0,0 +1,128 @@
+"""
+업스트림 HTTP 클라이언트 풀 (Last.fm / Tavily / OpenAI)
+
+업스트림마다 오래 유지되는 httpx.AsyncClient 하나를 두고 모든 툴이 공유합니다.
+FastMCP 서버 lifespan에서 생성/워밍업/종료를 관리합니다.
+요청은 업스트림별 스케줄러(hyukebox.scheduler)를 거쳐 나가며,
+일시적인 오류는 재시도하고 계속 실패하는 업스트림은 차단합니다(hyukebox.resilience).
+"""
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+
+import httpx
+
+from hyukebox.config import get_settings
+from hyukebox.resilience import ResilientTransport, get_policy
+from hyukebox.scheduler import ScheduledTransport, get_scheduler
+
+LASTFM_BASE_URL = "https://ws.audioscrobbler.com"
+TAVILY_BASE_URL = "https://api.tavily.com"
+OPENAI_BASE_URL = "https://api.openai.com"
+
+# 업스트림 이름 -> (base_url, 기본 timeout)
+UPSTREAMS = {
+    "lastfm": (LASTFM_BASE_URL, 30.0),
+    "tavily": (TAVILY_BASE_URL, 30.0),
+    "openai": (OPENAI_BASE_URL, 30.0),
+}
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    """HTTP/2 사용 가능 여부 (h2 패키지 필요)"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _pool_limits() -> httpx.Limits:
+    """keep-alive 풀 설정
+
+    - HTTP_POOL_MAX_CONNECTIONS: 업스트림당 최대 연결 수 (기본 100)
+    - HTTP_POOL_MAX_KEEPALIVE: 유지할 idle 연결 수 (기본 20)
+    - HTTP_POOL_KEEPALIVE_EXPIRY: idle 연결 유지 시간(초) (기본 30)
+    """
+    settings = get_settings()
+    return httpx.Limits(
+        max_connections=settings.http_pool_max_connections,
+        max_keepalive_connections=settings.http_pool_max_keepalive,
+        keepalive_expiry=settings.http_pool_keepalive_expiry,
+    )
+
+
+def _create_client(name: str) -> httpx.AsyncClient:
+    base_url, timeout = UPSTREAMS[name]
+    http2 = get_settings().http_http2 and _http2_available()
+    # 모든 요청은 업스트림 스케줄러(요청률 + 적응형 동시성)를 거쳐 나가고,
+    # 재시도/헤지 요청/서킷 브레이커는 그 바깥에서 적용 (재시도도 요청률 한도를 따름)
+    transport = ResilientTransport(
+        ScheduledTransport(
+            httpx.AsyncHTTPTransport(limits=_pool_limits(), http2=http2),
+            get_scheduler(name)
+        ),
+        get_policy(name)
+    )
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=timeout,
+        transport=transport,
+    )
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """업스트림 공유 클라이언트 반환
+
+    lifespan 밖에서 호출된 경우(스크립트, 테스트 등)에는 지연 생성합니다.
+
+    Args:
+        name: "lastfm" | "tavily" | "openai"
+
+    Returns:
+        공유 httpx.AsyncClient
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _create_client(name)
+        _clients[name] = client
+    return client
+
+
+async def warm_up() -> None:
+    """업스트림마다 연결을 미리 열어 첫 요청의 TCP+TLS 핸드셰이크를 제거"""
+    if not get_settings().http_warmup:
+        return
+
+    async def _touch(name: str) -> None:
+        try:
+            await get_client(name).head("/", timeout=5.0)
+        except Exception:
+            pass  # 워밍업 실패는 무시 (첫 요청에서 다시 연결)
+
+    await asyncio.gather(*(_touch(name) for name in UPSTREAMS))
+
+
+async def close_clients() -> None:
+    """모든 공유 클라이언트 종료"""
+    clients = list(_clients.values())
+    _clients.clear()
+    await asyncio.gather(
+        *(client.aclose() for client in clients),
+        return_exceptions=True
+    )
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """FastMCP 서버 lifespan: 클라이언트 생성 → 워밍업 → 종료 시 정리"""
+    for name in UPSTREAMS:
+        get_client(name)
+    await warm_up()
+    print("업스트림 HTTP 클라이언트 풀 준비 완료", file=sys.stderr)
+    try:
+        yield {}
+    finally:
+        await close_clients()
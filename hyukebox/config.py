@@ -0,0 +1,234 @@
+"""
+서버 설정
+
+import 시점에는 아무것도 읽지 않고, get_settings()를 처음 호출할 때
+프로젝트 루트의 .env를 로드한 뒤 환경변수를 한 번 읽어 Settings로 보관합니다.
+필수 값 검증은 진입점(__main__.main)에서 validate()로 수행합니다.
+"""
+import importlib.util
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+PROJECT_ROOT = Path(__file__).parent.parent
+ENV_PATH = PROJECT_ROOT / ".env"
+
+
+def _flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# 업스트림별 기본값: (요청률, 최대 동시성)
+_UPSTREAM_DEFAULTS = {
+    "lastfm": ("5/second", 8),
+    "tavily": ("5/second", 8),
+    "openai": ("10/second", 16),
+}
+
+
+class UpstreamSettings:
+    """업스트림별 스케줄러/재시도 설정 (환경변수 {NAME}_RATE, {NAME}_RETRIES 등)"""
+
+    def __init__(
+        self,
+        rate: str,
+        max_concurrency: int,
+        retries: int,
+        retry_backoff: float,
+        retry_max_wait: float,
+        hedge_percentile: float,
+        breaker_threshold: int,
+        breaker_reset: float,
+    ):
+        self.rate = rate
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.retry_max_wait = retry_max_wait
+        self.hedge_percentile = hedge_percentile
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+
+
+class Settings:
+    """환경변수 기반 설정 (get_settings()로 가져오기)
+
+    숫자 값이 잘못된 환경변수는 기본값으로 대체하고 validate()에서 오류로 보고합니다.
+    """
+
+    def __init__(self):
+        self._invalid: list[str] = []
+
+        # API 키
+        self.lastfm_api_key = os.getenv("LASTFM_API_KEY")
+        self.tavily_api_key = os.getenv("TAVILY_API_KEY")
+        self.openai_api_key = os.getenv("OPENAI_API_KEY")
+
+        # 영구 캐시 (서사 SQLite, 키워드 역색인)
+        self.cache_dir = Path(os.getenv("HYUKEBOX_CACHE_DIR", PROJECT_ROOT / ".cache"))
+        self.narrative_cache_max_age = self._float("NARRATIVE_CACHE_MAX_AGE", 30 * 86400)
+        self.search_content_max_age = self._float("SEARCH_CONTENT_MAX_AGE", 30 * 86400)
+        self.search_content_max_chars = self._int("SEARCH_CONTENT_MAX_CHARS", 3000)
+        self.tag_index_refresh_after = self._float("TAG_INDEX_REFRESH_AFTER", 7 * 86400)
+        self.tag_index_save_interval = self._float("TAG_INDEX_SAVE_INTERVAL", 300)
+        self.tag_top_tracks_max_pages = self._int("TAG_TOP_TRACKS_MAX_PAGES", 3)
+
+        # Last.fm 응답 캐시
+        self.lastfm_cache_max_entries = self._int("LASTFM_CACHE_MAX_ENTRIES", 4096)
+        self.lastfm_cache_max_bytes = self._int("LASTFM_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+        # TTL이 지난 뒤에도 즉시 반환하며 백그라운드 갱신하는 기간(초), 이후 제거
+        self.lastfm_cache_stale_for = self._float("LASTFM_CACHE_STALE_FOR", 3600)
+
+        # search_songs_batch
+        self.search_batch_concurrency = self._int("SEARCH_BATCH_CONCURRENCY", 8)
+        self.search_batch_max_items = self._int("SEARCH_BATCH_MAX_ITEMS", 200)
+
+        # 후보곡 LLM 평가
+        self.llm_eval_token_budget = self._int("LLM_EVAL_TOKEN_BUDGET", 6000)
+        self.llm_eval_top_k = self._int("LLM_EVAL_TOP_K", 30)
+
+        # HTTP 배포 (MCP_TRANSPORT=http)
+        self.http_workers = max(1, self._int("MCP_WORKERS", 1))
+        self.stateless_http = _flag("MCP_STATELESS", True)
+        self.session_ttl = self._float("MCP_SESSION_TTL", 86400)
+
+        # 워커 간 공유 캐시 (none | sqlite | redis, 워커가 여러 개면 기본 sqlite)
+        self.cache_backend = (os.getenv("CACHE_BACKEND") or ("sqlite" if self.http_workers > 1 else "none")).strip().lower()
+        self.cache_sqlite_path = Path(os.getenv("CACHE_SQLITE_PATH", self.cache_dir / "shared_cache.sqlite3"))
+        self.cache_redis_url = os.getenv("CACHE_REDIS_URL")
+
+        # 차트 기반 캐시 워머 (기본 비활성)
+        self.warmer_enabled = _flag("WARMER_ENABLED", False)
+        self.warmer_charts = [c.strip() for c in os.getenv("WARMER_CHARTS", "global,south korea").split(",") if c.strip()]
+        self.warmer_top_n = self._int("WARMER_TOP_N", 50)
+        self.warmer_interval = self._float("WARMER_INTERVAL", 1800)
+        self.warmer_rate = os.getenv("WARMER_RATE", "20/minute")
+        self.warmer_narratives = _flag("WARMER_NARRATIVES", True)
+        self.warmer_openai_daily_tokens = self._int("WARMER_OPENAI_DAILY_TOKENS", 200000)
+        self.warmer_busy_inflight = self._int("WARMER_BUSY_INFLIGHT", 2)
+
+        # 트레이싱 (TRACE_EXPORT 미설정 시 비활성)
+        self.trace_export = (os.getenv("TRACE_EXPORT") or "").strip().lower() or None
+        self.trace_sample_rate = min(1.0, max(0.0, self._float("TRACE_SAMPLE_RATE", 0.1)))
+        self.trace_file = Path(os.getenv("TRACE_FILE", self.cache_dir / "traces.jsonl"))
+        self.trace_otlp_endpoint = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+
+        # 업스트림 HTTP 클라이언트 keep-alive 풀
+        self.http_pool_max_connections = self._int("HTTP_POOL_MAX_CONNECTIONS", 100)
+        self.http_pool_max_keepalive = self._int("HTTP_POOL_MAX_KEEPALIVE", 20)
+        self.http_pool_keepalive_expiry = self._float("HTTP_POOL_KEEPALIVE_EXPIRY", 30)
+        self.http_http2 = _flag("HTTP_HTTP2", True)
+        self.http_warmup = _flag("HTTP_WARMUP", True)
+
+        # 업스트림별 요청률/동시성/재시도/서킷 브레이커
+        self.upstreams = {
+            name: self._upstream(name, rate, max_concurrency)
+            for name, (rate, max_concurrency) in _UPSTREAM_DEFAULTS.items()
+        }
+
+        # OAuth (OAUTH_TOKEN_URL, OAUTH_JWKS_URL 모두 미설정 시 개발 모드)
+        self.oauth_token_url = os.getenv("OAUTH_TOKEN_URL") or None
+        self.oauth_jwks_url = os.getenv("OAUTH_JWKS_URL") or None
+        self.oauth_jwks_cache_ttl = self._float("OAUTH_JWKS_CACHE_TTL", 3600)
+        self.oauth_jwt_algorithms = [
+            a.strip() for a in os.getenv("OAUTH_JWT_ALGORITHMS", "RS256,ES256").split(",") if a.strip()
+        ]
+        self.oauth_audience = os.getenv("OAUTH_AUDIENCE") or None
+        self.oauth_issuer = os.getenv("OAUTH_ISSUER") or None
+        self.oauth_verify_cache_ttl = self._float("OAUTH_VERIFY_CACHE_TTL", 300)
+        self.oauth_verify_negative_ttl = self._float("OAUTH_VERIFY_NEGATIVE_TTL", 10)
+        self.oauth_verify_cache_size = self._int("OAUTH_VERIFY_CACHE_SIZE", 10000)
+
+        # Origin 검증, 클라이언트 Rate Limit
+        self.allowed_origins = os.getenv("ALLOWED_ORIGINS", "")
+        self.rate_limit = os.getenv("RATE_LIMIT", "100/minute")
+        self.rate_limit_redis_url = os.getenv("RATE_LIMIT_REDIS_URL") or None
+        self.rate_limit_max_keys = self._int("RATE_LIMIT_MAX_KEYS", 100000)
+
+    def _int(self, name: str, default: int) -> int:
+        value = os.getenv(name)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            self._invalid.append(f"{name}는 정수여야 합니다: {value}")
+            return default
+
+    def _float(self, name: str, default: float) -> float:
+        value = os.getenv(name)
+        if value is None:
+            return float(default)
+        try:
+            return float(value)
+        except ValueError:
+            self._invalid.append(f"{name}는 숫자여야 합니다: {value}")
+            return float(default)
+
+    def _upstream(self, name: str, rate: str, max_concurrency: int) -> UpstreamSettings:
+        prefix = name.upper()
+        return UpstreamSettings(
+            rate=os.getenv(f"{prefix}_RATE", rate),
+            max_concurrency=self._int(f"{prefix}_MAX_CONCURRENCY", max_concurrency),
+            retries=self._int(f"{prefix}_RETRIES", 2),
+            retry_backoff=self._float(f"{prefix}_RETRY_BACKOFF", 0.25),
+            retry_max_wait=self._float(f"{prefix}_RETRY_MAX_WAIT", 10),
+            hedge_percentile=self._float(f"{prefix}_HEDGE_PERCENTILE", 0),
+            breaker_threshold=self._int(f"{prefix}_BREAKER_THRESHOLD", 5),
+            breaker_reset=self._float(f"{prefix}_BREAKER_RESET", 30),
+        )
+
+    def upstream(self, name: str) -> UpstreamSettings:
+        """업스트림 설정 반환 (알 수 없는 이름은 10/second, 동시성 16 기본값)"""
+        settings = self.upstreams.get(name)
+        if settings is None:
+            settings = self.upstreams[name] = self._upstream(name, "10/second", 16)
+        return settings
+
+    def validate(self) -> list[str]:
+        """서버 시작에 필요한 설정 오류 목록 (Last.fm만 필수, 나머지는 선택)"""
+        from hyukebox.ratelimit import parse_rate
+
+        errors = list(self._invalid)
+        if not self.lastfm_api_key:
+            errors.append("LASTFM_API_KEY가 .env 파일에 설정되지 않았습니다.")
+        if self.cache_backend not in ("none", "sqlite", "redis"):
+            errors.append(f"CACHE_BACKEND는 none, sqlite, redis 중 하나여야 합니다: {self.cache_backend}")
+        if self.cache_backend == "redis" and not self.cache_redis_url:
+            errors.append("CACHE_BACKEND=redis에는 CACHE_REDIS_URL이 필요합니다.")
+        if self.cache_backend == "redis" and not importlib.util.find_spec("redis"):
+            errors.append("CACHE_BACKEND=redis에는 redis 패키지가 필요합니다 (pip install redis).")
+        if self.rate_limit_redis_url and not importlib.util.find_spec("redis"):
+            errors.append("RATE_LIMIT_REDIS_URL에는 redis 패키지가 필요합니다 (pip install redis).")
+        if not self.stateless_http and self.http_workers > 1 and self.cache_backend == "none":
+            errors.append("세션 모드(MCP_STATELESS=false)로 워커를 여러 개 쓰려면 CACHE_BACKEND(sqlite/redis)가 필요합니다.")
+        if self.trace_export not in (None, "jsonl", "otlp"):
+            errors.append(f"TRACE_EXPORT는 jsonl 또는 otlp여야 합니다: {self.trace_export}")
+        if self.oauth_jwks_url and not (importlib.util.find_spec("jwt") and importlib.util.find_spec("cryptography")):
+            errors.append("OAUTH_JWKS_URL(JWT 로컬 검증)에는 pyjwt[crypto] 패키지가 필요합니다 (pip install 'pyjwt[crypto]').")
+        rates = {"RATE_LIMIT": self.rate_limit}
+        rates.update((f"{name.upper()}_RATE", upstream.rate) for name, upstream in self.upstreams.items())
+        if self.warmer_enabled:
+            rates["WARMER_RATE"] = self.warmer_rate
+        for name, rate in rates.items():
+            try:
+                parse_rate(rate)
+            except ValueError:
+                errors.append(f"{name} 형식이 잘못되었습니다 (예: 20/minute): {rate}")
+        return errors
+
+
+_settings: Settings | None = None
+
+
+def get_settings() -> Settings:
+    """설정 반환 (처음 호출 시 .env 로드)"""
+    global _settings
+    if _settings is None:
+        load_dotenv(ENV_PATH)
+        _settings = Settings()
+    return _settings
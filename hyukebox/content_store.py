@@ -0,0 +1,219 @@
+"""
+가사 검색 결과(Tavily) 로컬 저장소 (SQLite, WAL 모드)
+
+describe_song 서사 프롬프트에 넣을 Tavily 검색 결과를 정리해서 검색어별로 보관합니다.
+프롬프트가 바뀌어 서사를 다시 만들 때도 Tavily를 다시 호출하지 않습니다.
+
+정리 (clean_search_results):
+- 보일러플레이트 제거: 저작권/공유/로그인 안내 같은 짧은 문장, URL
+- 중복 제거: 단어 4-gram shingle이 이미 나온 문장과 80% 이상 겹치면 제외 (결과 간, 반복 후렴)
+- 길이 제한: 전체 max_chars 글자까지 (서사 프롬프트 토큰 상한)
+
+저장 시 zstd(zstandard 설치 시) 또는 zlib로 압축하며, 행마다 코덱을 기록해 둘 다 읽을 수 있습니다.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+from hyukebox.cache import normalize_text
+
+_SHINGLE = 4
+_DUPLICATE_RATIO = 0.8
+# 이보다 짧은 문장만 보일러플레이트 패턴으로 제거 (가사 본문은 남김)
+_BOILERPLATE_MAX_CHARS = 80
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。])\s+|\s*\n+\s*")
+_URL = re.compile(r"https?://\S+")
+_BOILERPLATE = re.compile(
+    r"all rights reserved|copyright|©|lyrics (?:powered|provided|licensed) by|you might also like|"
+    r"\bembed\b|get tickets|cookie|privacy policy|terms of (?:use|service)|sign (?:in|up)|subscribe|"
+    r"advertisement|무단\s*(?:전재|배포|복제)|저작권|로그인|회원가입|공유하기|신고하기|댓글|"
+    r"관련\s*(?:기사|영상)|더보기|바로가기|앱에서 보기",
+    re.IGNORECASE,
+)
+
+_zstd_module = None  # 처음 압축할 때 import
+
+
+def _zstd():
+    """zstandard 모듈 (설치되어 있지 않으면 None)"""
+    global _zstd_module
+    if _zstd_module is None:
+        try:
+            import zstandard
+        except ImportError:
+            zstandard = False
+        _zstd_module = zstandard
+    return _zstd_module or None
+
+
+def _compress(data: bytes) -> tuple[str, bytes]:
+    zstd = _zstd()
+    if zstd is not None:
+        return "zstd", zstd.ZstdCompressor(level=10).compress(data)
+    return "zlib", zlib.compress(data, 9)
+
+
+def _decompress(codec: str, blob: bytes) -> bytes | None:
+    """압축 해제 (zstd로 저장됐는데 zstandard가 없으면 None)"""
+    if codec == "zlib":
+        return zlib.decompress(blob)
+    zstd = _zstd()
+    if codec == "zstd" and zstd is not None:
+        return zstd.ZstdDecompressor().decompress(blob)
+    return None
+
+
+def _shingles(words: list[str]) -> set[int]:
+    if len(words) < _SHINGLE:
+        return {hash(" ".join(words))}
+    return {hash(" ".join(words[i:i + _SHINGLE])) for i in range(len(words) - _SHINGLE + 1)}
+
+
+def clean_search_results(results: list[dict], max_chars: int = 3000) -> list[tuple[str, str]]:
+    """Tavily 검색 결과 정리 → [(제목, 내용), ...]
+
+    Args:
+        results: Tavily 응답의 results (title, content)
+        max_chars: 내용 전체 최대 글자 수
+
+    Returns:
+        보일러플레이트/중복 문장을 뺀 결과 (내용이 남지 않은 결과는 제외)
+    """
+    seen: set[int] = set()
+    cleaned = []
+    remaining = max_chars
+
+    for result in results:
+        if remaining <= 0:
+            break
+        content = _URL.sub("", str(result.get("content") or ""))
+
+        kept = []
+        for sentence in _SENTENCE_SPLIT.split(content):
+            sentence = " ".join(sentence.split())
+            if not sentence:
+                continue
+            if len(sentence) <= _BOILERPLATE_MAX_CHARS and _BOILERPLATE.search(sentence):
+                continue
+            shingles = _shingles(normalize_text(sentence).split())
+            if len(shingles & seen) >= _DUPLICATE_RATIO * len(shingles):
+                continue
+            seen |= shingles
+            kept.append(sentence)
+
+        text = " ".join(kept)
+        if len(text) > remaining:
+            cut = text.rfind(" ", 0, remaining)
+            text = text[:cut if cut > 0 else remaining]
+        if text:
+            cleaned.append((" ".join(str(result.get("title") or "").split()), text))
+            remaining -= len(text)
+
+    return cleaned
+
+
+def format_search_content(items: list[tuple[str, str]]) -> str:
+    """서사 프롬프트에 넣을 검색 결과 텍스트"""
+    return "\n\n".join(f"제목: {title}\n내용: {content}" for title, content in items)
+
+
+class ContentStore:
+    """검색어 → 정리된 검색 결과 저장소
+
+    이벤트 루프를 막지 않도록 읽기는 잠겨 있으면 기다리지 않고 miss,
+    쓰기는 전용 연결로 스레드에서 실행합니다 (NarrativeCache와 같은 방식).
+
+    Args:
+        path: SQLite 파일 경로
+        max_age: 항목 유효 기간(초), 0이면 만료 없음
+    """
+
+    def __init__(self, path: Path, max_age: float = 0):
+        self.path = Path(path)
+        self.max_age = max_age
+        self._conn: sqlite3.Connection | None = None
+        self._write_conn: sqlite3.Connection | None = None
+        self._write_lock = asyncio.Lock()  # 쓰기 연결은 한 번에 한 스레드만 사용
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self, timeout: float) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS search_content (
+                key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                data BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        conn.commit()
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = self._open(timeout=0)
+        return self._conn
+
+    def _writer(self) -> sqlite3.Connection:
+        if self._write_conn is None:
+            self._write_conn = self._open(timeout=2.0)
+        return self._write_conn
+
+    def _key(self, query: str) -> str:
+        return hashlib.sha256(normalize_text(query).encode("utf-8")).hexdigest()
+
+    def get(self, query: str) -> list[tuple[str, str]] | None:
+        """저장된 검색 결과 조회 (없거나 만료되면 None)"""
+        try:
+            row = self._connect().execute(
+                "SELECT codec, data, created_at FROM search_content WHERE key = ?",
+                (self._key(query),)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None  # 저장소 오류는 miss로 처리
+
+        data = None
+        if row is not None and not (self.max_age and time.time() - row[2] > self.max_age):
+            try:
+                data = _decompress(row[0], row[1])
+            except Exception:
+                data = None  # 손상된 항목은 다시 검색
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [tuple(item) for item in json.loads(data)]
+
+    async def set(self, query: str, items: list[tuple[str, str]]) -> None:
+        """정리된 검색 결과 압축 저장 (동일 검색어는 덮어씀)"""
+        async with self._write_lock:
+            await asyncio.to_thread(self._set, query, items)
+
+    def _set(self, query: str, items: list[tuple[str, str]]) -> None:
+        codec, blob = _compress(json.dumps(items, ensure_ascii=False).encode("utf-8"))
+        try:
+            conn = self._writer()
+            conn.execute(
+                "INSERT OR REPLACE INTO search_content VALUES (?, ?, ?, ?, ?)",
+                (self._key(query), query, codec, blob, time.time())
+            )
+            conn.commit()
+        except sqlite3.Error:
+            pass  # 저장 실패는 무시
+
+    def close(self) -> None:
+        for conn in (self._conn, self._write_conn):
+            if conn is not None:
+                conn.close()
+        self._conn = self._write_conn = None
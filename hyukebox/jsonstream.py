@@ -0,0 +1,106 @@
+"""
+스트리밍 JSON 파서: LLM 토큰 스트림에서 완성된 서사 조각을 즉시 추출
+
+OpenAI 스트림으로 들어오는 텍스트 조각을 순서대로 feed()하면,
+`summary` 문자열과 `narrative.stages[i]` 객체가 닫히는 즉시 반환합니다.
+JSON 앞뒤의 설명 문장이나 ```json 코드 블록 표시는 무시합니다.
+"""
+import json
+
+
+class NarrativeStreamParser:
+    """서사 JSON 증분 파서
+
+    사용 예:
+        parser = NarrativeStreamParser()
+        for chunk in chunks:
+            for kind, value in parser.feed(chunk):
+                ...  # ("summary", "...") 또는 ("stage", {...})
+    """
+
+    def __init__(self):
+        self._buffer = []          # 지금까지 받은 JSON 텍스트 (문자 단위)
+        self._started = False      # 첫 '{'를 만났는지
+        self._done = False         # 최상위 객체가 닫혔는지
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        # 컨테이너 스택: [타입('{' 또는 '['), 시작 위치, 현재 키, 키 대기 여부]
+        self._stack: list[list] = []
+        self._last_string: str | None = None
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, text: str) -> list[tuple[str, object]]:
+        """텍스트 조각을 처리하고 새로 완성된 (종류, 값) 목록 반환"""
+        events = []
+        for char in text:
+            if self._done:
+                break
+            if not self._started:
+                if char != "{":
+                    continue
+                self._started = True
+
+            pos = len(self._buffer)
+            self._buffer.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._on_string_end(pos, events)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char in "{[":
+                self._stack.append([char, pos, None, char == "{"])
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                _, start, _, _ = self._stack.pop()
+                if char == "}" and self._is_stage_path():
+                    events.append(("stage", self._load(start, pos)))
+                if not self._stack:
+                    self._done = True
+            elif char == ":":
+                if self._stack and self._stack[-1][0] == "{":
+                    self._stack[-1][2] = self._last_string
+                    self._stack[-1][3] = False
+            elif char == ",":
+                if self._stack and self._stack[-1][0] == "{":
+                    self._stack[-1][2] = None
+                    self._stack[-1][3] = True
+        return events
+
+    def _on_string_end(self, pos: int, events: list) -> None:
+        container = self._stack[-1] if self._stack else None
+        value = self._load(self._string_start, pos)
+        if container is not None and container[0] == "{" and container[3]:
+            # 객체의 키
+            self._last_string = value
+            return
+        # 최상위 객체의 summary 값
+        if len(self._stack) == 1 and container[2] == "summary":
+            events.append(("summary", value))
+
+    def _is_stage_path(self) -> bool:
+        """방금 닫힌 객체가 narrative.stages 배열의 원소인지"""
+        if len(self._stack) != 3:
+            return False
+        root, narrative, stages = self._stack
+        return (
+            root[0] == "{" and root[2] == "narrative"
+            and narrative[0] == "{" and narrative[2] == "stages"
+            and stages[0] == "["
+        )
+
+    def _load(self, start: int, end: int):
+        return json.loads("".join(self._buffer[start:end + 1]))
@@ -0,0 +1,289 @@
+"""
+Prometheus/OpenMetrics 메트릭
+
+- 툴별 지연 히스토그램 + 실행 중 요청 수 + 결과(ok/error) (ToolMetricsMiddleware)
+- 업스트림별(Last.fm 메서드, Tavily, OpenAI) 지연 히스토그램 + 상태 코드 카운터 (ScheduledTransport)
+- 캐시 적중/미스, 업스트림 동시성 (scrape 시점에 수집하는 collector)
+- OpenAI 토큰 사용량 (응답의 usage 필드)
+
+기록은 이벤트 루프 스레드에서만 일어나므로 잠금 없이 숫자만 더합니다.
+(라벨 조합별 자식 객체를 한 번 만들고 이후에는 dict 조회 + 덧셈)
+"""
+import contextvars
+import re
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+
+from fastmcp.server.middleware import Middleware as MCPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+_metrics: list["_Metric"] = []
+_collectors: list[Callable[[], Iterable[tuple]]] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+# ------------------------------------------------------------
+# 메트릭 타입
+# ------------------------------------------------------------
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Metric:
+    kind = ""
+    _child_class = _CounterChild
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        _metrics.append(self)
+
+    def _new_child(self):
+        return self._child_class()
+
+    def labels(self, *values):
+        """라벨 값 조합의 자식 메트릭 (처음 한 번만 생성)"""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f"# TYPE {self.name} {self.kind}", f"# HELP {self.name} {self.documentation}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: tuple, child) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """단조 증가 카운터 (노출 이름에 _total 추가)"""
+    kind = "counter"
+
+    def _render_child(self, values, child):
+        return [f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    _child_class = _GaugeChild
+
+    def total(self) -> float:
+        """모든 라벨 조합 값의 합 (예: 툴 전체의 실행 중 호출 수)"""
+        return sum(child.value for child in list(self._children.values()))
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = ()):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = f'le="{float(bound)!r}"' if bound != float("inf") else 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        return lines
+
+
+def register_collector(collector: Callable[[], Iterable[tuple]]) -> None:
+    """scrape 시점에 값을 읽는 collector 등록
+
+    collector는 (이름, 타입("gauge"|"counter"), 설명, [(라벨 dict, 값), ...]) 튜플을 반환합니다.
+    """
+    _collectors.append(collector)
+
+
+def render() -> str:
+    """OpenMetrics 텍스트"""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        for name, kind, documentation, samples in collector():
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"# HELP {name} {documentation}")
+            suffix = "_total" if kind == "counter" else ""
+            for labels, value in samples:
+                names = tuple(labels)
+                lines.append(f"{name}{suffix}{_format_labels(names, tuple(labels[n] for n in names))} {_format_value(value)}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """GET /metrics"""
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
+# ------------------------------------------------------------
+# 서버 메트릭
+# ------------------------------------------------------------
+
+TOOL_DURATION = Histogram(
+    "hyukebox_tool_duration_seconds", "MCP tool call latency",
+    ("tool",), buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+TOOL_CALLS = Counter("hyukebox_tool_calls", "MCP tool calls by outcome", ("tool", "outcome"))
+TOOL_INFLIGHT = Gauge("hyukebox_tool_inflight", "MCP tool calls in progress", ("tool",))
+
+UPSTREAM_DURATION = Histogram(
+    "hyukebox_upstream_duration_seconds", "Upstream HTTP latency (until response headers)",
+    ("upstream", "method"), buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+UPSTREAM_RESPONSES = Counter(
+    "hyukebox_upstream_responses", "Upstream responses by status code (error = network error)",
+    ("upstream", "method", "status"),
+)
+
+OPENAI_TOKENS = Counter("hyukebox_openai_tokens", "OpenAI token usage from response usage fields", ("model", "type"))
+
+
+# count_openai_tokens() 블록의 토큰 합계 ([합계] 리스트, 블록 밖이면 None)
+_openai_token_sink: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar("openai_token_sink", default=None)
+
+
+@contextmanager
+def count_openai_tokens():
+    """이 블록(및 여기서 생성된 Task)의 OpenAI 토큰 사용량을 [합계] 리스트로 누적"""
+    total = [0]
+    token = _openai_token_sink.set(total)
+    try:
+        yield total
+    finally:
+        _openai_token_sink.reset(token)
+
+
+def record_openai_usage(data: dict) -> None:
+    """OpenAI 응답(또는 스트림 마지막 청크)의 usage 기록"""
+    usage = data.get("usage")
+    if not usage:
+        return
+    sink = _openai_token_sink.get()
+    if sink is not None:
+        sink[0] += usage.get("total_tokens") or (usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0))
+    model = data.get("model") or "unknown"
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage.get(kind):
+            OPENAI_TOKENS.labels(model, kind.removesuffix("_tokens")).inc(usage[kind])
+
+
+# "Error: ...", "HTTP Error: ...", "OpenAI API Error (status ...)" 등
+_ERROR_PREFIX = re.compile(r"^(?:[\w.]+ )*Error\b")
+# 한 줄짜리 안내 텍스트로 반환하는 실패 (서사 생성 실패, 후보곡이 너무 적음 등)
+_FAILURE_WORDS = ("오류", "실패", "한도 초과", "유효하지 않", "너무 적습니다", "충분하지 않", "찾지 못했습니다", "없습니다")
+
+
+def is_error_result(result) -> bool:
+    """툴 결과가 실패인지 판별
+
+    툴은 실패를 예외 대신 안내 텍스트로 반환하므로 내용으로 판별합니다.
+    - isError가 설정된 결과
+    - "... Error"로 시작하는 텍스트
+    - 구조화 결과가 아닌 한 줄 텍스트에 실패 표현이 있는 경우 (정상 텍스트 응답은 여러 줄)
+
+    Args:
+        result: ToolResult 또는 TextContent
+    """
+    if getattr(result, "isError", False):
+        return True
+    if getattr(result, "structured_content", None):
+        return False
+    content = result.content if hasattr(result, "content") else [result]
+    text = getattr(content[0], "text", "") if content else ""
+    if _ERROR_PREFIX.match(text):
+        return True
+    return "\n" not in text.strip() and any(word in text for word in _FAILURE_WORDS)
+
+
+class ToolMetricsMiddleware(MCPMiddleware):
+    """FastMCP 미들웨어: 툴 호출 지연/실행 중 수/결과 기록 (예외 또는 실패 텍스트는 error)"""
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        inflight = TOOL_INFLIGHT.labels(tool)
+        inflight.inc()
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await call_next(context)
+            outcome = "error" if is_error_result(result) else "ok"
+            return result
+        finally:
+            inflight.dec()
+            TOOL_DURATION.labels(tool).observe(time.perf_counter() - start)
+            TOOL_CALLS.labels(tool, outcome).inc()
@@ -1,94 +1,264 @@
 """
-Starlette 미들웨어: OAuth 2.0 인증 및 보안
+ASGI 미들웨어: OAuth 2.0 인증 및 보안
+
+BaseHTTPMiddleware 대신 순수 ASGI로 구현하여 요청마다 추가 Task/메모리 스트림을
+만들지 않고, MCP HTTP 트랜스포트의 스트리밍 응답을 그대로 통과시킵니다.
 """
-import os
+import hashlib
+import math
+import time
+
 import httpx
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
 
+from hyukebox.cache import TTLCache
+from hyukebox.config import get_settings
+from hyukebox.ratelimit import MemoryBucketStore, RedisBucketStore, parse_rate
+
+# 인증/Rate Limit을 적용하지 않는 경로 (/metrics는 nginx에서 프록시하지 않음)
+UNAUTHENTICATED_PATHS = frozenset({"/health", "/metrics"})
+
+
+class OAuthMiddleware:
+    """OAuth 2.0 Bearer Token 검증 미들웨어
+
+    검증 결과는 토큰 해시 기준으로 캐시합니다.
+    - 유효한 토큰: introspection 응답의 exp/expires_in 과 OAUTH_VERIFY_CACHE_TTL 중 짧은 시간
+    - 무효한 토큰: OAUTH_VERIFY_NEGATIVE_TTL 동안 (짧게)
+
+    OAUTH_JWKS_URL이 설정되면 JWKS로 JWT 서명을 로컬 검증합니다 (왕복 없음).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        settings = get_settings()
+        self.token_url = settings.oauth_token_url
+        self.cache_ttl = settings.oauth_verify_cache_ttl
+        self.negative_ttl = settings.oauth_verify_negative_ttl
+        self.jwks_url = settings.oauth_jwks_url
+        self.jwks_ttl = settings.oauth_jwks_cache_ttl
+        self.jwt_algorithms = settings.oauth_jwt_algorithms
+        self.jwt_audience = settings.oauth_audience
+        self.jwt_issuer = settings.oauth_issuer
+        if self.jwks_url:
+            try:
+                import jwt  # noqa: F401
+            except ImportError:
+                raise RuntimeError("OAUTH_JWKS_URL을 사용하려면 pyjwt[crypto] 패키지가 필요합니다 (pip install 'pyjwt[crypto]')")
 
-class OAuthMiddleware(BaseHTTPMiddleware):
-    """OAuth 2.0 Bearer Token 검증 미들웨어"""
+        self._verified = TTLCache(max_entries=settings.oauth_verify_cache_size)
+        self._client: httpx.AsyncClient | None = None
+        self._jwks = None  # jwt.PyJWKSet
+        self._jwks_fetched_at = 0.0
 
-    async def dispatch(self, request, call_next):
-        # 1. Health check 엔드포인트는 인증 불필요
-        if request.url.path == "/health":
-            return await call_next(request)
+    async def __call__(self, scope, receive, send):
+        # 1. HTTP 요청이 아니거나 Health check/메트릭 엔드포인트는 인증 불필요
+        if scope["type"] != "http" or scope["path"] in UNAUTHENTICATED_PATHS:
+            return await self.app(scope, receive, send)
 
         # 2. Authorization 헤더 확인
-        auth_header = request.headers.get("Authorization")
+        auth_header = Headers(scope=scope).get("Authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
-            return JSONResponse(
+            response = JSONResponse(
                 {"error": "Missing or invalid Authorization header"},
                 status_code=401
             )
+            return await response(scope, receive, send)
 
         # 3. Token 추출
         token = auth_header.split(" ")[1]
 
-        # 4. Token 검증 (OAuth Provider API 호출)
+        # 4. Token 검증 (캐시 → JWKS 로컬 검증 또는 OAuth Provider API 호출)
         is_valid = await self.verify_token(token)
         if not is_valid:
-            return JSONResponse(
+            response = JSONResponse(
                 {"error": "Invalid or expired token"},
                 status_code=401
             )
+            return await response(scope, receive, send)
 
         # 5. 요청 진행
-        return await call_next(request)
+        await self.app(scope, receive, send)
 
-    async def verify_token(self, token: str) -> bool:
-        """OAuth Token 유효성 검증"""
-        token_url = os.getenv("OAUTH_TOKEN_URL")
+    def _get_client(self) -> httpx.AsyncClient:
+        """검증용 공유 클라이언트 (keep-alive 연결 재사용)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=5.0,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=10)
+            )
+        return self._client
 
-        if not token_url:
+    async def verify_token(self, token: str) -> bool:
+        """OAuth Token 유효성 검증 (결과 캐시)"""
+        if not self.token_url and not self.jwks_url:
             # OAuth가 설정되지 않은 경우 (개발 모드) - 모든 토큰 허용
             return True
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{token_url}/verify",
-                    headers={"Authorization": f"Bearer {token}"},
-                    timeout=5.0
-                )
-                return response.status_code == 200
-            except Exception:
-                return False
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        cached = self._verified.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            if self.jwks_url:
+                is_valid, ttl = await self._verify_jwt(token)
+            else:
+                is_valid, ttl = await self._introspect(self.token_url, token)
+        except Exception:
+            return False  # 네트워크 오류 등은 캐시하지 않음
+
+        self._verified.set(key, is_valid, ttl=ttl if is_valid else self.negative_ttl)
+        return is_valid
+
+    async def _introspect(self, token_url: str, token: str) -> tuple[bool, float]:
+        """OAuth Provider /verify 호출 → (유효 여부, 캐시 TTL)"""
+        response = await self._get_client().get(
+            f"{token_url}/verify",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        if response.status_code != 200:
+            return False, self.negative_ttl
 
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        return True, self._ttl_from_claims(data if isinstance(data, dict) else {})
 
-class OriginValidationMiddleware(BaseHTTPMiddleware):
-    """Origin 헤더 검증 (DNS rebinding 공격 방지)"""
+    def _ttl_from_claims(self, claims: dict) -> float:
+        """exp(절대 시각) 또는 expires_in(초)로 TTL 계산, cache_ttl로 상한"""
+        ttl = self.cache_ttl
+        try:
+            if "exp" in claims:
+                ttl = min(ttl, float(claims["exp"]) - time.time())
+            elif "expires_in" in claims:
+                ttl = min(ttl, float(claims["expires_in"]))
+        except (TypeError, ValueError):
+            pass
+        return max(ttl, 0.0)
 
-    async def dispatch(self, request, call_next):
-        allowed_origins = os.getenv("ALLOWED_ORIGINS", "").split(",")
-        origin = request.headers.get("Origin")
+    async def _get_jwks(self, force: bool = False):
+        """JWKS 조회 (jwks_ttl 동안 캐시, force여도 최소 30초 간격)"""
+        import jwt
 
+        age = time.monotonic() - self._jwks_fetched_at
+        if self._jwks is not None and age < self.jwks_ttl and not (force and age > 30):
+            return self._jwks
+
+        response = await self._get_client().get(self.jwks_url)
+        response.raise_for_status()
+        self._jwks = jwt.PyJWKSet.from_dict(response.json())
+        self._jwks_fetched_at = time.monotonic()
+        return self._jwks
+
+    async def _verify_jwt(self, token: str) -> tuple[bool, float]:
+        """JWKS 기반 JWT 서명/만료/aud/iss 로컬 검증 → (유효 여부, 캐시 TTL)"""
+        import jwt
+
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.PyJWTError:
+            return False, self.negative_ttl
+
+        jwks = await self._get_jwks()
+        signing_key = next((k for k in jwks.keys if k.key_id == kid), None)
+        if signing_key is None:
+            # 키 교체(rotation) 대응: JWKS 한 번 갱신 후 재시도
+            jwks = await self._get_jwks(force=True)
+            signing_key = next((k for k in jwks.keys if k.key_id == kid), None)
+        if signing_key is None:
+            return False, self.negative_ttl
+
+        try:
+            claims = jwt.decode(
+                token,
+                signing_key.key,
+                algorithms=self.jwt_algorithms,
+                audience=self.jwt_audience,
+                issuer=self.jwt_issuer,
+                options={"verify_aud": self.jwt_audience is not None}
+            )
+        except jwt.PyJWTError:
+            return False, self.negative_ttl
+
+        return True, self._ttl_from_claims(claims)
+
+
+class OriginValidationMiddleware:
+    """Origin 헤더 검증 (DNS rebinding 공격 방지)
+
+    허용 목록(ALLOWED_ORIGINS)은 생성 시 한 번만 파싱합니다.
+    """
+
+    def __init__(self, app, allowed_origins: str | None = None):
+        self.app = app
+        if allowed_origins is None:
+            allowed_origins = get_settings().allowed_origins
+        self.allowed_origins = frozenset(
+            origin.strip() for origin in allowed_origins.split(",") if origin.strip()
+        )
+
+    async def __call__(self, scope, receive, send):
         # Origin이 있고, 허용 목록이 설정된 경우에만 검증
-        if origin and allowed_origins and allowed_origins[0]:
-            if origin not in allowed_origins:
-                return JSONResponse(
+        if scope["type"] == "http" and self.allowed_origins:
+            origin = Headers(scope=scope).get("Origin")
+            if origin and origin not in self.allowed_origins:
+                response = JSONResponse(
                     {"error": "Origin not allowed"},
                     status_code=403
                 )
+                return await response(scope, receive, send)
+
+        await self.app(scope, receive, send)
 
-        return await call_next(request)
 
+class RateLimitMiddleware:
+    """토큰 버킷 Rate Limiting
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """간단한 Rate Limiting (메모리 기반)"""
+    - 클라이언트 키: IP (OAuth보다 먼저 실행, 토큰 검증 호출도 한도에 포함)
+    - 기본 저장소는 메모리 (idle 버킷 자동 축출로 메모리 상한 유지)
+    - RATE_LIMIT_REDIS_URL 설정 시 여러 프로세스가 Redis 버킷을 공유
+    - 초과 시 429 + Retry-After 헤더
+    """
 
-    def __init__(self, app, rate_limit: str = "100/minute"):
-        super().__init__(app)
-        self.rate_limit = rate_limit
-        self.requests = {}  # IP -> (count, timestamp)
+    def __init__(self, app, rate_limit: str | None = None, store=None):
+        self.app = app
+        settings = get_settings()
+        self.rate_limit = rate_limit or settings.rate_limit
+        self.capacity, self.refill_rate = parse_rate(self.rate_limit)
+
+        if store is None:
+            if settings.rate_limit_redis_url:
+                store = RedisBucketStore(settings.rate_limit_redis_url)
+            else:
+                store = MemoryBucketStore(max_keys=settings.rate_limit_max_keys)
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in UNAUTHENTICATED_PATHS:
+            return await self.app(scope, receive, send)
+
+        allowed, retry_after = await self.store.acquire(
+            self.client_key(scope), self.capacity, self.refill_rate
+        )
+        if not allowed:
+            response = JSONResponse(
+                {"error": "Rate limit exceeded"},
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+            return await response(scope, receive, send)
 
-    async def dispatch(self, request, call_next):
-        # 간단한 IP 기반 rate limiting 구현
-        # 실제 프로덕션에서는 Redis 등 사용 권장
-        client_ip = request.client.host if request.client else "unknown"
+        await self.app(scope, receive, send)
 
-        # TODO: Rate limit 체크 로직 구현
-        # 현재는 패스스루 (모든 요청 허용)
+    @staticmethod
+    def client_key(scope) -> str:
+        """Rate limit 키: 클라이언트 IP
 
-        return await call_next(request)
+        OAuth 검증보다 먼저 실행되므로 Bearer 토큰은 키로 쓰지 않습니다.
+        (검증 전 토큰을 키로 쓰면 요청마다 임의 토큰을 보내 한도를 우회하고 검증 호출을 유발할 수 있음)
+        """
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
@@ -0,0 +1,136 @@
+"""
+서사(narrative) 영구 캐시 (SQLite, WAL 모드)
+
+describe_song이 생성한 서사 JSON을 디스크에 보관하여 서비스 재시작 후에도
+Tavily 검색 + OpenAI 호출 없이 재사용합니다.
+키에 프롬프트 해시와 모델명이 포함되어 프롬프트가 바뀌면 자동으로 무효화됩니다.
+"""
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from hyukebox.cache import normalize_text
+
+
+def prompt_fingerprint(*parts: str) -> str:
+    """프롬프트 템플릿 + 모델명 해시 (캐시 무효화 기준)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class NarrativeCache:
+    """SQLite 기반 서사 JSON 캐시
+
+    워커 여러 개가 같은 파일을 쓰므로 이벤트 루프를 막지 않도록
+    - 읽기: 루프에서 바로 실행 (잠겨 있으면 기다리지 않고 miss)
+    - 쓰기: 전용 연결로 스레드에서 실행 (다른 워커의 쓰기가 끝날 때까지 최대 2초 대기)
+
+    Args:
+        path: SQLite 파일 경로
+        fingerprint: 프롬프트/모델 해시 (prompt_fingerprint)
+        max_age: 항목 유효 기간(초), 0이면 만료 없음
+    """
+
+    def __init__(self, path: Path, fingerprint: str, max_age: float = 0):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.max_age = max_age
+        self._conn: sqlite3.Connection | None = None
+        self._write_conn: sqlite3.Connection | None = None
+        self._write_lock = asyncio.Lock()  # 쓰기 연결은 한 번에 한 스레드만 사용
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self, timeout: float) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS narratives (
+                key TEXT PRIMARY KEY,
+                artist TEXT NOT NULL,
+                title TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        conn.commit()
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = self._open(timeout=0)
+        return self._conn
+
+    def _writer(self) -> sqlite3.Connection:
+        if self._write_conn is None:
+            self._write_conn = self._open(timeout=2.0)
+        return self._write_conn
+
+    def _key(self, artist: str, title: str) -> str:
+        raw = f"{normalize_text(artist)}\0{normalize_text(title)}\0{self.fingerprint}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, artist: str, title: str) -> dict | None:
+        """캐시된 서사 JSON 조회 (없거나 만료되면 None)"""
+        try:
+            row = self._connect().execute(
+                "SELECT data, created_at FROM narratives WHERE key = ?",
+                (self._key(artist, title),)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None  # 캐시 오류는 miss로 처리
+
+        if row is None or (self.max_age and time.time() - row[1] > self.max_age):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def contains(self, artist: str, title: str) -> bool:
+        """유효한 서사가 있는지 (적중/미스 카운터에 포함하지 않음)"""
+        try:
+            row = self._connect().execute(
+                "SELECT created_at FROM narratives WHERE key = ?",
+                (self._key(artist, title),)
+            ).fetchone()
+        except sqlite3.Error:
+            return False
+        return row is not None and not (self.max_age and time.time() - row[0] > self.max_age)
+
+    async def set(self, artist: str, title: str, data: dict) -> None:
+        """서사 JSON 저장 (동일 키는 덮어씀)"""
+        async with self._write_lock:
+            await asyncio.to_thread(self._set, artist, title, data)
+
+    def _set(self, artist: str, title: str, data: dict) -> None:
+        try:
+            conn = self._writer()
+            conn.execute(
+                "INSERT OR REPLACE INTO narratives VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(artist, title),
+                    artist,
+                    title,
+                    self.fingerprint,
+                    json.dumps(data, ensure_ascii=False),
+                    time.time(),
+                )
+            )
+            conn.commit()
+        except sqlite3.Error:
+            pass  # 캐시 저장 실패는 무시
+
+    def close(self) -> None:
+        for conn in (self._conn, self._write_conn):
+            if conn is not None:
+                conn.close()
+        self._conn = self._write_conn = None
@@ -0,0 +1,109 @@
+"""
+LLM 평가 전 로컬 사전 필터 (네트워크/모델 없이 CPU만 사용)
+
+후보곡의 태그(검색된 키워드 + 캐시된 Last.fm 태그)와 곡 정보를
+문자 n-gram 해시 TF-IDF 벡터로 만들고, 각 서사 단계의 키워드/설명과
+코사인 유사도를 계산하여 단계별 상위 top_k곡만 LLM 평가로 넘깁니다.
+
+문자 n-gram은 단어 경계를 포함하므로 "sad"/"sadness", "이별"/"이별노래"처럼
+표기가 조금 다른 태그끼리도 점수가 납니다.
+"""
+import math
+import zlib
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+
+from hyukebox.cache import normalize_text
+
+_NGRAM_SIZES = (2, 3, 4)
+_HASH_BUCKETS = 1 << 18
+
+
+@lru_cache(maxsize=65536)
+def _word_buckets(word: str) -> tuple[int, ...]:
+    """단어 하나의 문자 n-gram 해시 (태그는 반복이 많아 캐시)"""
+    padded = f" {word} "
+    return tuple(
+        zlib.crc32(padded[i:i + n].encode("utf-8")) & (_HASH_BUCKETS - 1)
+        for n in _NGRAM_SIZES
+        for i in range(len(padded) - n + 1)
+    )
+
+
+def _features(text: str) -> Counter:
+    """문자 n-gram 해시 → 등장 횟수"""
+    return Counter(chain.from_iterable(_word_buckets(word) for word in normalize_text(text).split()))
+
+
+def _tfidf(counts: Counter, idf: dict[int, float], default_idf: float) -> dict[int, float]:
+    """로그 TF × IDF 후 L2 정규화"""
+    vector = {
+        bucket: (1.0 + math.log(count)) * idf.get(bucket, default_idf)
+        for bucket, count in counts.items()
+    }
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if norm == 0:
+        return {}
+    return {bucket: value / norm for bucket, value in vector.items()}
+
+
+def candidate_text(candidate: dict) -> str:
+    """후보곡 문서: 태그를 두 번 넣어 곡 제목/아티스트보다 가중"""
+    tags = " ".join(candidate.get("tags", []))
+    return f"{tags} {tags} {candidate.get('title', '')} {candidate.get('artist', '')}"
+
+
+def stage_text(stage: dict) -> str:
+    """서사 단계 질의: 키워드를 두 번 넣어 설명보다 가중"""
+    keywords = " ".join(stage.get("keywords", []))
+    return f"{keywords} {keywords} {stage.get('title', '')} {stage.get('description', '')}"
+
+
+def rank_candidates_by_stage(
+    stages: list[dict],
+    candidates: list[dict],
+    top_k: int
+) -> list[list[int]]:
+    """단계별로 후보곡을 유사도 순으로 정렬하여 상위 top_k개의 인덱스 반환
+
+    Args:
+        stages: 서사 단계 리스트
+        candidates: 후보곡 리스트 ("tags" 키가 있으면 사용)
+        top_k: 단계별로 남길 후보곡 수
+
+    Returns:
+        단계 순서대로 후보곡 인덱스 리스트 (유사도 내림차순, 동점이면 원래 순서)
+    """
+    doc_counts = [_features(candidate_text(c)) for c in candidates]
+
+    # 후보곡 문서 기준 IDF (smooth)
+    df: dict[int, int] = {}
+    for counts in doc_counts:
+        for bucket in counts:
+            df[bucket] = df.get(bucket, 0) + 1
+    total = len(doc_counts)
+    idf = {bucket: math.log((1 + total) / (1 + freq)) + 1.0 for bucket, freq in df.items()}
+    default_idf = math.log(1 + total) + 1.0
+
+    # 질의 n-gram → [(단계 위치, 가중치)] (질의와 겹치는 n-gram만 후보곡 쪽에서 계산)
+    query_terms: dict[int, list[tuple[int, float]]] = {}
+    for pos, stage in enumerate(stages):
+        for bucket, weight in _tfidf(_features(stage_text(stage)), idf, default_idf).items():
+            query_terms.setdefault(bucket, []).append((pos, weight))
+
+    scores = [[0.0] * total for _ in stages]
+    for idx, counts in enumerate(doc_counts):
+        shared = counts.keys() & query_terms.keys()
+        if not shared:
+            continue
+        norm = math.sqrt(sum(((1.0 + math.log(count)) * idf[bucket]) ** 2 for bucket, count in counts.items()))
+        for bucket in shared:
+            value = (1.0 + math.log(counts[bucket])) * idf[bucket] / norm
+            for pos, weight in query_terms[bucket]:
+                scores[pos][idx] += weight * value
+
+    return [
+        sorted(range(total), key=lambda i: -stage_scores[i])[:top_k]
+        for stage_scores in scores
+    ]
@@ -0,0 +1,146 @@
+"""
+토큰 버킷 Rate Limiting
+
+- parse_rate: "100/minute" 형식 문자열 → (용량, 초당 충전량)
+- MemoryBucketStore: 프로세스 메모리 기반 (LRU + idle 버킷 자동 축출)
+- RedisBucketStore: 여러 프로세스가 공유하는 Redis 기반 (redis 패키지 필요)
+"""
+import time
+from collections import OrderedDict
+
+_PERIODS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+
+def parse_rate(rate_limit: str) -> tuple[float, float]:
+    """ "100/minute" → (capacity=100, rate=100/60 토큰/초)
+
+    Raises:
+        ValueError: 형식이 잘못된 경우
+    """
+    try:
+        count, period = rate_limit.strip().split("/")
+        count = float(count)
+        seconds = _PERIODS[period.strip().lower().rstrip("s")]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit: {rate_limit!r} (예: 100/minute)")
+    if count <= 0:
+        raise ValueError(f"Invalid rate limit: {rate_limit!r} (예: 100/minute)")
+    return count, count / seconds
+
+
+class MemoryBucketStore:
+    """키별 토큰 버킷 (O(1) 갱신, 메모리 상한 보장)
+
+    버킷은 마지막 사용 순서로 정렬되어 있으며,
+    - 가득 찬 상태로 복구된 idle 버킷(새 버킷과 동일)은 앞에서부터 제거하고
+    - max_keys를 넘으면 가장 오래 쓰지 않은 버킷을 제거합니다.
+
+    Args:
+        max_keys: 보관할 최대 버킷 수
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()  # key -> [tokens, updated_at]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> tuple[bool, float]:
+        """토큰 차감 시도
+
+        Returns:
+            (허용 여부, 재시도까지 대기 시간(초))
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = capacity
+        else:
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+
+        if tokens >= cost:
+            tokens -= cost
+            allowed, retry_after = True, 0.0
+        else:
+            allowed, retry_after = False, (cost - tokens) / rate
+
+        self._buckets[key] = [tokens, now]
+        self._buckets.move_to_end(key)
+        self._evict(now, capacity, rate)
+        return allowed, retry_after
+
+    async def acquire(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> tuple[bool, float]:
+        return self.take(key, capacity, rate, cost)
+
+    def _evict(self, now: float, capacity: float, rate: float) -> None:
+        # 호출당 최대 몇 개만 검사 (amortized O(1))
+        for _ in range(4):
+            if not self._buckets:
+                return
+            oldest_key = next(iter(self._buckets))
+            tokens, updated_at = self._buckets[oldest_key]
+            if len(self._buckets) > self.max_keys or tokens + (now - updated_at) * rate >= capacity:
+                del self._buckets[oldest_key]
+            else:
+                return
+
+
+# KEYS[1]=버킷 키, ARGV = capacity, rate, cost, now
+_REDIS_TOKEN_BUCKET = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+  tokens = capacity
+else
+  tokens = math.min(capacity, tokens + (now - ts) * rate)
+end
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBucketStore:
+    """Redis 공유 토큰 버킷 (멀티 프로세스/멀티 서버 배포용)
+
+    버킷은 가득 차는 데 걸리는 시간 후 자동 만료(PEXPIRE)되어 메모리가 유지됩니다.
+
+    Args:
+        url: Redis URL (예: redis://localhost:6379/0)
+        prefix: 키 prefix
+    """
+
+    def __init__(self, url: str, prefix: str = "hyukebox:ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RedisBucketStore를 사용하려면 redis 패키지가 필요합니다 (pip install redis)")
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def acquire(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> tuple[bool, float]:
+        allowed, retry_after = await self._script(
+            keys=[self.prefix + key],
+            args=[capacity, rate, cost, time.time()]
+        )
+        return bool(allowed), float(retry_after)
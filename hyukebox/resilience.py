@@ -0,0 +1,290 @@
+"""
+업스트림 장애 대응: 재시도, 헤지 요청, 서킷 브레이커
+
+ResilientTransport가 ScheduledTransport 바깥에서 동작하므로 재시도/헤지 요청도
+업스트림 스케줄러의 요청률/동시성 한도를 그대로 따릅니다.
+
+- 재시도: 429/5xx/연결 오류에 지수 백오프(full jitter)로 최대 {NAME}_RETRIES회.
+  Retry-After가 있으면 그만큼 기다리고, {NAME}_RETRY_MAX_WAIT보다 길면 재시도하지 않음.
+  POST는 요청이 전달되지 않은 경우(연결 실패, 429/502/503/504)만 재시도
+- 헤지 요청: GET이 최근 지연의 {NAME}_HEDGE_PERCENTILE 백분위를 넘으면 같은 요청을 하나 더 보내
+  먼저 끝난 응답 사용 (기본 비활성, 헤지 비율은 요청의 약 10%로 제한)
+- 서킷 브레이커: 연속 {NAME}_BREAKER_THRESHOLD회 실패하면 {NAME}_BREAKER_RESET초 동안
+  요청을 보내지 않고 즉시 CircuitOpenError, 이후 요청 하나로 회복 여부 확인
+"""
+import asyncio
+import math
+import random
+import time
+from collections import deque
+
+import httpx
+
+from hyukebox.config import get_settings
+from hyukebox.metrics import Counter, register_collector
+
+UPSTREAM_RETRIES = Counter("hyukebox_upstream_retries", "Upstream request retries by reason", ("upstream", "reason"))
+UPSTREAM_HEDGES = Counter("hyukebox_upstream_hedges", "Hedged upstream requests by winner", ("upstream", "winner"))
+BREAKER_REJECTIONS = Counter("hyukebox_upstream_breaker_rejections", "Requests failed fast by an open circuit breaker", ("upstream",))
+
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+# 서버가 요청을 처리하지 않았다고 볼 수 있는 상태 코드 (POST 재시도 가능)
+_NOT_PROCESSED_STATUS = frozenset({429, 502, 503, 504})
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+
+class CircuitOpenError(httpx.TransportError):
+    """서킷 브레이커가 열려 있어 요청을 보내지 않음"""
+
+
+class CircuitBreaker:
+    """연속 실패 기반 서킷 브레이커
+
+    Args:
+        threshold: 열리는 연속 실패 횟수
+        reset_timeout: 열린 뒤 확인 요청을 허용하기까지 시간(초)
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """요청을 보내도 되는지 (HALF_OPEN에서는 확인 요청 하나만 허용)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def retry_in(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """확인 요청이 결과 없이 끝남 (취소 등): 다음 요청이 다시 확인하도록 슬롯 반환"""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.threshold:
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class UpstreamPolicy:
+    """업스트림 하나의 재시도/헤지/브레이커 설정과 상태
+
+    Args:
+        name: 업스트림 이름
+        retries: 최대 재시도 횟수
+        backoff_base: 첫 재시도 백오프 상한(초), 이후 2배씩
+        backoff_max: 백오프 상한(초)
+        retry_max_wait: 이보다 긴 Retry-After는 재시도하지 않고 응답 반환
+        hedge_percentile: 헤지 기준 지연 백분위 (0이면 헤지 없음)
+        breaker: 서킷 브레이커
+    """
+
+    def __init__(
+        self,
+        name: str,
+        retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        retry_max_wait: float = 10.0,
+        hedge_percentile: float = 0.0,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.name = name
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_max_wait = retry_max_wait
+        self.hedge_percentile = hedge_percentile
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies: deque[float] = deque(maxlen=256)  # 최근 성공 응답 지연 (헤지 기준)
+        self._hedge_tokens = 1.0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def observe(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._hedge_tokens = min(10.0, self._hedge_tokens + 0.1)
+
+    def hedge_delay(self) -> float | None:
+        """헤지 요청을 보낼 대기 시간 (표본이 부족하거나 헤지 예산이 없으면 None)"""
+        if not self.hedge_percentile or len(self._latencies) < 20 or self._hedge_tokens < 1:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return max(ordered[index], 0.05)
+
+    def take_hedge(self) -> None:
+        self._hedge_tokens -= 1
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """재시도 + 헤지 요청 + 서킷 브레이커를 적용하는 httpx 트랜스포트"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: UpstreamPolicy):
+        self._transport = transport
+        self.policy = policy
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        policy = self.policy
+        idempotent = request.method in ("GET", "HEAD")
+        attempt = 0
+
+        while True:
+            if not policy.breaker.allow():
+                BREAKER_REJECTIONS.labels(policy.name).inc()
+                raise CircuitOpenError(
+                    f"{policy.name} 업스트림 일시 중단 (연속 실패, {math.ceil(policy.breaker.retry_in())}초 후 재시도)",
+                    request=request
+                )
+
+            try:
+                response = await self._send(request, idempotent)
+            except httpx.TransportError as e:
+                policy.breaker.record_failure()
+                # POST는 연결 전에 실패한 경우만 재시도
+                if attempt >= policy.retries or not (idempotent or isinstance(e, httpx.ConnectError)):
+                    raise
+                reason, wait = "error", policy.backoff(attempt)
+            except asyncio.CancelledError:
+                policy.breaker.release_probe()
+                raise
+            except BaseException:
+                policy.breaker.record_failure()
+                raise
+            else:
+                if response.status_code < 500:
+                    policy.breaker.record_success()  # 429/4xx도 업스트림은 살아 있음
+                else:
+                    policy.breaker.record_failure()
+
+                retryable = response.status_code in (_RETRY_STATUS if idempotent else _NOT_PROCESSED_STATUS)
+                if not retryable or attempt >= policy.retries:
+                    return response
+
+                retry_after = _retry_after(response)
+                if retry_after is not None and retry_after > policy.retry_max_wait:
+                    return response
+                await response.aclose()
+                reason = str(response.status_code)
+                wait = max(retry_after or 0.0, policy.backoff(attempt))
+
+            UPSTREAM_RETRIES.labels(policy.name, reason).inc()
+            attempt += 1
+            await asyncio.sleep(wait)
+
+    async def _send(self, request: httpx.Request, idempotent: bool) -> httpx.Response:
+        """요청 1회 (GET은 지연이 길어지면 헤지 요청)"""
+        delay = self.policy.hedge_delay() if idempotent else None
+        start = time.monotonic()
+        if delay is None:
+            response = await self._transport.handle_async_request(request)
+            if response.status_code < 400:
+                self.policy.observe(time.monotonic() - start)
+            return response
+        return await self._send_hedged(request, delay, start)
+
+    async def _send_hedged(self, request: httpx.Request, delay: float, start: float) -> httpx.Response:
+        primary = asyncio.ensure_future(self._transport.handle_async_request(request))
+        done, _ = await asyncio.wait([primary], timeout=delay)
+        if done:
+            response = primary.result()
+            if response.status_code < 400:
+                self.policy.observe(time.monotonic() - start)
+            return response
+
+        self.policy.take_hedge()
+        hedge = asyncio.ensure_future(self._transport.handle_async_request(request))
+        pending = {primary, hedge}
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    response = task.result()
+                    if response.status_code >= 500 and pending:
+                        await response.aclose()  # 다른 쪽 결과를 기다림
+                        continue
+                    UPSTREAM_HEDGES.labels(self.policy.name, "hedge" if task is hedge else "primary").inc()
+                    if response.status_code < 400:
+                        self.policy.observe(time.monotonic() - start)
+                    return response
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_close_late_response)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _close_late_response(task: asyncio.Task) -> None:
+    """취소가 늦어 완료된 헤지 요청의 응답 연결 반환"""
+    if not task.cancelled() and task.exception() is None:
+        asyncio.ensure_future(task.result().aclose())
+
+
+# 업스트림별 정책 (처음 사용할 때 생성)
+_policies: dict[str, UpstreamPolicy] = {}
+
+
+def get_policy(name: str) -> UpstreamPolicy:
+    """업스트림 정책 반환 (환경변수 {NAME}_RETRIES, {NAME}_HEDGE_PERCENTILE, {NAME}_BREAKER_* 등)"""
+    policy = _policies.get(name)
+    if policy is None:
+        settings = get_settings().upstream(name)
+        policy = UpstreamPolicy(
+            name,
+            retries=settings.retries,
+            backoff_base=settings.retry_backoff,
+            retry_max_wait=settings.retry_max_wait,
+            hedge_percentile=settings.hedge_percentile,
+            breaker=CircuitBreaker(
+                threshold=settings.breaker_threshold,
+                reset_timeout=settings.breaker_reset,
+            ),
+        )
+        _policies[name] = policy
+    return policy
+
+
+def _breaker_metrics():
+    states = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+    yield (
+        "hyukebox_upstream_breaker_state", "gauge", "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+        [({"upstream": policy.name}, states[policy.breaker.state]) for policy in _policies.values()]
+    )
+
+
+register_collector(_breaker_metrics)
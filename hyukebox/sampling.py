@@ -0,0 +1,119 @@
+"""
+단계별 가중치 샘플링 (비복원 추출)
+
+후보곡 점수를 단계별로 묶고, 온도 스케일 지수 가중치
+exp(score / 100 / temperature)에 비례하여 k곡을 중복 없이 뽑습니다.
+
+Gumbel-top-k: log(가중치) + Gumbel 노이즈가 큰 순서대로 k개를 고르면
+가중치 비례 비복원 추출과 정확히 같은 분포가 됩니다.
+
+NumPy가 설치되어 있으면 벡터 연산으로 처리하고 (수만 곡 규모),
+없으면 같은 알고리즘을 표준 라이브러리로 실행합니다 (pip install numpy).
+같은 seed라도 두 구현의 결과 순서는 다를 수 있습니다.
+"""
+import heapq
+import math
+import random
+
+_numpy_module = None  # 서버 시작 시간을 줄이기 위해 처음 샘플링할 때 import
+
+
+def _numpy():
+    """NumPy 모듈 (설치되어 있지 않으면 None)"""
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy_module = numpy
+    return _numpy_module or None
+
+
+def make_rng(seed: int | None = None):
+    """seed로 재현 가능한 난수 생성기 (NumPy Generator 또는 random.Random)"""
+    np = _numpy()
+    if np is not None:
+        return np.random.default_rng(seed)
+    return random.Random(seed)
+
+
+def sample_by_stage(
+    stage_ids: list[int],
+    scores: list[float],
+    stages: list[int],
+    k: int,
+    temperature: float = 1.0,
+    top_n: int | None = 10,
+    rng=None
+) -> dict[int, list[int]]:
+    """단계별로 후보곡 인덱스를 가중치 비례 비복원 추출
+
+    Args:
+        stage_ids: 후보곡별 best_stage
+        scores: 후보곡별 점수 (0-100)
+        stages: 샘플링할 단계 번호 목록
+        k: 단계별 추출 곡 수
+        temperature: 샘플링 온도 (높을수록 다양성 증가)
+        top_n: 단계별 상위 점수 n곡만 샘플링 대상 (None이면 전체)
+        rng: make_rng()로 만든 난수 생성기 (None이면 seed 없이 생성)
+
+    Returns:
+        {단계 번호: 선택된 후보곡 인덱스 리스트 (Gumbel 키 내림차순)}
+    """
+    if rng is None:
+        rng = make_rng()
+    if not isinstance(rng, random.Random):
+        return _sample_numpy(stage_ids, scores, stages, k, temperature, top_n, rng)
+    return _sample_python(stage_ids, scores, stages, k, temperature, top_n, rng)
+
+
+def _sample_numpy(stage_ids, scores, stages, k, temperature, top_n, rng) -> dict[int, list[int]]:
+    np = _numpy()
+    stage_arr = np.asarray(stage_ids, dtype=np.int64)
+    score_arr = np.asarray(scores, dtype=np.float64)
+
+    # 단계 오름차순, 같은 단계 안에서는 점수 내림차순으로 한 번만 정렬
+    order = np.lexsort((-score_arr, stage_arr))
+    sorted_stages = stage_arr[order]
+    log_weights = score_arr[order] / (100.0 * temperature)
+
+    wanted = np.asarray(stages, dtype=np.int64)
+    starts = np.searchsorted(sorted_stages, wanted, side="left")
+    ends = np.searchsorted(sorted_stages, wanted, side="right")
+    if top_n is not None:
+        ends = np.minimum(ends, starts + top_n)
+
+    keys = log_weights + rng.gumbel(size=log_weights.shape[0])
+
+    result = {}
+    for stage, start, end in zip(stages, starts.tolist(), ends.tolist()):
+        if start >= end:
+            continue
+        stage_keys = keys[start:end]
+        take = min(k, end - start)
+        top = np.argpartition(-stage_keys, take - 1)[:take]
+        top = top[np.argsort(-stage_keys[top])]
+        result[stage] = order[start + top].tolist()
+    return result
+
+
+def _sample_python(stage_ids, scores, stages, k, temperature, top_n, rng) -> dict[int, list[int]]:
+    groups: dict[int, list[int]] = {stage: [] for stage in stages}
+    for idx, stage in enumerate(stage_ids):
+        if stage in groups:
+            groups[stage].append(idx)
+
+    result = {}
+    for stage, indices in groups.items():
+        if not indices:
+            continue
+        if top_n is not None:
+            indices = heapq.nlargest(top_n, indices, key=lambda i: scores[i])
+        # Gumbel(0, 1) = -log(-log(U)), U ∈ (0, 1)
+        keyed = (
+            (scores[i] / (100.0 * temperature) - math.log(-math.log(rng.random() or 5e-324)), i)
+            for i in indices
+        )
+        result[stage] = [i for _, i in heapq.nlargest(k, keyed)]
+    return result
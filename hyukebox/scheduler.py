@@ -0,0 +1,264 @@
+"""
+업스트림 아웃바운드 스케줄러 (Last.fm / Tavily / OpenAI)
+
+업스트림마다 하나씩 두고, 모든 요청이 다음 두 조건을 만족할 때 출발합니다.
+- 토큰 버킷: 초당 요청 수 제한 (예: Last.fm ~5 req/s)
+- AIMD 동시성 한도: 429/5xx/지연 급증 시 절반으로 줄이고, 정상 응답마다 조금씩 회복
+
+대기 중인 요청은 우선순위 순으로 출발합니다. search_song 같은 대화형 툴은
+INTERACTIVE, recommend_songs의 대량 fan-out은 BACKGROUND 우선순위를 사용합니다.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import time
+from contextlib import contextmanager
+
+import httpx
+
+from hyukebox.config import get_settings
+from hyukebox.metrics import UPSTREAM_DURATION, UPSTREAM_RESPONSES, register_collector
+from hyukebox.ratelimit import parse_rate
+from hyukebox.tracing import start_span
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority():
+    """이 블록(및 여기서 생성된 Task)의 업스트림 요청을 BACKGROUND 우선순위로 실행"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class UpstreamScheduler:
+    """토큰 버킷 + AIMD 동시성 한도 + 우선순위 대기열
+
+    Args:
+        name: 업스트림 이름
+        rate_limit: "5/second" 형식 요청률
+        max_concurrency: 동시성 한도 상한
+        min_concurrency: 동시성 한도 하한
+    """
+
+    def __init__(self, name: str, rate_limit: str, max_concurrency: int = 16, min_concurrency: int = 1):
+        self.name = name
+        capacity, self.rate = parse_rate(rate_limit)
+        # 출발에는 토큰 1개가 필요하므로 버스트는 최소 1 (워커 수로 나눈 "0.625/second" 등)
+        self.capacity = max(1.0, capacity)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)  # 현재 AIMD 동시성 한도
+        self.inflight = 0
+
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0  # Retry-After 동안 출발 중지
+        self._last_decrease = 0.0
+        self._latency_ewma: float | None = None
+
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    # --------------------------------------------------------
+    # 출발 제어
+    # --------------------------------------------------------
+
+    async def acquire(self, priority: int | None = None) -> None:
+        """출발 허가를 받을 때까지 대기 (release와 짝으로 호출)"""
+        if priority is None:
+            priority = _priority.get()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # 허가 직후 취소된 경우 슬롯 반환
+            raise
+
+    def release(self) -> None:
+        self.inflight -= 1
+        self._dispatch()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        self._refill(now)
+
+        while self._waiters and self.inflight < int(self.limit):
+            priority, seq, future = self._waiters[0]
+            if future.done():  # 취소된 대기자
+                heapq.heappop(self._waiters)
+                continue
+
+            wait = max(self._paused_until - now, (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0)
+            if wait > 0:
+                self._schedule(wait)
+                return
+
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self.inflight += 1
+            future.set_result(None)
+
+    def _schedule(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + delay
+        if self._timer is not None:
+            when = self._timer.when()
+            if not self._timer.cancelled() and loop.time() <= when <= deadline:
+                return  # 이미 더 이른 타이머가 예약됨
+            self._timer.cancel()
+        self._timer = loop.call_at(deadline, self._fire)
+
+    def _fire(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    # --------------------------------------------------------
+    # AIMD 피드백
+    # --------------------------------------------------------
+
+    def record(self, status_code: int | None, latency: float, retry_after: float | None = None) -> None:
+        """응답 결과 반영 (status_code=None은 네트워크 오류)"""
+        now = time.monotonic()
+        spike = self._latency_ewma is not None and latency > max(3 * self._latency_ewma, 1.0)
+        if status_code is not None and status_code < 500 and status_code != 429:
+            self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+
+        if status_code == 429 or status_code is None or status_code >= 500 or spike:
+            # 같은 혼잡 구간에서 연속 감소하지 않도록 1초 간격 제한
+            if now - self._last_decrease > 1.0:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self._last_decrease = now
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+        else:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "inflight": self.inflight,
+            "waiting": len(self._waiters),
+            "tokens": self._tokens,
+            "latency_ewma": self._latency_ewma,
+        }
+
+
+def _retry_after_seconds(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class ScheduledTransport(httpx.AsyncBaseTransport):
+    """모든 요청을 UpstreamScheduler를 거쳐 보내는 httpx 트랜스포트"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, scheduler: UpstreamScheduler):
+        self._transport = transport
+        self.scheduler = scheduler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Last.fm은 모든 메서드가 같은 경로라 method 파라미터로 구분
+        method = request.url.params.get("method") or request.url.path
+        with start_span(f"upstream {self.scheduler.name} {method}", upstream=self.scheduler.name, method=method) as span:
+            queued = time.monotonic()
+            await self.scheduler.acquire()
+            span.set_attribute("queue_ms", (time.monotonic() - queued) * 1000)
+            response = await self._send(request, method)
+            span.set_attribute("status", response.status_code)
+            return response
+
+    async def _send(self, request: httpx.Request, method: str) -> httpx.Response:
+        start = time.monotonic()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            latency = time.monotonic() - start
+            self.scheduler.record(None, latency)
+            UPSTREAM_DURATION.labels(self.scheduler.name, method).observe(latency)
+            UPSTREAM_RESPONSES.labels(self.scheduler.name, method, "error").inc()
+            raise
+        finally:
+            self.scheduler.release()
+
+        latency = time.monotonic() - start
+        self.scheduler.record(
+            response.status_code,
+            latency,
+            _retry_after_seconds(response) if response.status_code == 429 else None
+        )
+        UPSTREAM_DURATION.labels(self.scheduler.name, method).observe(latency)
+        UPSTREAM_RESPONSES.labels(self.scheduler.name, method, str(response.status_code)).inc()
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+_schedulers: dict[str, UpstreamScheduler] = {}
+
+
+def _worker_share(rate_limit: str, workers: int) -> str:
+    """ "5/second", 워커 4개 → "1.25/second" (버스트는 UpstreamScheduler에서 최소 1로 보정)"""
+    if workers <= 1:
+        return rate_limit
+    count, _, period = rate_limit.partition("/")
+    return f"{float(count) / workers}/{period}"
+
+
+def get_scheduler(name: str) -> UpstreamScheduler:
+    """업스트림 스케줄러 반환 (환경변수 {NAME}_RATE, {NAME}_MAX_CONCURRENCY)
+
+    HTTP 워커가 여러 개(MCP_WORKERS)면 한도는 서버 전체 기준이므로 워커 수로 나눠 적용합니다.
+    """
+    scheduler = _schedulers.get(name)
+    if scheduler is None:
+        settings = get_settings()
+        upstream = settings.upstream(name)
+        workers = settings.http_workers
+        scheduler = UpstreamScheduler(
+            name,
+            _worker_share(upstream.rate, workers),
+            max_concurrency=max(1, math.ceil(upstream.max_concurrency / workers))
+        )
+        _schedulers[name] = scheduler
+    return scheduler
+
+
+def _scheduler_metrics():
+    schedulers = list(_schedulers.values())
+    yield (
+        "hyukebox_upstream_inflight", "gauge", "Upstream requests in flight",
+        [({"upstream": s.name}, s.inflight) for s in schedulers]
+    )
+    yield (
+        "hyukebox_upstream_waiting", "gauge", "Upstream requests waiting for the scheduler",
+        [({"upstream": s.name}, len(s._waiters)) for s in schedulers]
+    )
+    yield (
+        "hyukebox_upstream_concurrency_limit", "gauge", "Current AIMD concurrency limit",
+        [({"upstream": s.name}, s.limit) for s in schedulers]
+    )
+
+
+register_collector(_scheduler_metrics)
@@ -0,0 +1,125 @@
+"""
+구조화 출력 스키마 (search_song / describe_song의 structured 모드)
+
+사람이 읽는 텍스트 대신 필요한 필드만 담은 JSON(MCP structuredContent)을 반환해
+클라이언트 LLM이 다시 파싱하는 비용과 응답 크기를 줄입니다.
+fields로 일부 필드만 선택할 수 있습니다.
+"""
+import json
+
+from pydantic import BaseModel
+
+# 텍스트 출력과 같은 상위 N개
+TOP_TAGS = 10
+TOP_SIMILAR = 10
+
+
+class SimilarTrack(BaseModel):
+    artist: str
+    title: str
+    match: float  # Last.fm 유사도 (0-1)
+
+
+class SongInfo(BaseModel):
+    """search_song 구조화 출력"""
+    name: str | None = None
+    artist: str | None = None
+    album: str | None = None
+    playcount: int | None = None
+    listeners: int | None = None
+    tags: list[str] = []
+    similar: list[SimilarTrack] = []
+
+    @classmethod
+    def from_lastfm(cls, all_data: dict) -> "SongInfo":
+        """_fetch_song_data 결과 변환"""
+        info = {}
+
+        track = all_data.get("track_info", {}).get("track")
+        if track:
+            album = track.get("album") or {}
+            info.update(
+                name=track.get("name"),
+                artist=(track.get("artist") or {}).get("name"),
+                album=album.get("title"),
+                playcount=_to_int(track.get("playcount")),
+                listeners=_to_int(track.get("listeners")),
+            )
+
+        tags = lastfm_list(all_data.get("top_tags", {}).get("toptags", {}).get("tag"))
+        info["tags"] = [t["name"] for t in tags[:TOP_TAGS] if t.get("name")]
+
+        similar = lastfm_list(all_data.get("similar_tracks", {}).get("similartracks", {}).get("track"))
+        info["similar"] = [
+            SimilarTrack(
+                artist=(sim.get("artist") or {}).get("name", ""),
+                title=sim.get("name", ""),
+                match=_to_float(sim.get("match")),
+            )
+            for sim in similar[:TOP_SIMILAR]
+        ]
+        return cls(**info)
+
+
+class NarrativeStage(BaseModel):
+    step: int
+    title: str
+    description: str = ""
+    keywords: list[str] = []
+
+
+class SongNarrative(BaseModel):
+    """describe_song 구조화 출력"""
+    artist: str
+    title: str
+    summary: str
+    stages: list[NarrativeStage]
+
+    @classmethod
+    def from_narrative(cls, artist: str, title: str, data: dict) -> "SongNarrative":
+        """서사 JSON 변환 (형식이 맞지 않으면 pydantic.ValidationError / KeyError)"""
+        return cls(
+            artist=artist,
+            title=title,
+            summary=data["summary"],
+            stages=data["narrative"]["stages"],
+        )
+
+
+def check_fields(model: type[BaseModel], fields: list[str] | None) -> str | None:
+    """선택한 필드가 모델에 없으면 오류 메시지 반환"""
+    unknown = [f for f in fields or [] if f not in model.model_fields]
+    if unknown:
+        return f"알 수 없는 필드: {', '.join(unknown)} (선택 가능: {', '.join(model.model_fields)})"
+    return None
+
+
+def dump(value: BaseModel, fields: list[str] | None = None) -> dict:
+    """선택한 필드만, 값이 없는 필드는 빼고 dict로 변환"""
+    return value.model_dump(include=set(fields) if fields else None, exclude_none=True)
+
+
+def to_json(data: dict) -> str:
+    """structuredContent와 함께 보내는 텍스트 (공백 없는 JSON)"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def lastfm_list(value) -> list[dict]:
+    """Last.fm은 항목이 하나면 리스트 대신 dict 하나를 반환"""
+    if isinstance(value, dict):
+        return [value]
+    return [v for v in value or [] if isinstance(v, dict)]
+
+
+def _to_int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
@@ -2,27 +2,36 @@
 Hyukebox MCP Server
 Last.fm API를 활용한 음악 메타데이터 검색 서버
 """
-import os
-import sys
-from pathlib import Path
+import asyncio
+import json
+import re
+from contextlib import asynccontextmanager
 
 import httpx
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
+from fastmcp.tools.tool import ToolResult
 from mcp.types import TextContent
-
-# 환경변수 로드
-from dotenv import load_dotenv
-
-# 프로젝트 루트의 .env 파일 로드
-project_root = Path(__file__).parent.parent
-env_path = project_root / ".env"
-load_dotenv(env_path)
-
-# API 설정
-LASTFM_API_KEY = os.getenv("LASTFM_API_KEY")
+from pydantic import BaseModel
+
+from hyukebox.cache import TTLCache, normalize_text
+from hyukebox.clients import get_client, lifespan as clients_lifespan
+from hyukebox.config import get_settings
+from hyukebox.content_store import ContentStore, clean_search_results, format_search_content
+from hyukebox.jsonstream import NarrativeStreamParser
+from hyukebox.metrics import ToolMetricsMiddleware, record_openai_usage, register_collector
+from hyukebox.narrative_cache import NarrativeCache, prompt_fingerprint
+from hyukebox.prefilter import rank_candidates_by_stage
+from hyukebox.sampling import make_rng, sample_by_stage
+from hyukebox.scheduler import background_priority
+from hyukebox.schemas import SongInfo, SongNarrative, check_fields, dump, lastfm_list, to_json
+from hyukebox.shared_cache import close_shared_cache, get_shared_cache
+from hyukebox.tag_index import TagIndex
+from hyukebox.tracing import TracingMiddleware, close_tracing, start_span
+from hyukebox.singleflight import SingleFlight
+from hyukebox.warmer import CacheWarmer
+
+# API 설정 (API 키 등 환경변수는 hyukebox.config.get_settings()로 지연 로드)
 LASTFM_API_URL = "https://ws.audioscrobbler.com/2.0/"
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # 서사 생성용 프롬프트 템플릿
 NARRATIVE_SYSTEM_PROMPT = """당신은 음악 감정 분석 전문가입니다.
@@ -100,6 +109,78 @@ NARRATIVE_USER_TEMPLATE = """다음은 '{artist} - {title}' 곡에 대한 가사
 
 위 형식으로 '{artist} - {title}' 곡을 분석해주세요."""
 
+NARRATIVE_MODEL = "gpt-4o-mini"
+
+# 후보곡 배치 평가 요청 1개의 최대 출력 토큰
+LLM_EVAL_MAX_OUTPUT_TOKENS = 4000
+
+# 서사 영구 캐시 (프롬프트/모델이 바뀌면 키가 달라져 자동 무효화, 처음 사용할 때 생성)
+_narrative_cache: NarrativeCache | None = None
+
+
+def get_narrative_cache() -> NarrativeCache:
+    global _narrative_cache
+    if _narrative_cache is None:
+        settings = get_settings()
+        _narrative_cache = NarrativeCache(
+            settings.cache_dir / "narratives.sqlite3",
+            fingerprint=prompt_fingerprint(
+                NARRATIVE_SYSTEM_PROMPT, NARRATIVE_USER_TEMPLATE, NARRATIVE_MODEL
+            ),
+            max_age=settings.narrative_cache_max_age,
+        )
+    return _narrative_cache
+
+
+# 가사 검색 결과 저장소 (정리/압축된 Tavily 결과, 처음 사용할 때 생성)
+_content_store: ContentStore | None = None
+
+
+def get_content_store() -> ContentStore:
+    global _content_store
+    if _content_store is None:
+        settings = get_settings()
+        _content_store = ContentStore(
+            settings.cache_dir / "search_content.sqlite3",
+            max_age=settings.search_content_max_age,
+        )
+    return _content_store
+
+
+async def _get_search_content(artist: str, title: str) -> str | None:
+    """서사 프롬프트용 가사 검색 결과 (저장소 → Tavily 순서, 동일 곡 동시 호출은 합쳐짐)
+
+    Returns:
+        정리된 검색 결과 텍스트 (결과가 없으면 None)
+
+    Raises:
+        httpx.HTTPStatusError: Tavily 오류 응답
+    """
+    query = f"{artist} {title} 가사"
+    items = get_content_store().get(query)
+    if items is None:
+        items = await inflight.do(("search_content", normalize_text(query)), lambda: _fetch_search_content(query))
+    return format_search_content(items) if items else None
+
+
+async def _fetch_search_content(query: str) -> list[tuple[str, str]]:
+    """Tavily 검색 후 정리해서 저장소에 저장"""
+    tavily_response = await get_client("tavily").post(
+        "https://api.tavily.com/search",
+        json={
+            "api_key": get_settings().tavily_api_key,
+            "query": query,
+            "max_results": 3
+        }
+    )
+    tavily_response.raise_for_status()
+    results = tavily_response.json().get("results", [])
+
+    items = clean_search_results(results[:3], get_settings().search_content_max_chars)
+    if items:
+        await get_content_store().set(query, items)
+    return items
+
 # ============================================================
 # 추천 시스템용 평가 프롬프트 (비활성화됨 - 존재하지 않는 곡 추천 문제)
 # ============================================================
@@ -143,12 +224,243 @@ NARRATIVE_USER_TEMPLATE = """다음은 '{artist} - {title}' 곡에 대한 가사
 #   ]
 # }}"""
 
+# 배치 평가: 한 번의 요청으로 모든 후보곡 × 모든 서사 단계 점수 행렬 생성
+BATCH_EVALUATION_SYSTEM_PROMPT = """당신은 음악 큐레이션 전문가입니다.
+주어진 서사 흐름의 모든 단계에 대해 후보곡들이 각각 얼마나 적합한지 평가합니다.
+
+평가 기준: 감정/분위기 일치, 가사 테마 연결, 음악적 분위기, 키워드 매칭
+
+점수 기준 (0-100):
+- 90-100: 완벽히 일치 / 70-89: 잘 일치 / 50-69: 부분적 일치
+- 30-49: 약한 연관성 / 0-29: 불일치"""
+
+BATCH_EVALUATION_USER_TEMPLATE = """원곡 서사 요약: {summary}
+
+서사 단계:
+{stages_list}
+
+후보곡 리스트:
+{candidates_list}
+
+각 후보곡마다 모든 단계에 대한 점수를 단계 순서대로 매기고,
+가장 적합한 단계에 대한 이유를 한 문장으로 적어주세요.
+
+출력 형식 (JSON, 후보곡 번호 id 사용):
+{{
+  "scores": [
+    {{"id": 1, "scores": [85, 40, 12], "reason": "평가 이유"}},
+    ...
+  ]
+}}"""
+
+# 키워드 → 후보곡 로컬 역색인 (디스크 파일은 mmap으로 조회, 처음 사용할 때 생성)
+_tag_index: TagIndex | None = None
+
+
+def get_tag_index() -> TagIndex:
+    global _tag_index
+    if _tag_index is None:
+        settings = get_settings()
+        _tag_index = TagIndex(
+            settings.cache_dir / "tag_index.bin",
+            refresh_after=settings.tag_index_refresh_after,
+        )
+    return _tag_index
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """서버 lifespan: 업스트림 클라이언트 + 역색인 자동 저장 + 캐시 워머"""
+    settings = get_settings()  # .env를 클라이언트 생성 전에 로드
+    async with clients_lifespan(server):
+        tag_index = get_tag_index()
+        tag_index.start_autosave(settings.tag_index_save_interval)
+        warmer = _create_cache_warmer() if settings.warmer_enabled else None
+        if warmer is not None:
+            warmer.start()
+        try:
+            yield {}
+        finally:
+            if warmer is not None:
+                await warmer.close()
+            await tag_index.close()
+            if _lastfm_cache is not None:
+                _lastfm_cache.cancel_revalidations()
+            await close_shared_cache()
+            await close_tracing()
+
+
 # FastMCP 서버 생성
-mcp = FastMCP("Hyukebox")
+mcp = FastMCP("Hyukebox", lifespan=lifespan)
+mcp.add_middleware(ToolMetricsMiddleware())
+mcp.add_middleware(TracingMiddleware())
+
+
+def _cache_metrics():
+    """scrape 시점의 캐시 적중/미스 (아직 생성되지 않은 캐시는 생략)"""
+    caches = {
+        "lastfm": _lastfm_cache,
+        "narrative": _narrative_cache,
+        "search_content": _content_store,
+        "tag_index": _tag_index,
+        "shared": get_shared_cache(),
+    }
+    caches = {name: cache for name, cache in caches.items() if cache is not None}
+    yield (
+        "hyukebox_cache_hits", "counter", "Cache hits",
+        [({"cache": name}, cache.hits) for name, cache in caches.items()]
+    )
+    yield (
+        "hyukebox_cache_misses", "counter", "Cache misses",
+        [({"cache": name}, cache.misses) for name, cache in caches.items()]
+    )
+    yield (
+        "hyukebox_cache_stale_hits", "counter", "Stale cache hits served while revalidating",
+        [({"cache": "lastfm"}, _lastfm_cache.stale_hits)] if _lastfm_cache is not None else []
+    )
+    yield (
+        "hyukebox_cache_hit_ratio", "gauge", "Cache hits / lookups since start",
+        [
+            ({"cache": name}, cache.hits / (cache.hits + cache.misses))
+            for name, cache in caches.items() if cache.hits + cache.misses
+        ]
+    )
+
+
+register_collector(_cache_metrics)
+
+# ============================================================
+# Last.fm 응답 캐시
+# ============================================================
+
+# 메서드별 TTL (초): 재생 횟수는 자주 바뀌고, 태그/유사곡은 거의 바뀌지 않음
+LASTFM_CACHE_TTL = {
+    "track.getInfo": 300,
+    "track.getSimilar": 86400,
+    "track.getTopTags": 86400,
+    "tag.getTopTracks": 21600,
+    "track.search": 21600,
+    "chart.getTopTracks": 3600,
+    "geo.getTopTracks": 3600,
+}
+
+# 동일 곡에 대한 동시 호출 합치기 (single-flight)
+inflight = SingleFlight()
+
+_lastfm_cache: TTLCache | None = None
+
+
+def get_lastfm_cache() -> TTLCache:
+    global _lastfm_cache
+    if _lastfm_cache is None:
+        settings = get_settings()
+        _lastfm_cache = TTLCache(
+            max_entries=settings.lastfm_cache_max_entries,
+            max_bytes=settings.lastfm_cache_max_bytes,
+        )
+    return _lastfm_cache
+
+
+def _lastfm_cache_key(method: str, params: dict) -> tuple:
+    """(method, 정규화된 파라미터) 캐시 키 생성 (대소문자/공백 무시)"""
+    normalized = tuple(sorted(
+        (name, normalize_text(value))
+        for name, value in params.items()
+    ))
+    return (method, normalized)
+
+
+def _shared_cache_key(key: tuple) -> str:
+    return "lastfm:" + json.dumps(key, ensure_ascii=False, separators=(",", ":"))
+
+
+async def _lastfm_get(method: str, **params) -> dict:
+    """Last.fm API GET 호출 (TTL+LRU 캐시 → 워커 간 공유 캐시 → API 순서로 조회)
+
+    TTL이 지난 항목도 LASTFM_CACHE_STALE_FOR 동안은 즉시 반환하고,
+    백그라운드에서 키당 한 번만 다시 조회합니다 (stale-while-revalidate).
+
+    Args:
+        method: Last.fm API 메서드 (예: "track.getInfo")
+        **params: 메서드 파라미터 (artist, track, tag, limit 등)
+
+    Returns:
+        응답 JSON (Last.fm 오류 응답이면 "error" 키 포함, 캐시하지 않음)
+
+    Raises:
+        httpx.HTTPStatusError: HTTP 오류 응답
+    """
+    cache = get_lastfm_cache()
+    key = _lastfm_cache_key(method, params)
+    cached = cache.lookup(key)
+    if cached is not None:
+        data, stale = cached
+        if stale:
+            cache.revalidate(key, lambda: _lastfm_revalidate(key, method, params))
+        return data
+
+    ttl = LASTFM_CACHE_TTL.get(method, 300)
+    shared = get_shared_cache()
+    if shared is not None:
+        raw = await shared.get(_shared_cache_key(key))
+        if raw is not None:
+            data = json.loads(raw)
+            # 남은 TTL은 알 수 없으므로 로컬에는 짧게만 보관
+            cache.set(key, data, ttl=min(ttl, 60), size=len(raw), stale_ttl=get_settings().lastfm_cache_stale_for)
+            return data
+
+    return await _lastfm_fetch(key, method, params)
+
+
+async def _lastfm_fetch(key: tuple, method: str, params: dict) -> dict:
+    """Last.fm API 호출 후 로컬/공유 캐시 저장"""
+    response = await get_client("lastfm").get(
+        LASTFM_API_URL,
+        params={
+            **params,
+            "method": method,
+            "api_key": get_settings().lastfm_api_key,
+            "format": "json"
+        }
+    )
+    response.raise_for_status()
+    data = response.json()
+
+    if "error" not in data:
+        ttl = LASTFM_CACHE_TTL.get(method, 300)
+        get_lastfm_cache().set(
+            key, data, ttl=ttl, size=len(response.content),
+            stale_ttl=get_settings().lastfm_cache_stale_for
+        )
+        shared = get_shared_cache()
+        if shared is not None:
+            await shared.set(_shared_cache_key(key), response.content, ttl)
+    return data
+
+
+async def _lastfm_revalidate(key: tuple, method: str, params: dict) -> None:
+    """stale 항목 백그라운드 갱신 (다른 워커가 이미 갱신했으면 공유 캐시 값 사용)"""
+    with background_priority(), start_span("lastfm.revalidate", method=method):
+        shared = get_shared_cache()
+        if shared is not None:
+            raw = await shared.get(_shared_cache_key(key))
+            if raw is not None:
+                ttl = LASTFM_CACHE_TTL.get(method, 300)
+                get_lastfm_cache().set(
+                    key, json.loads(raw), ttl=min(ttl, 60), size=len(raw),
+                    stale_ttl=get_settings().lastfm_cache_stale_for
+                )
+                return
+        await _lastfm_fetch(key, method, params)
 
 
 @mcp.tool()
-async def search_song(artist: str, title: str) -> TextContent:
+async def search_song(
+    artist: str,
+    title: str,
+    structured: bool = False,
+    fields: list[str] | None = None
+) -> TextContent | ToolResult:
     """곡의 기본 정보, 태그, 비슷한 곡을 검색합니다.
 
     "화사의 good goodbye 정보 알려줘", "비슷한 곡 추천해줘" 같은 요청에 사용합니다.
@@ -156,115 +468,67 @@ async def search_song(artist: str, title: str) -> TextContent:
     Args:
         artist: 아티스트 이름
         title: 곡 제목
+        structured: True면 텍스트 대신 구조화된 JSON 반환
+            {name, artist, album, playcount, listeners, tags: [상위 10개],
+             similar: [{artist, title, match(0-1)}]}
+        fields: 구조화 출력에서 반환할 필드 (예: ["tags", "similar"], 지정하면 structured로 간주)
 
     Returns:
         곡 기본 정보 + 태그 + 유사곡 리스트
     """
-    # API 키 확인
-    if not LASTFM_API_KEY:
+    if structured or fields:
+        return await _search_song_structured(artist, title, fields)
+
+    key = ("search_song", normalize_text(artist), normalize_text(title))
+    return await inflight.do(key, lambda: _search_song(artist, title))
+
+
+def _structured_result(data: dict) -> ToolResult:
+    """구조화 출력 (structuredContent를 읽지 않는 클라이언트용으로 같은 JSON을 텍스트로도 포함)"""
+    return ToolResult(content=[TextContent(type="text", text=to_json(data))], structured_content=data)
+
+
+async def _search_song_structured(artist: str, title: str, fields: list[str] | None) -> TextContent | ToolResult:
+    """search_song 구조화 출력 (곡 데이터 조회는 search_songs_batch와 single-flight 공유)"""
+    error = check_fields(SongInfo, fields)
+    if error:
+        return TextContent(type="text", text=f"Error: {error}")
+
+    if not get_settings().lastfm_api_key:
         return TextContent(
             type="text",
             text="Error: LASTFM_API_KEY가 .env 파일에 설정되지 않았습니다."
         )
 
     try:
-        import json
-        import asyncio
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # 여러 API 병렬 호출
-            base_params = {
-                "api_key": LASTFM_API_KEY,
-                "artist": artist,
-                "track": title,
-                "format": "json"
-            }
+        key = ("song_data", normalize_text(artist), normalize_text(title))
+        all_data = await inflight.do(key, lambda: _fetch_song_data(artist, title))
+        return _structured_result(dump(SongInfo.from_lastfm(all_data), fields))
 
-            # 1. track.getInfo - 기본 곡 정보
-            info_params = {**base_params, "method": "track.getInfo"}
-
-            # 2. track.getSimilar - 유사곡
-            similar_params = {**base_params, "method": "track.getSimilar", "limit": 10}
-
-            # 3. track.getTopTags - 태그
-            tags_params = {**base_params, "method": "track.getTopTags"}
+    except httpx.HTTPStatusError as e:
+        return TextContent(
+            type="text",
+            text=f"HTTP Error: {e.response.status_code} - {e.response.text}"
+        )
+    except Exception as e:
+        return TextContent(
+            type="text",
+            text=f"Error: {str(e)}"
+        )
 
-            # 병렬 호출
-            info_task = client.get(LASTFM_API_URL, params=info_params)
-            similar_task = client.get(LASTFM_API_URL, params=similar_params)
-            tags_task = client.get(LASTFM_API_URL, params=tags_params)
 
-            info_res, similar_res, tags_res = await asyncio.gather(
-                info_task, similar_task, tags_task,
-                return_exceptions=True
-            )
+async def _search_song(artist: str, title: str) -> TextContent:
+    """search_song 실제 구현 (동일 곡 동시 호출은 single-flight로 합쳐짐)"""
+    # API 키 확인
+    if not get_settings().lastfm_api_key:
+        return TextContent(
+            type="text",
+            text="Error: LASTFM_API_KEY가 .env 파일에 설정되지 않았습니다."
+        )
 
-            # 응답 수집
-            all_data = {}
-
-            # track.getInfo
-            if not isinstance(info_res, Exception):
-                info_res.raise_for_status()
-                info_data = info_res.json()
-                if "error" not in info_data:
-                    all_data["track_info"] = info_data
-
-            # track.getSimilar
-            if not isinstance(similar_res, Exception):
-                similar_res.raise_for_status()
-                similar_data = similar_res.json()
-                if "error" not in similar_data:
-                    all_data["similar_tracks"] = similar_data
-
-            # track.getTopTags
-            if not isinstance(tags_res, Exception):
-                tags_res.raise_for_status()
-                tags_data = tags_res.json()
-                if "error" not in tags_data:
-                    all_data["top_tags"] = tags_data
-
-            # 결과 포맷팅
-            result_parts = []
-
-            # 기본 정보
-            if "track_info" in all_data:
-                track = all_data["track_info"].get("track", {})
-                result_parts.append("=== 곡 정보 ===")
-                result_parts.append(f"곡명: {track.get('name', 'N/A')}")
-                result_parts.append(f"아티스트: {track.get('artist', {}).get('name', 'N/A')}")
-
-                album = track.get("album", {})
-                if album:
-                    result_parts.append(f"앨범: {album.get('title', 'N/A')}")
-
-                playcount = track.get("playcount", "0")
-                listeners = track.get("listeners", "0")
-                try:
-                    result_parts.append(f"재생 횟수: {int(playcount):,} 회")
-                    result_parts.append(f"청취자: {int(listeners):,} 명")
-                except:
-                    result_parts.append(f"재생 횟수: {playcount} 회")
-                    result_parts.append(f"청취자: {listeners} 명")
-
-            # 태그
-            if "top_tags" in all_data:
-                tags = all_data["top_tags"].get("toptags", {}).get("tag", [])
-                if tags:
-                    tag_names = [t.get("name") for t in tags[:10]]
-                    result_parts.append(f"\n태그: {', '.join(tag_names)}")
-
-            # 유사곡
-            if "similar_tracks" in all_data:
-                similar = all_data["similar_tracks"].get("similartracks", {}).get("track", [])
-                if similar:
-                    result_parts.append("\n=== 비슷한 곡 ===")
-                    for i, sim in enumerate(similar[:10], 1):
-                        sim_name = sim.get("name", "")
-                        sim_artist = sim.get("artist", {}).get("name", "")
-                        match = sim.get("match", "0")
-                        result_parts.append(f"{i}. {sim_artist} - {sim_name} (유사도: {float(match)*100:.0f}%)")
-
-            return TextContent(type="text", text="\n".join(result_parts))
+    try:
+        all_data = await _fetch_song_data(artist, title)
+        return TextContent(type="text", text=_format_song_info(all_data))
 
     except httpx.HTTPStatusError as e:
         return TextContent(
@@ -278,11 +542,206 @@ async def search_song(artist: str, title: str) -> TextContent:
         )
 
 
+async def _fetch_song_data(artist: str, title: str) -> dict:
+    """곡 정보/유사곡/태그 3개 Last.fm API 병렬 호출
+
+    Returns:
+        {"track_info": ..., "similar_tracks": ..., "top_tags": ...} (성공한 항목만)
+
+    Raises:
+        httpx.HTTPStatusError: HTTP 오류 응답
+    """
+    # 여러 API 병렬 호출 (캐시 적용)
+    # 1. track.getInfo - 기본 곡 정보
+    # 2. track.getSimilar - 유사곡
+    # 3. track.getTopTags - 태그
+    info_res, similar_res, tags_res = await asyncio.gather(
+        _lastfm_get("track.getInfo", artist=artist, track=title),
+        _lastfm_get("track.getSimilar", artist=artist, track=title, limit=10),
+        _lastfm_get("track.getTopTags", artist=artist, track=title),
+        return_exceptions=True
+    )
+
+    # 응답 수집 (HTTP 오류는 그대로 전파)
+    all_data = {}
+    for key, res in (
+        ("track_info", info_res),
+        ("similar_tracks", similar_res),
+        ("top_tags", tags_res),
+    ):
+        if isinstance(res, httpx.HTTPStatusError):
+            raise res
+        if not isinstance(res, Exception) and "error" not in res:
+            all_data[key] = res
+
+    return all_data
+
+
+# ============================================================
+# 차트 기반 캐시 워머 (hyukebox.warmer)
+# ============================================================
+
+async def _chart_top_tracks(chart: str, limit: int) -> list[tuple[str, str]]:
+    """Last.fm 차트 상위 곡 ("global" → chart.getTopTracks, 나라 이름 → geo.getTopTracks)"""
+    if chart.casefold() == "global":
+        data = await _lastfm_get("chart.getTopTracks", limit=limit)
+    else:
+        data = await _lastfm_get("geo.getTopTracks", country=chart, limit=limit)
+    if "error" in data:
+        raise ValueError(data.get("message", f"차트 조회 실패: {chart}"))
+
+    tracks = data.get("tracks", {}).get("track", [])
+    if isinstance(tracks, dict):
+        tracks = [tracks]
+    songs = []
+    for track in tracks[:limit]:
+        artist = track.get("artist", {})
+        artist = artist.get("name", "") if isinstance(artist, dict) else str(artist)
+        if artist and track.get("name"):
+            songs.append((artist, track["name"]))
+    return songs
+
+
+async def _warm_song_data(artist: str, title: str) -> dict:
+    """search_song 데이터 캐시 채우기 (search_song 구조화 출력과 single-flight 공유)"""
+    key = ("song_data", normalize_text(artist), normalize_text(title))
+    return await inflight.do(key, lambda: _fetch_song_data(artist, title))
+
+
+def _create_cache_warmer() -> CacheWarmer:
+    settings = get_settings()
+    narratives = settings.warmer_narratives and settings.tavily_api_key and settings.openai_api_key
+    return CacheWarmer(
+        fetch_chart=_chart_top_tracks,
+        warm_song=_warm_song_data,
+        narrative_cached=get_narrative_cache().contains,
+        warm_narrative=_get_narrative_json if narratives else None,
+        charts=settings.warmer_charts,
+        top_n=settings.warmer_top_n,
+        interval=settings.warmer_interval,
+        rate_limit=settings.warmer_rate,
+        daily_tokens=settings.warmer_openai_daily_tokens,
+        busy_inflight=settings.warmer_busy_inflight,
+    )
+
+
+def _format_song_info(all_data: dict) -> str:
+    """_fetch_song_data 결과를 사람이 읽기 좋은 텍스트로 변환"""
+    result_parts = []
+
+    # 기본 정보
+    if "track_info" in all_data:
+        track = all_data["track_info"].get("track", {})
+        result_parts.append("=== 곡 정보 ===")
+        result_parts.append(f"곡명: {track.get('name', 'N/A')}")
+        result_parts.append(f"아티스트: {track.get('artist', {}).get('name', 'N/A')}")
+
+        album = track.get("album", {})
+        if album:
+            result_parts.append(f"앨범: {album.get('title', 'N/A')}")
+
+        playcount = track.get("playcount", "0")
+        listeners = track.get("listeners", "0")
+        try:
+            result_parts.append(f"재생 횟수: {int(playcount):,} 회")
+            result_parts.append(f"청취자: {int(listeners):,} 명")
+        except:
+            result_parts.append(f"재생 횟수: {playcount} 회")
+            result_parts.append(f"청취자: {listeners} 명")
+
+    # 태그
+    if "top_tags" in all_data:
+        tags = lastfm_list(all_data["top_tags"].get("toptags", {}).get("tag"))
+        if tags:
+            tag_names = [t.get("name") for t in tags[:10]]
+            result_parts.append(f"\n태그: {', '.join(tag_names)}")
+
+    # 유사곡
+    if "similar_tracks" in all_data:
+        similar = lastfm_list(all_data["similar_tracks"].get("similartracks", {}).get("track"))
+        if similar:
+            result_parts.append("\n=== 비슷한 곡 ===")
+            for i, sim in enumerate(similar[:10], 1):
+                sim_name = sim.get("name", "")
+                sim_artist = sim.get("artist", {}).get("name", "")
+                match = sim.get("match", "0")
+                result_parts.append(f"{i}. {sim_artist} - {sim_name} (유사도: {float(match)*100:.0f}%)")
+
+    return "\n".join(result_parts)
+
+
+class SongQuery(BaseModel):
+    """search_songs_batch 입력 항목"""
+    artist: str
+    title: str
+
+
+# search_songs_batch 전역 동시 실행 한도 (모든 배치 호출이 공유)
+_batch_semaphore: asyncio.Semaphore | None = None
+
+
+def _get_batch_semaphore() -> asyncio.Semaphore:
+    global _batch_semaphore
+    if _batch_semaphore is None:
+        _batch_semaphore = asyncio.Semaphore(get_settings().search_batch_concurrency)
+    return _batch_semaphore
+
+
+@mcp.tool()
+async def search_songs_batch(songs: list[SongQuery]) -> TextContent:
+    """여러 곡의 기본 정보, 태그, 비슷한 곡을 한 번에 검색합니다.
+
+    플레이리스트 분석처럼 많은 곡을 조회할 때 search_song을 반복 호출하는 대신 사용합니다.
+
+    Args:
+        songs: [{"artist": "아티스트", "title": "곡 제목"}, ...] (최대 200곡)
+
+    Returns:
+        곡별 검색 결과 또는 곡별 오류 메시지
+    """
+    if not get_settings().lastfm_api_key:
+        return TextContent(
+            type="text",
+            text="Error: LASTFM_API_KEY가 .env 파일에 설정되지 않았습니다."
+        )
+
+    max_items = get_settings().search_batch_max_items
+    if len(songs) > max_items:
+        return TextContent(
+            type="text",
+            text=f"Error: 한 번에 최대 {max_items}곡까지 조회할 수 있습니다 ({len(songs)}곡 요청)."
+        )
+
+    async def _search_one(song: SongQuery) -> tuple[bool, str]:
+        artist, title = song.artist, song.title
+        try:
+            async with _get_batch_semaphore():
+                key = ("song_data", normalize_text(artist), normalize_text(title))
+                all_data = await inflight.do(key, lambda: _fetch_song_data(artist, title))
+            if "track_info" not in all_data:
+                return False, "Error: 곡 정보를 찾지 못했습니다."
+            return True, _format_song_info(all_data)
+        except httpx.HTTPStatusError as e:
+            return False, f"HTTP Error: {e.response.status_code} - {e.response.text}"
+        except Exception as e:
+            return False, f"Error: {str(e)}"
+
+    # 대량 조회는 대화형 툴보다 낮은 우선순위로 업스트림 호출
+    with background_priority():
+        results = await asyncio.gather(*(_search_one(song) for song in songs))
+
+    success = sum(1 for ok, _ in results if ok)
+    lines = [f"총 {len(songs)}곡 조회 (성공 {success}, 실패 {len(songs) - success})"]
+    for i, (song, (_, text)) in enumerate(zip(songs, results), 1):
+        lines.append("")
+        lines.append(f"##### [{i}/{len(songs)}] {song.artist} - {song.title} #####")
+        lines.append(text)
+
+    return TextContent(type="text", text="\n".join(lines))
+
+
 def extract_json_from_response(text: str) -> dict:
     """OpenAI 응답에서 JSON 추출 및 파싱"""
-    import json
-    import re
-
     # 1. JSON 코드 블록 찾기 (```json ... ```)
     json_match = re.search(r'```json\s*(\{.*?\})\s*```', text, re.DOTALL)
     if json_match:
@@ -324,8 +783,83 @@ def format_narrative_output(artist: str, title: str, data: dict) -> str:
     return "\n".join(lines)
 
 
+def _format_partial_narrative(kind: str, value) -> str:
+    """스트리밍 중 완성된 서사 조각을 한 줄 텍스트로 변환"""
+    if kind == "summary":
+        return f"요약: {value}"
+    keywords = ", ".join(value.get("keywords", []))
+    return f"{value.get('step', '?')}. {value.get('title', '')} (키워드: {keywords})"
+
+
+async def _stream_narrative_completion(
+    client: httpx.AsyncClient,
+    payload: dict,
+    ctx: Context
+) -> str:
+    """OpenAI SSE 스트림으로 서사 생성, summary/각 단계가 완성될 때마다 진행 알림 전송
+
+    Args:
+        client: OpenAI 공유 클라이언트
+        payload: chat/completions 요청 본문
+        ctx: MCP 요청 컨텍스트 (progress 알림용)
+
+    Returns:
+        전체 응답 텍스트
+
+    Raises:
+        httpx.HTTPStatusError: OpenAI 오류 응답
+    """
+    parser = NarrativeStreamParser()
+    parts = []
+    progress = 0
+
+    async with client.stream(
+        "POST",
+        "https://api.openai.com/v1/chat/completions",
+        json={**payload, "stream": True, "stream_options": {"include_usage": True}},
+        headers={
+            "Authorization": f"Bearer {get_settings().openai_api_key}",
+            "Content-Type": "application/json"
+        }
+    ) as response:
+        if response.status_code >= 400:
+            await response.aread()  # 오류 메시지(e.response.text)용
+        response.raise_for_status()
+
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+
+            chunk = json.loads(data)
+            record_openai_usage(chunk)  # 마지막 청크에만 usage 포함
+            choices = chunk.get("choices") or []
+            delta = choices[0].get("delta", {}).get("content") if choices else None
+            if not delta:
+                continue
+
+            parts.append(delta)
+            for kind, value in parser.feed(delta):
+                progress += 1
+                await ctx.report_progress(
+                    progress=progress,
+                    message=_format_partial_narrative(kind, value)
+                )
+
+    return "".join(parts).strip()
+
+
 @mcp.tool()
-async def describe_song(artist: str, title: str) -> TextContent:
+async def describe_song(
+    artist: str,
+    title: str,
+    stream: bool = False,
+    structured: bool = False,
+    fields: list[str] | None = None,
+    ctx: Context | None = None
+) -> TextContent | ToolResult:
     """곡의 주제를 요약하고 감정/스토리/무드 복합 서사를 생성합니다.
 
     "이 곡은 어떤 노래야?", "이 곡 서사 알려줘" 같은 요청에 사용합니다.
@@ -333,123 +867,169 @@ async def describe_song(artist: str, title: str) -> TextContent:
     Args:
         artist: 아티스트 이름
         title: 곡 제목
+        stream: True면 요약과 각 서사 단계를 완성되는 즉시 진행 알림(progress)으로 전송
+        structured: True면 텍스트 대신 구조화된 JSON 반환 (stream은 무시)
+            {artist, title, summary, stages: [{step, title, description, keywords}]}
+        fields: 구조화 출력에서 반환할 필드 (예: ["stages"], 지정하면 structured로 간주)
 
     Returns:
         요약 + 서사 흐름 (3-7단계) + 각 단계별 키워드
     """
+    if structured or fields:
+        return await _describe_song_structured(artist, title, fields)
+
+    if stream and ctx is not None:
+        # 스트리밍은 호출자마다 진행 알림을 받아야 하므로 single-flight를 거치지 않음
+        return await _describe_song(artist, title, ctx)
+
+    key = ("describe_song", normalize_text(artist), normalize_text(title))
+    return await inflight.do(key, lambda: _describe_song(artist, title))
+
+
+async def _describe_song_structured(artist: str, title: str, fields: list[str] | None) -> TextContent | ToolResult:
+    """describe_song 구조화 출력 (서사 생성은 추천 파이프라인과 single-flight/캐시 공유)"""
+    error = check_fields(SongNarrative, fields)
+    if error:
+        return TextContent(type="text", text=f"Error: {error}")
+
+    for name in ("tavily", "openai"):
+        if not getattr(get_settings(), f"{name}_api_key"):
+            return TextContent(
+                type="text",
+                text=f"Error: {name.upper()}_API_KEY가 .env 파일에 설정되지 않았습니다."
+            )
+
+    try:
+        narrative_data = await _get_narrative_json(artist, title)
+        narrative = SongNarrative.from_narrative(artist, title, narrative_data)
+        return _structured_result(dump(narrative, fields))
+
+    except httpx.HTTPStatusError as e:
+        return TextContent(
+            type="text",
+            text=f"HTTP Error: {e.response.status_code} - {e.response.text}"
+        )
+    except ValueError as e:
+        # 가사 검색 결과 없음 / 서사 생성·파싱 실패 (pydantic.ValidationError 포함)
+        return TextContent(type="text", text=str(e))
+    except Exception as e:
+        return TextContent(
+            type="text",
+            text=f"Error: {str(e)}"
+        )
+
+
+async def _describe_song(artist: str, title: str, ctx: Context | None = None) -> TextContent:
+    """describe_song 실제 구현 (ctx가 있으면 OpenAI 응답을 스트리밍)"""
     # API 키 확인
-    if not TAVILY_API_KEY:
+    if not get_settings().tavily_api_key:
         return TextContent(
             type="text",
             text="Error: TAVILY_API_KEY가 .env 파일에 설정되지 않았습니다."
         )
 
-    if not OPENAI_API_KEY:
+    if not get_settings().openai_api_key:
         return TextContent(
             type="text",
             text="Error: OPENAI_API_KEY가 .env 파일에 설정되지 않았습니다."
         )
 
+    # 캐시된 서사가 있으면 바로 반환
+    cached = get_narrative_cache().get(artist, title)
+    if cached is not None:
+        try:
+            return TextContent(
+                type="text",
+                text=format_narrative_output(artist, title, cached)
+            )
+        except (KeyError, TypeError):
+            pass  # 형식이 맞지 않으면 새로 생성
+
     try:
-        import json
+        openai_client = get_client("openai")
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # 1. Tavily API로 가사 웹 검색
-            search_query = f"{artist} {title} 가사"
+        # 1. 가사 검색 결과 (저장소에 없으면 Tavily 웹 검색)
+        try:
+            search_content = await _get_search_content(artist, title)
+        except httpx.HTTPStatusError as e:
+            return TextContent(
+                type="text",
+                text=f"Tavily API Error (status {e.response.status_code}): {e.response.text}"
+            )
 
-            tavily_payload = {
-                "api_key": TAVILY_API_KEY,
-                "query": search_query,
-                "max_results": 3
-            }
+        if search_content is None:
+            return TextContent(
+                type="text",
+                text=f"웹에서 '{artist} - {title}' 가사 정보를 찾지 못했습니다."
+            )
 
-            try:
-                tavily_response = await client.post(
-                    "https://api.tavily.com/search",
-                    json=tavily_payload
-                )
-                tavily_response.raise_for_status()
-                tavily_data = tavily_response.json()
-            except httpx.HTTPStatusError as e:
-                return TextContent(
-                    type="text",
-                    text=f"Tavily API Error (status {e.response.status_code}): {e.response.text}"
-                )
+        # 2. OpenAI API로 서사 생성
+        openai_payload = {
+            "model": NARRATIVE_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": NARRATIVE_SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": NARRATIVE_USER_TEMPLATE.format(
+                        artist=artist,
+                        title=title,
+                        search_content=search_content
+                    )
+                }
+            ],
+            "temperature": 0.7,
+            "max_tokens": 2000
+        }
 
-            # 검색 결과 추출
-            results = tavily_data.get("results", [])
-            if not results:
-                return TextContent(
-                    type="text",
-                    text=f"웹에서 '{artist} - {title}' 가사 정보를 찾지 못했습니다."
+        try:
+            if ctx is not None:
+                response_text = await _stream_narrative_completion(
+                    openai_client, openai_payload, ctx
                 )
-
-            # 검색 결과 텍스트 합치기
-            search_content = "\n\n".join([
-                f"제목: {r.get('title', '')}\n내용: {r.get('content', '')}"
-                for r in results[:3]
-            ])
-
-            # 2. OpenAI API로 서사 생성
-            openai_payload = {
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": NARRATIVE_SYSTEM_PROMPT
-                    },
-                    {
-                        "role": "user",
-                        "content": NARRATIVE_USER_TEMPLATE.format(
-                            artist=artist,
-                            title=title,
-                            search_content=search_content
-                        )
-                    }
-                ],
-                "temperature": 0.7,
-                "max_tokens": 2000
-            }
-
-            try:
-                openai_response = await client.post(
+            else:
+                openai_response = await openai_client.post(
                     "https://api.openai.com/v1/chat/completions",
                     json=openai_payload,
                     headers={
-                        "Authorization": f"Bearer {OPENAI_API_KEY}",
+                        "Authorization": f"Bearer {get_settings().openai_api_key}",
                         "Content-Type": "application/json"
                     }
                 )
                 openai_response.raise_for_status()
                 openai_data = openai_response.json()
-            except httpx.HTTPStatusError as e:
-                error_detail = e.response.text
-                return TextContent(
-                    type="text",
-                    text=f"OpenAI API Error (status {e.response.status_code}): {error_detail}"
-                )
+                record_openai_usage(openai_data)
 
-            # 응답 파싱
-            response_text = openai_data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+                # 응답 파싱
+                response_text = openai_data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+        except httpx.HTTPStatusError as e:
+            error_detail = e.response.text
+            return TextContent(
+                type="text",
+                text=f"OpenAI API Error (status {e.response.status_code}): {error_detail}"
+            )
 
-            if not response_text:
-                return TextContent(
-                    type="text",
-                    text="서사 생성에 실패했습니다."
-                )
+        if not response_text:
+            return TextContent(
+                type="text",
+                text="서사 생성에 실패했습니다."
+            )
 
-            try:
-                # JSON 추출 및 파싱
-                narrative_data = extract_json_from_response(response_text)
+        try:
+            # JSON 추출 및 파싱
+            narrative_data = extract_json_from_response(response_text)
 
-                # 사람이 읽기 좋은 형식으로 변환
-                result = format_narrative_output(artist, title, narrative_data)
+            # 사람이 읽기 좋은 형식으로 변환
+            result = format_narrative_output(artist, title, narrative_data)
+            await get_narrative_cache().set(artist, title, narrative_data)
 
-            except (ValueError, json.JSONDecodeError, KeyError) as e:
-                # 파싱 실패 시 원본 텍스트 반환 (fallback)
-                result = f"=== {artist} - {title} ===\n\n{response_text}"
+        except (ValueError, json.JSONDecodeError, KeyError) as e:
+            # 파싱 실패 시 원본 텍스트 반환 (fallback)
+            result = f"=== {artist} - {title} ===\n\n{response_text}"
 
-            return TextContent(type="text", text=result)
+        return TextContent(type="text", text=result)
 
     except httpx.HTTPStatusError as e:
         return TextContent(
@@ -467,25 +1047,13 @@ async def describe_song(artist: str, title: str) -> TextContent:
 # 추천 시스템 헬퍼 함수들 (비활성화됨 - 존재하지 않는 곡 추천 문제)
 # ============================================================
 
-def score_to_weight(score: float, temperature: float = 1.0) -> float:
-    """점수를 가중치로 변환 (지수 스케일)
-
-    Args:
-        score: 0-100 사이의 점수
-        temperature: 온도 파라미터
-            - 낮을수록 (0.5) 상위곡에 집중
-            - 높을수록 (2.0) 다양성 증가
-
-    Returns:
-        변환된 가중치 값
-    """
-    import math
-    normalized = score / 100.0
-    weight = math.exp(normalized / temperature)
-    return weight
+async def _get_narrative_json(artist: str, title: str) -> dict:
+    """동일 곡 동시 호출을 합쳐서 서사 JSON 반환 (_fetch_narrative_json 참고)"""
+    key = ("narrative_json", normalize_text(artist), normalize_text(title))
+    return await inflight.do(key, lambda: _fetch_narrative_json(artist, title))
 
 
-async def _get_narrative_json(artist: str, title: str) -> dict:
+async def _fetch_narrative_json(artist: str, title: str) -> dict:
     """describe_song 로직을 재사용하여 서사 JSON 반환
 
     Args:
@@ -498,146 +1066,157 @@ async def _get_narrative_json(artist: str, title: str) -> dict:
     Raises:
         Exception: API 호출 실패 또는 파싱 실패
     """
-    import json
+    cached = get_narrative_cache().get(artist, title)
+    if cached is not None:
+        return cached
+
+    openai_client = get_client("openai")
+
+    # 1. 가사 검색 결과 (저장소에 없으면 Tavily 웹 검색)
+    search_content = await _get_search_content(artist, title)
+    if search_content is None:
+        raise ValueError(f"웹에서 '{artist} - {title}' 가사 정보를 찾지 못했습니다.")
+
+    # 2. OpenAI API로 서사 생성
+    openai_payload = {
+        "model": NARRATIVE_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": NARRATIVE_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": NARRATIVE_USER_TEMPLATE.format(
+                    artist=artist,
+                    title=title,
+                    search_content=search_content
+                )
+            }
+        ],
+        "temperature": 0.7,
+        "max_tokens": 2000
+    }
+
+    openai_response = await openai_client.post(
+        "https://api.openai.com/v1/chat/completions",
+        json=openai_payload,
+        headers={
+            "Authorization": f"Bearer {get_settings().openai_api_key}",
+            "Content-Type": "application/json"
+        }
+    )
+    openai_response.raise_for_status()
+    openai_data = openai_response.json()
+    record_openai_usage(openai_data)
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # 1. Tavily API로 가사 웹 검색
-        search_query = f"{artist} {title} 가사"
+    # 응답 파싱
+    response_text = openai_data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
 
-        tavily_payload = {
-            "api_key": TAVILY_API_KEY,
-            "query": search_query,
-            "max_results": 3
-        }
+    if not response_text:
+        raise ValueError("서사 생성에 실패했습니다.")
 
-        tavily_response = await client.post(
-            "https://api.tavily.com/search",
-            json=tavily_payload
-        )
-        tavily_response.raise_for_status()
-        tavily_data = tavily_response.json()
+    # JSON 추출 및 파싱
+    narrative_data = extract_json_from_response(response_text)
+    await get_narrative_cache().set(artist, title, narrative_data)
+    return narrative_data
 
-        # 검색 결과 추출
-        results = tavily_data.get("results", [])
-        if not results:
-            raise ValueError(f"웹에서 '{artist} - {title}' 가사 정보를 찾지 못했습니다.")
 
-        # 검색 결과 텍스트 합치기
-        search_content = "\n\n".join([
-            f"제목: {r.get('title', '')}\n내용: {r.get('content', '')}"
-            for r in results[:3]
-        ])
+async def search_candidates_for_keyword(keyword: str, limit: int = 15) -> list[dict]:
+    """키워드로 후보곡 검색 (로컬 역색인 우선, 없으면 Last.fm 조회 후 색인)
 
-        # 2. OpenAI API로 서사 생성
-        openai_payload = {
-            "model": "gpt-4o-mini",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": NARRATIVE_SYSTEM_PROMPT
-                },
-                {
-                    "role": "user",
-                    "content": NARRATIVE_USER_TEMPLATE.format(
-                        artist=artist,
-                        title=title,
-                        search_content=search_content
-                    )
-                }
-            ],
-            "temperature": 0.7,
-            "max_tokens": 2000
-        }
+    Args:
+        keyword: 검색할 키워드
+        limit: 반환할 곡 수
 
-        openai_response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            json=openai_payload,
-            headers={
-                "Authorization": f"Bearer {OPENAI_API_KEY}",
-                "Content-Type": "application/json"
-            }
-        )
-        openai_response.raise_for_status()
-        openai_data = openai_response.json()
+    Returns:
+        후보곡 리스트 [{"artist": "...", "title": "..."}, ...]
+    """
+    with start_span("keyword_search", keyword=keyword) as span:
+        hit = get_tag_index().get(keyword, limit)
+        span.set_attribute("source", "index" if hit is not None else "lastfm")
+        if hit is not None:
+            tracks, stale = hit
+            if stale:
+                get_tag_index().refresh(keyword, lambda: _index_keyword(keyword, limit))
+            return [{"artist": artist, "title": title} for artist, title in tracks]
 
-        # 응답 파싱
-        response_text = openai_data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+        key = ("keyword", normalize_text(keyword), limit)
+        return await inflight.do(key, lambda: _index_keyword(keyword, limit))
 
-        if not response_text:
-            raise ValueError("서사 생성에 실패했습니다.")
 
-        # JSON 추출 및 파싱
-        narrative_data = extract_json_from_response(response_text)
-        return narrative_data
+async def _index_keyword(keyword: str, limit: int) -> list[dict]:
+    """Last.fm에서 키워드 후보곡을 가져와 역색인에 저장 (API 실패 시 저장하지 않음)"""
+    candidates, complete = await _fetch_candidates_for_keyword(keyword, limit)
+    if complete:
+        get_tag_index().put(keyword, limit, [(c["artist"], c["title"]) for c in candidates])
+    return candidates
 
 
-async def search_candidates_for_keyword(keyword: str, limit: int = 15) -> list[dict]:
-    """키워드로 Last.fm 검색 (tag.getTopTracks + track.search fallback)
+def _candidate_key(candidate: dict) -> tuple[str, str]:
+    """후보곡 중복 판정 키 (대소문자/공백 무시)"""
+    return normalize_text(candidate["artist"]), normalize_text(candidate["title"])
+
+
+async def _fetch_candidates_for_keyword(keyword: str, limit: int) -> tuple[list[dict], bool]:
+    """키워드로 Last.fm 검색 (tag.getTopTracks 여러 페이지 + track.search fallback)
+
+    tag.getTopTracks는 중복 제거 후 limit곡이 모이면 다음 페이지를 요청하지 않습니다.
 
     Args:
         keyword: 검색할 키워드
         limit: 반환할 곡 수
 
     Returns:
-        후보곡 리스트 [{"artist": "...", "title": "..."}, ...]
+        (후보곡 리스트, 모든 API 호출 성공 여부)
     """
     candidates = []
+    seen_keys = set()
+    complete = True
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # 1차: tag.getTopTracks
-        tag_params = {
-            "method": "tag.getTopTracks",
-            "tag": keyword,
-            "api_key": LASTFM_API_KEY,
-            "format": "json",
-            "limit": limit
-        }
+    def _add(candidate: dict) -> None:
+        key = _candidate_key(candidate)
+        if key not in seen_keys:
+            seen_keys.add(key)
+            candidates.append(candidate)
+
+    # 1차: tag.getTopTracks (페이지 단위)
+    for page in range(1, get_settings().tag_top_tracks_max_pages + 1):
+        try:
+            tag_data = await _lastfm_get("tag.getTopTracks", tag=keyword, limit=limit, page=page)
+        except Exception:
+            complete = False  # 실패해도 계속 진행
+            break
+
+        tracks = lastfm_list(tag_data.get("tracks", {}).get("track"))
+        for track in tracks[:limit]:
+            _add({
+                "artist": track.get("artist", {}).get("name", "") if isinstance(track.get("artist"), dict) else track.get("artist", ""),
+                "title": track.get("name", "")
+            })
 
         try:
-            tag_response = await client.get(LASTFM_API_URL, params=tag_params)
-            tag_response.raise_for_status()
-            tag_data = tag_response.json()
-
-            if "tracks" in tag_data and "track" in tag_data["tracks"]:
-                for track in tag_data["tracks"]["track"][:limit]:
-                    candidates.append({
-                        "artist": track.get("artist", {}).get("name", "") if isinstance(track.get("artist"), dict) else track.get("artist", ""),
+            total_pages = int(tag_data["tracks"]["@attr"]["totalPages"])
+        except (KeyError, TypeError, ValueError):
+            total_pages = page
+        if len(candidates) >= limit or len(tracks) < limit or page >= total_pages:
+            break
+
+    # 2차: track.search (부족할 경우)
+    if len(candidates) < 10:
+        try:
+            search_data = await _lastfm_get("track.search", track=keyword, limit=10)
+
+            if "results" in search_data and "trackmatches" in search_data["results"]:
+                for track in lastfm_list(search_data["results"]["trackmatches"].get("track")):
+                    _add({
+                        "artist": track.get("artist", ""),
                         "title": track.get("name", "")
                     })
         except Exception:
-            pass  # 실패해도 계속 진행
-
-        # 2차: track.search (부족할 경우)
-        if len(candidates) < 10:
-            search_params = {
-                "method": "track.search",
-                "track": keyword,
-                "api_key": LASTFM_API_KEY,
-                "format": "json",
-                "limit": 10
-            }
+            complete = False
 
-            try:
-                search_response = await client.get(LASTFM_API_URL, params=search_params)
-                search_response.raise_for_status()
-                search_data = search_response.json()
-
-                if "results" in search_data and "trackmatches" in search_data["results"]:
-                    tracks = search_data["results"]["trackmatches"].get("track", [])
-                    for track in tracks:
-                        candidate = {
-                            "artist": track.get("artist", ""),
-                            "title": track.get("name", "")
-                        }
-                        # 중복 체크
-                        key = f"{candidate['artist']}||{candidate['title']}"
-                        existing_keys = [f"{c['artist']}||{c['title']}" for c in candidates]
-                        if key not in existing_keys:
-                            candidates.append(candidate)
-            except Exception:
-                pass
-
-    return candidates[:limit]
+    return candidates[:limit], complete
 
 
 async def _search_candidates_for_narrative(narrative: dict) -> list[dict]:
@@ -649,112 +1228,221 @@ async def _search_candidates_for_narrative(narrative: dict) -> list[dict]:
     Returns:
         중복 제거된 후보곡 리스트
     """
-    import asyncio
-
     stages = narrative.get("narrative", {}).get("stages", [])
 
-    # 모든 키워드 추출
-    all_keywords = []
+    # 모든 키워드 추출 (단계 간 중복 키워드는 한 번만 검색)
+    all_keywords = {}
     for stage in stages:
-        keywords = stage.get("keywords", [])
-        all_keywords.extend(keywords)
+        for keyword in stage.get("keywords", []):
+            all_keywords.setdefault(normalize_text(keyword), keyword)
 
     # 병렬 검색
-    search_tasks = [search_candidates_for_keyword(kw, limit=15) for kw in all_keywords]
-    results = await asyncio.gather(*search_tasks, return_exceptions=True)
+    search_tasks = [search_candidates_for_keyword(kw, limit=15) for kw in all_keywords.values()]
+    # 키워드 fan-out은 대화형 툴보다 낮은 우선순위로 업스트림 호출
+    with background_priority():
+        results = await asyncio.gather(*search_tasks, return_exceptions=True)
 
-    # 결과 합치기 및 중복 제거
-    all_candidates = []
-    seen_keys = set()
+    # 결과 합치기 및 중복 제거 (후보곡을 찾은 키워드를 태그로 기록)
+    merged: dict[tuple[str, str], dict] = {}
 
-    for result in results:
+    for keyword, result in zip(all_keywords.values(), results):
         if isinstance(result, Exception):
             continue
         for candidate in result:
-            key = f"{candidate['artist']}||{candidate['title']}"
-            if key not in seen_keys:
-                all_candidates.append(candidate)
-                seen_keys.add(key)
+            key = _candidate_key(candidate)
+            entry = merged.get(key)
+            if entry is None:
+                entry = merged[key] = {
+                    "artist": candidate["artist"],
+                    "title": candidate["title"],
+                    "tags": []
+                }
+            entry["tags"].append(keyword)
 
-    return all_candidates
+    return list(merged.values())
 
 
-async def _llm_evaluate_stage(
-    stage: dict,
-    candidates: list[dict],
-    summary: str
-) -> list[dict]:
-    """특정 서사 단계에 대해 후보곡 LLM 평가
+def _cached_track_tags(artist: str, title: str) -> list[str]:
+    """Last.fm 캐시에 이미 있는 곡 태그 (네트워크 호출 없음)"""
+    # 사용자 요청 캐시 통계/LRU 순서에 영향을 주지 않도록 peek (태그는 거의 바뀌지 않으므로 stale도 사용)
+    top_tags = get_lastfm_cache().peek(_lastfm_cache_key("track.getTopTags", {"artist": artist, "track": title}))
+    if top_tags is None:
+        return []
+    tags = top_tags.get("toptags", {}).get("tag", [])
+    if isinstance(tags, dict):
+        tags = [tags]
+    return [tag.get("name", "") for tag in tags[:10] if isinstance(tag, dict)]
 
-    Args:
-        stage: 서사 단계 정보
-        candidates: 후보곡 리스트
-        summary: 원곡 서사 요약
+
+async def _prefilter_candidates(stages: list[dict], candidates: list[dict], top_k: int) -> list[list[dict]]:
+    """로컬 TF-IDF 유사도로 단계별 상위 top_k 후보곡 선택 (hyukebox.prefilter 참고)
 
     Returns:
-        평가된 후보곡 리스트 [{"artist": ..., "title": ..., "score": ..., "reason": ...}, ...]
+        단계 순서대로 후보곡 리스트
     """
-    import json
+    documents = [
+        {**c, "tags": c.get("tags", []) + _cached_track_tags(c["artist"], c["title"])}
+        for c in candidates
+    ]
+    # 후보곡이 많으면 수백 ms가 걸리므로 이벤트 루프 밖에서 계산
+    with start_span("prefilter", candidates=len(candidates), top_k=top_k):
+        rankings = await asyncio.to_thread(rank_candidates_by_stage, stages, documents, top_k)
+    return [[candidates[idx] for idx in ranking] for ranking in rankings]
 
-    if not candidates:
-        return []
 
-    # 후보곡 리스트 포맷팅
-    candidates_text = "\n".join([
-        f"{i+1}. {c['artist']} - {c['title']}"
-        for i, c in enumerate(candidates)
-    ])
+def _estimate_tokens(text: str) -> int:
+    """토큰 수 대략 추정 (영문 ~4자/토큰, 한글 ~1자/토큰)"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
 
-    keywords_text = ", ".join(stage.get("keywords", []))
 
-    # OpenAI API 호출
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        openai_payload = {
-            "model": "gpt-4o-mini",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": EVALUATION_SYSTEM_PROMPT
-                },
-                {
-                    "role": "user",
-                    "content": EVALUATION_USER_TEMPLATE.format(
-                        summary=summary,
-                        step=stage.get("step", 1),
-                        stage_title=stage.get("title", ""),
-                        stage_description=stage.get("description", ""),
-                        keywords=keywords_text,
-                        candidates_list=candidates_text
-                    )
-                }
-            ],
-            "temperature": 0.5,
-            "max_tokens": 3000
-        }
+def _chunk_candidates_for_budget(
+    candidates: list[dict],
+    base_tokens: int,
+    stage_count: int
+) -> list[list[dict]]:
+    """프롬프트 토큰 예산과 출력 토큰 한도에 맞춰 후보곡을 나누기
 
+    Args:
+        candidates: 후보곡 리스트
+        base_tokens: 후보곡을 제외한 프롬프트 토큰 수
+        stage_count: 서사 단계 수 (후보곡당 출력 토큰 추정용)
+    """
+    # 후보곡 1개당 출력: id + 단계별 점수 + 이유 한 문장
+    output_per_candidate = 12 + 4 * stage_count + 40
+    max_by_output = max(1, LLM_EVAL_MAX_OUTPUT_TOKENS // output_per_candidate)
+    token_budget = get_settings().llm_eval_token_budget
+
+    chunks, current, used = [], [], base_tokens
+    for candidate in candidates:
+        cost = _estimate_tokens(f"{len(current) + 1}. {candidate['artist']} - {candidate['title']}\n")
+        if current and (used + cost > token_budget or len(current) >= max_by_output):
+            chunks.append(current)
+            current, used = [], base_tokens
+        current.append(candidate)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _llm_evaluate_batch(
+    stages: list[dict],
+    candidates: list[dict],
+    summary: str
+) -> list[tuple[list[float], str] | None]:
+    """후보곡 × 서사 단계 점수 행렬을 한 번의 LLM 요청으로 생성
+
+    Args:
+        stages: 서사 단계 리스트
+        candidates: 후보곡 리스트 (한 요청에 들어갈 분량)
+        summary: 원곡 서사 요약
+
+    Returns:
+        후보곡 순서대로 (단계별 점수 리스트, 이유) 또는 None (평가 누락)
+    """
+    stages_text = "\n".join(
+        f"[{i}] {stage.get('title', '')} - {stage.get('description', '')} "
+        f"(키워드: {', '.join(stage.get('keywords', []))})"
+        for i, stage in enumerate(stages, 1)
+    )
+    candidates_text = "\n".join(
+        f"{i}. {c['artist']} - {c['title']}"
+        for i, c in enumerate(candidates, 1)
+    )
+
+    openai_payload = {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {
+                "role": "system",
+                "content": BATCH_EVALUATION_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": BATCH_EVALUATION_USER_TEMPLATE.format(
+                    summary=summary,
+                    stages_list=stages_text,
+                    candidates_list=candidates_text
+                )
+            }
+        ],
+        "temperature": 0.5,
+        "max_tokens": LLM_EVAL_MAX_OUTPUT_TOKENS,
+        "response_format": {"type": "json_object"}
+    }
+
+    openai_response = await get_client("openai").post(
+        "https://api.openai.com/v1/chat/completions",
+        json=openai_payload,
+        headers={
+            "Authorization": f"Bearer {get_settings().openai_api_key}",
+            "Content-Type": "application/json"
+        },
+        timeout=60.0
+    )
+    openai_response.raise_for_status()
+    openai_data = openai_response.json()
+    record_openai_usage(openai_data)
+
+    response_text = openai_data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+    rows = extract_json_from_response(response_text).get("scores", [])
+
+    matrix: list[tuple[list[float], str] | None] = [None] * len(candidates)
+    for row in rows:
         try:
-            openai_response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                json=openai_payload,
-                headers={
-                    "Authorization": f"Bearer {OPENAI_API_KEY}",
-                    "Content-Type": "application/json"
-                }
-            )
-            openai_response.raise_for_status()
-            openai_data = openai_response.json()
+            idx = int(row["id"]) - 1
+            scores = [float(score) for score in row["scores"]][:len(stages)]
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= idx < len(candidates) and scores:
+            matrix[idx] = (scores, row.get("reason", ""))
+    return matrix
 
-            response_text = openai_data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
 
-            # JSON 파싱
-            eval_data = extract_json_from_response(response_text)
-            evaluations = eval_data.get("evaluations", [])
+async def _evaluate_candidates_with_llm_batched(
+    narrative: dict,
+    candidates: list[dict]
+) -> list[dict]:
+    """배치 평가: 후보곡 청크마다 한 번의 요청으로 모든 단계 점수를 받아 best_stage 선택"""
+    stages = narrative.get("narrative", {}).get("stages", [])
+    summary = narrative.get("summary", "")
+    if not stages or not candidates:
+        return []
 
-            return evaluations
+    base_prompt = BATCH_EVALUATION_SYSTEM_PROMPT + BATCH_EVALUATION_USER_TEMPLATE + summary + "".join(
+        f"{stage.get('title', '')}{stage.get('description', '')}{''.join(stage.get('keywords', []))}"
+        for stage in stages
+    )
+    chunks = _chunk_candidates_for_budget(candidates, _estimate_tokens(base_prompt), len(stages))
 
-        except Exception as e:
-            # 평가 실패 시 빈 리스트 반환
-            return []
+    with background_priority():
+        chunk_results = await asyncio.gather(
+            *(_llm_evaluate_batch(stages, chunk, summary) for chunk in chunks),
+            return_exceptions=True
+        )
+
+    scored_candidates = []
+    for chunk, matrix in zip(chunks, chunk_results):
+        if isinstance(matrix, Exception):
+            continue
+        for candidate, row in zip(chunk, matrix):
+            if row is None:
+                continue
+            scores, reason = row
+            # 최고 점수 단계 (동점이면 앞 단계)
+            best_idx = max(range(len(scores)), key=lambda i: (scores[i], -i))
+            scored_candidates.append({
+                "artist": candidate["artist"],
+                "title": candidate["title"],
+                "score": scores[best_idx],
+                "reason": reason,
+                "best_stage": stages[best_idx].get("step", best_idx + 1)
+            })
+
+    # 점수순 정렬
+    scored_candidates.sort(key=lambda x: x["score"], reverse=True)
+    return scored_candidates
 
 
 async def _evaluate_candidates_with_llm(
@@ -763,6 +1451,8 @@ async def _evaluate_candidates_with_llm(
 ) -> list[dict]:
     """모든 후보곡에 대해 단계별 LLM 평가 수행
 
+    모든 단계를 한 요청(토큰 예산 초과 시 몇 개 요청)에서 평가합니다.
+
     Args:
         narrative: 서사 JSON 데이터
         candidates: 후보곡 리스트
@@ -771,118 +1461,68 @@ async def _evaluate_candidates_with_llm(
         점수가 부여된 후보곡 리스트
         [{"artist": ..., "title": ..., "score": ..., "reason": ..., "best_stage": ...}, ...]
     """
-    import asyncio
-
     stages = narrative.get("narrative", {}).get("stages", [])
-    summary = narrative.get("summary", "")
-
-    # 각 단계별로 평가
-    evaluation_tasks = [
-        _llm_evaluate_stage(stage, candidates, summary)
-        for stage in stages
-    ]
 
-    stage_evaluations = await asyncio.gather(*evaluation_tasks, return_exceptions=True)
-
-    # 결과 통합: 각 곡마다 최고 점수 단계 선택
-    song_scores = {}  # key: "artist||title", value: {"score": ..., "reason": ..., "stage": ...}
-
-    for stage_idx, evals in enumerate(stage_evaluations):
-        if isinstance(evals, Exception) or not evals:
-            continue
-
-        stage_number = stages[stage_idx].get("step", stage_idx + 1)
-
-        for eval_item in evals:
-            artist = eval_item.get("artist", "")
-            title = eval_item.get("title", "")
-            score = eval_item.get("score", 0)
-            reason = eval_item.get("reason", "")
-
-            key = f"{artist}||{title}"
-
-            # 최고 점수 업데이트
-            if key not in song_scores or score > song_scores[key]["score"]:
-                song_scores[key] = {
-                    "artist": artist,
-                    "title": title,
-                    "score": score,
-                    "reason": reason,
-                    "best_stage": stage_number
-                }
-
-    # 리스트로 변환
-    scored_candidates = list(song_scores.values())
-
-    # 점수순 정렬
-    scored_candidates.sort(key=lambda x: x["score"], reverse=True)
+    # 로컬 사전 필터: 단계별 상위 후보곡만 LLM으로 평가
+    top_k = get_settings().llm_eval_top_k
+    if top_k > 0 and len(candidates) > top_k:
+        stage_candidates = await _prefilter_candidates(stages, candidates, top_k)
+        union = {}
+        for ranked in stage_candidates:
+            for candidate in ranked:
+                union.setdefault(_candidate_key(candidate), candidate)
+        candidates = list(union.values())
 
-    return scored_candidates
+    return await _evaluate_candidates_with_llm_batched(narrative, candidates)
 
 
 def _weighted_random_sampling(
     narrative: dict,
     scored_candidates: list[dict],
     songs_per_stage: int = 2,
-    temperature: float = 1.0
+    temperature: float = 1.0,
+    seed: int | None = None
 ) -> list[dict]:
     """가중치 기반 랜덤 샘플링으로 최종 추천곡 선택
 
+    단계별 상위 10곡 중에서 exp(score / temperature) 가중치에 비례하여
+    중복 없이 songs_per_stage곡을 추출합니다 (hyukebox.sampling 참고).
+
     Args:
         narrative: 서사 JSON 데이터
         scored_candidates: 점수가 부여된 후보곡 리스트
         songs_per_stage: 각 단계별 추천곡 수
         temperature: 샘플링 온도 (높을수록 다양성 증가)
+        seed: 난수 seed (같은 값이면 같은 결과, 테스트용)
 
     Returns:
         최종 추천곡 리스트
     """
-    import random
-
     recommendations = []
     stages = narrative.get("narrative", {}).get("stages", [])
 
-    for stage in stages:
-        stage_number = stage.get("step", 0)
-
-        # 이 단계에 해당하는 후보곡만 필터링
-        stage_candidates = [
-            c for c in scored_candidates
-            if c.get("best_stage") == stage_number
-        ]
-
-        if not stage_candidates:
-            continue
-
-        # 점수순 정렬 후 상위 10곡만 샘플링 대상
-        stage_candidates.sort(key=lambda x: x.get("score", 0), reverse=True)
-        stage_candidates = stage_candidates[:10]
-
-        # 가중치 계산
-        weights = [
-            score_to_weight(c.get("score", 0), temperature)
-            for c in stage_candidates
-        ]
-
-        # 가중치 기반 랜덤 샘플링
-        num_to_sample = min(songs_per_stage, len(stage_candidates))
-        selected = random.choices(
-            stage_candidates,
-            weights=weights,
-            k=num_to_sample
-        )
-
-        # 중복 제거
-        seen = set()
-        for song in selected:
-            key = f"{song['artist']}||{song['title']}"
-            if key not in seen:
-                recommendations.append({
-                    **song,
-                    "stage_number": stage_number,
-                    "stage_title": stage.get("title", "")
-                })
-                seen.add(key)
+    # best_stage → 단계 위치 (해당 단계가 없으면 -1)
+    stage_positions = {stage.get("step", 0): pos for pos, stage in enumerate(stages)}
+    stage_ids = [stage_positions.get(c.get("best_stage"), -1) for c in scored_candidates]
+    scores = [c.get("score", 0) for c in scored_candidates]
+
+    selected = sample_by_stage(
+        stage_ids,
+        scores,
+        list(range(len(stages))),
+        k=songs_per_stage,
+        temperature=temperature,
+        top_n=10,
+        rng=make_rng(seed)
+    )
+
+    for pos, stage in enumerate(stages):
+        for idx in selected.get(pos, []):
+            recommendations.append({
+                **scored_candidates[idx],
+                "stage_number": stage.get("step", 0),
+                "stage_title": stage.get("title", "")
+            })
 
     return recommendations
 
@@ -959,20 +1599,26 @@ async def recommend_songs(artist: str, title: str) -> TextContent:
     Returns:
         서사 기반 추천곡 10-20개 (단계별 2-3곡)
     """
+    with start_span("recommend_songs", artist=artist, title=title):
+        return await _recommend_songs(artist, title)
+
+
+async def _recommend_songs(artist: str, title: str) -> TextContent:
+    """recommend_songs 실제 구현 (서사 → 후보곡 검색 → LLM 평가 → 샘플링)"""
     # API 키 확인
-    if not TAVILY_API_KEY:
+    if not get_settings().tavily_api_key:
         return TextContent(
             type="text",
             text="Error: TAVILY_API_KEY가 .env 파일에 설정되지 않았습니다."
         )
 
-    if not OPENAI_API_KEY:
+    if not get_settings().openai_api_key:
         return TextContent(
             type="text",
             text="Error: OPENAI_API_KEY가 .env 파일에 설정되지 않았습니다."
         )
 
-    if not LASTFM_API_KEY:
+    if not get_settings().lastfm_api_key:
         return TextContent(
             type="text",
             text="Error: LASTFM_API_KEY가 .env 파일에 설정되지 않았습니다."
@@ -981,7 +1627,8 @@ async def recommend_songs(artist: str, title: str) -> TextContent:
     try:
         # 1. 서사 생성
         try:
-            narrative_json = await _get_narrative_json(artist, title)
+            with start_span("recommend.narrative"):
+                narrative_json = await _get_narrative_json(artist, title)
         except ValueError as e:
             return TextContent(
                 type="text",
@@ -1006,7 +1653,9 @@ async def recommend_songs(artist: str, title: str) -> TextContent:
 
         # 2. 후보곡 검색 (Last.fm)
         try:
-            candidates = await _search_candidates_for_narrative(narrative_json)
+            with start_span("recommend.candidates") as span:
+                candidates = await _search_candidates_for_narrative(narrative_json)
+                span.set_attribute("candidates", len(candidates))
         except Exception as e:
             return TextContent(
                 type="text",
@@ -1021,9 +1670,11 @@ async def recommend_songs(artist: str, title: str) -> TextContent:
 
         # 3. LLM 평가
         try:
-            scored_candidates = await _evaluate_candidates_with_llm(
-                narrative_json, candidates
-            )
+            with start_span("recommend.evaluation") as span:
+                scored_candidates = await _evaluate_candidates_with_llm(
+                    narrative_json, candidates
+                )
+                span.set_attribute("scored", len(scored_candidates))
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 429:
                 return TextContent(
@@ -1054,12 +1705,13 @@ async def recommend_songs(artist: str, title: str) -> TextContent:
 
         # 4. 가중치 랜덤 샘플링
         try:
-            recommendations = _weighted_random_sampling(
-                narrative_json,
-                scored_candidates,
-                songs_per_stage=2,
-                temperature=1.0
-            )
+            with start_span("recommend.sampling"):
+                recommendations = _weighted_random_sampling(
+                    narrative_json,
+                    scored_candidates,
+                    songs_per_stage=2,
+                    temperature=1.0
+                )
         except Exception as e:
             return TextContent(
                 type="text",
@@ -1080,13 +1732,3 @@ async def recommend_songs(artist: str, title: str) -> TextContent:
             type="text",
             text=f"추천 시스템 오류: {str(e)}"
         )
-
-
-# 서버 시작 시 API 키 확인 (Last.fm만 필수, 나머지는 선택)
-if not LASTFM_API_KEY:
-    print("ERROR: LASTFM_API_KEY가 .env 파일에 설정되지 않았습니다.", file=sys.stderr)
-    print(".env 파일에 다음을 추가하세요: LASTFM_API_KEY=your_api_key", file=sys.stderr)
-    sys.exit(1)
-
-print("Hyukebox MCP Server 초기화 완료", file=sys.stderr)
-print(f".env 경로: {env_path}", file=sys.stderr)
@@ -0,0 +1,187 @@
+"""
+세션 모드(MCP_STATELESS=false) 멀티 워커 라우팅
+
+MCP 세션(스트림, 진행 알림 대상)은 initialize를 처리한 워커 메모리에만 있으므로,
+세션 ID → 담당 워커 주소를 공유 캐시(hyukebox.shared_cache)에 기록하고
+다른 워커로 들어온 요청은 담당 워커의 내부 주소(127.0.0.1)로 전달합니다.
+
+    클라이언트 → 워커 A (initialize)  → 세션 s1 생성, "session:s1" = A 기록
+    클라이언트 → 워커 B (s1 요청)      → A로 전달 (응답 스트림 그대로 중계)
+
+담당 워커가 사라졌으면 기록을 지우고 404를 반환해 클라이언트가 새 세션을 만들게 합니다.
+전달받은 워커는 내부 소켓으로 들어온 요청의 scope["client"]를 원래 클라이언트 주소로 되돌려
+Rate Limit/접근 로그가 127.0.0.1이 아닌 실제 클라이언트 기준으로 동작합니다.
+"""
+import asyncio
+import time
+
+import httpx
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from hyukebox.config import get_settings
+from hyukebox.shared_cache import get_shared_cache
+
+SESSION_HEADER = "mcp-session-id"
+# 전달된 요청 표시 (받은 워커는 다시 전달하지 않고 직접 처리)
+FORWARDED_HEADER = "x-hyukebox-forwarded"
+# 원래 클라이언트 주소 ("host:port", 내부 소켓으로 들어온 요청에서만 신뢰)
+CLIENT_HEADER = "x-hyukebox-client"
+
+# 이 워커의 내부 주소 ("127.0.0.1:포트", hyukebox.app의 워커 프로세스가 설정)
+worker_address: str | None = None
+
+# hop-by-hop 헤더는 전달하지 않음
+_HOP_HEADERS = frozenset({
+    b"connection", b"keep-alive", b"transfer-encoding", b"te", b"trailer", b"upgrade",
+    b"proxy-authorization", b"proxy-authenticate", b"host", b"content-length",
+})
+
+
+def _session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+def _restore_client(scope) -> None:
+    """다른 워커가 내부 소켓으로 전달한 요청이면 scope["client"]를 원래 클라이언트로 교체
+
+    공개 소켓(nginx 경유 포함)으로 들어온 요청의 헤더는 신뢰하지 않습니다.
+    """
+    server = scope.get("server")
+    if not server or f"{server[0]}:{server[1]}" != worker_address:
+        return
+    client = Headers(scope=scope).get(CLIENT_HEADER)
+    if client:
+        host, _, port = client.rpartition(":")
+        scope["client"] = (host, int(port) if port.isdigit() else 0)
+
+
+class SessionAffinityMiddleware:
+    """세션 ID를 가진 요청을 세션을 만든 워커로 보내는 ASGI 미들웨어
+
+    워커 주소(worker_address)가 없으면(단일 워커) 그대로 통과합니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.ttl = get_settings().session_ttl
+        self._refreshed: dict[str, float] = {}  # 세션 ID → 마지막 TTL 갱신 시각 (갱신 순서)
+        self._client: httpx.AsyncClient | None = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or worker_address is None:
+            return await self.app(scope, receive, send)
+
+        _restore_client(scope)
+        headers = Headers(scope=scope)
+        session_id = headers.get(SESSION_HEADER)
+        store = get_shared_cache()
+
+        if session_id is None:
+            # 새 세션이면 응답 헤더를 보내기 전에 담당 워커 기록 (다음 요청이 다른 워커로 가도 찾을 수 있게)
+            async def send_and_register(message):
+                if message["type"] == "http.response.start":
+                    created = Headers(raw=message["headers"]).get(SESSION_HEADER)
+                    if created:
+                        await store.set(_session_key(created), worker_address.encode(), self.ttl)
+                        self._remember(created, time.monotonic())
+                await send(message)
+
+            return await self.app(scope, receive, send_and_register)
+
+        owner = None
+        if not headers.get(FORWARDED_HEADER):
+            owner = await store.get(_session_key(session_id))
+        if owner is not None and owner.decode() != worker_address:
+            return await self._forward(owner.decode(), scope, receive, send)
+
+        await self._touch(session_id, scope["method"])
+        await self.app(scope, receive, send)
+
+    async def _touch(self, session_id: str, method: str) -> None:
+        """담당 워커에서 처리하는 요청: 종료(DELETE) 시 기록 삭제, 아니면 가끔 TTL 갱신"""
+        store = get_shared_cache()
+        if method == "DELETE":
+            self._refreshed.pop(session_id, None)
+            await store.delete(_session_key(session_id))
+            return
+        now = time.monotonic()
+        if now - self._refreshed.get(session_id, 0.0) > self.ttl / 4:
+            self._remember(session_id, now)
+            await store.set(_session_key(session_id), worker_address.encode(), self.ttl)
+
+    def _remember(self, session_id: str, now: float) -> None:
+        """TTL 갱신 시각 기록
+
+        DELETE 없이 끝난 세션도 남지 않도록, ttl 동안 갱신되지 않은 기록
+        (공유 캐시에서도 만료됨)을 오래된 순서로 제거합니다.
+        """
+        self._refreshed.pop(session_id, None)
+        self._refreshed[session_id] = now
+        while True:
+            oldest = next(iter(self._refreshed))
+            if now - self._refreshed[oldest] <= self.ttl:
+                return
+            del self._refreshed[oldest]
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            # SSE 스트림은 오래 열려 있으므로 읽기 timeout 없음
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None))
+        return self._client
+
+    async def _forward(self, owner: str, scope, receive, send) -> None:
+        """담당 워커로 요청 전달 후 응답(SSE 포함)을 그대로 중계"""
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.extend(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+
+        headers = [(k, v) for k, v in scope["headers"] if k not in _HOP_HEADERS and k != CLIENT_HEADER.encode()]
+        client = scope.get("client")
+        if client:
+            headers.append((CLIENT_HEADER.encode(), f"{client[0]}:{client[1]}".encode()))
+        headers.append((FORWARDED_HEADER.encode(), b"1"))
+
+        url = f"http://{owner}{scope.get('root_path', '')}{scope['path']}"
+        if scope.get("query_string"):
+            url += "?" + scope["query_string"].decode("latin-1")
+        request = self._get_client().build_request(scope["method"], url, headers=headers, content=bytes(body))
+
+        try:
+            response = await self._get_client().send(request, stream=True)
+        except httpx.TransportError:
+            # 담당 워커 종료 (재시작 등): 세션이 사라졌으므로 클라이언트가 다시 initialize 하도록 404
+            session_id = Headers(scope=scope).get(SESSION_HEADER)
+            await get_shared_cache().delete(_session_key(session_id))
+            response = JSONResponse({"error": "Session not found"}, status_code=404)
+            return await response(scope, receive, send)
+
+        async def relay():
+            await send({
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [(k, v) for k, v in response.headers.raw if k.lower() not in _HOP_HEADERS],
+            })
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def wait_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        # 클라이언트가 끊으면(SSE GET 스트림 종료 등) 담당 워커 연결도 닫음
+        tasks = [asyncio.ensure_future(relay()), asyncio.ensure_future(wait_disconnect())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await response.aclose()
@@ -0,0 +1,185 @@
+"""
+워커 간 공유 캐시 백엔드 (CACHE_BACKEND)
+
+프로세스 메모리 캐시(TTLCache)는 워커마다, 재시작마다 따로 채워지므로
+여러 워커가 함께 읽고 쓰는 2단계 캐시와 세션 저장소로 사용합니다.
+
+- sqlite: 같은 서버의 워커끼리 파일 하나를 공유 (WAL 모드, 경로를 /dev/shm에 두면 메모리 기반)
+- redis: 여러 서버가 공유하는 Redis (redis 패키지 필요, RESP 호환 서버면 동작)
+
+값은 bytes이고, 백엔드 오류는 miss로 처리합니다 (캐시 장애가 요청 실패로 이어지지 않음).
+"""
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+
+from hyukebox.config import get_settings
+
+# sqlite: set 이만큼마다 만료 항목 정리
+_PURGE_EVERY = 1000
+
+
+class SQLiteSharedCache:
+    """SQLite 파일 기반 공유 캐시 (같은 서버의 여러 프로세스)
+
+    이벤트 루프를 막지 않도록
+    - 읽기: 루프에서 바로 실행 (WAL 모드라 쓰기와 겹치지 않음, 잠겨 있으면 기다리지 않고 miss)
+    - 쓰기/삭제: 전용 연결로 스레드에서 실행 (다른 워커의 쓰기가 끝날 때까지 최대 2초 대기)
+
+    Args:
+        path: SQLite 파일 경로
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+        self._write_conn: sqlite3.Connection | None = None
+        self._write_lock = asyncio.Lock()  # 쓰기 연결은 한 번에 한 스레드만 사용
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self, timeout: float) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")  # 캐시이므로 내구성보다 쓰기 지연 우선
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        conn.commit()
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = self._open(timeout=0)
+        return self._conn
+
+    def _writer(self) -> sqlite3.Connection:
+        if self._write_conn is None:
+            self._write_conn = self._open(timeout=2.0)
+        return self._write_conn
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            row = self._connect().execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        async with self._write_lock:
+            await asyncio.to_thread(self._set, key, value, ttl)
+
+    def _set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            conn = self._writer()
+            now = time.time()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, now + ttl)
+                )
+                self._writes += 1
+                if self._writes % _PURGE_EVERY == 0:
+                    conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        except sqlite3.Error:
+            pass
+
+    async def delete(self, key: str) -> None:
+        async with self._write_lock:
+            await asyncio.to_thread(self._delete, key)
+
+    def _delete(self, key: str) -> None:
+        try:
+            with self._writer() as conn:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error:
+            pass
+
+    async def close(self) -> None:
+        async with self._write_lock:
+            for conn in (self._conn, self._write_conn):
+                if conn is not None:
+                    conn.close()
+            self._conn = self._write_conn = None
+
+
+class RedisSharedCache:
+    """Redis 공유 캐시 (여러 서버 배포용)
+
+    Args:
+        url: Redis URL (예: redis://localhost:6379/0)
+        prefix: 키 prefix
+    """
+
+    def __init__(self, url: str, prefix: str = "hyukebox:cache:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RedisSharedCache를 사용하려면 redis 패키지가 필요합니다 (pip install redis)")
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._errors = (redis.RedisError, OSError)
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            value = await self._redis.get(self.prefix + key)
+        except self._errors:
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            await self._redis.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+        except self._errors:
+            pass
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._redis.delete(self.prefix + key)
+        except self._errors:
+            pass
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+_shared_cache: SQLiteSharedCache | RedisSharedCache | None = None
+
+
+def get_shared_cache() -> SQLiteSharedCache | RedisSharedCache | None:
+    """설정된 공유 캐시 백엔드 (CACHE_BACKEND=none이면 None)"""
+    global _shared_cache
+    if _shared_cache is None:
+        settings = get_settings()
+        if settings.cache_backend == "sqlite":
+            _shared_cache = SQLiteSharedCache(settings.cache_sqlite_path)
+        elif settings.cache_backend == "redis":
+            _shared_cache = RedisSharedCache(settings.cache_redis_url)
+    return _shared_cache
+
+
+async def close_shared_cache() -> None:
+    global _shared_cache
+    if _shared_cache is not None:
+        cache, _shared_cache = _shared_cache, None
+        await cache.close()
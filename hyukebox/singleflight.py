@@ -0,0 +1,46 @@
+"""
+Single-flight: 동일 키의 동시 호출을 하나의 업스트림 작업으로 합치기
+
+같은 곡에 대한 요청이 동시에 몰리면 첫 호출만 실제 작업을 실행하고,
+나머지 호출은 같은 asyncio Task의 결과를 기다립니다.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """진행 중인 작업 레지스트리 (키 -> 공유 Task)
+
+    - 실패 시 예외가 모든 대기자에게 동일하게 전파됩니다.
+    - 대기자 하나가 취소되어도 공유 작업은 취소되지 않습니다 (asyncio.shield).
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """key로 진행 중인 작업이 있으면 그 결과를, 없으면 func()를 실행해 반환
+
+        Args:
+            key: 정규화된 요청 키
+            func: 실제 작업을 만드는 코루틴 팩토리
+
+        Returns:
+            공유 작업의 결과
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 모든 대기자가 취소된 경우 "exception was never retrieved" 경고 방지
+        if not task.cancelled():
+            task.exception()
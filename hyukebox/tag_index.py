@@ -0,0 +1,289 @@
+"""
+로컬 역색인: 정규화된 태그/키워드 → 곡 목록
+
+search_candidates_for_keyword의 Last.fm 응답(tag.getTopTracks + track.search)을
+키워드별로 보관하여 다음 조회는 네트워크 없이 처리합니다.
+
+- 메모리: 최근에 추가/갱신된 항목
+- 디스크: mmap으로 읽는 압축 바이너리 파일 (해시 정렬 테이블 + 이진 탐색)
+
+HTTP 워커 여러 개가 같은 파일에 저장하므로 저장은 잠금 파일(.lock)로 직렬화하고,
+프로세스별 임시 파일에 쓴 뒤 교체합니다 (잠금 대기와 쓰기는 이벤트 루프 밖의 스레드에서). 읽을 수 없는 파일은 빈 인덱스로 취급합니다.
+
+파일 형식 (리틀 엔디언):
+    header : magic(6) | count(u32)
+    table  : count × [hash(u64) | offset(u32) | length(u32)]  (hash 오름차순)
+    record : fetched_at(f64) | limit(u16) | "tag\\n" + "artist\\ttitle\\n" × N (UTF-8)
+"""
+import asyncio
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: 파일 잠금 없이 저장 (stdio 단일 프로세스)
+    fcntl = None
+
+from hyukebox.cache import normalize_text
+
+_MAGIC = b"HTIX1\0"
+_HEADER = struct.Struct("<6sI")
+_ENTRY = struct.Struct("<QII")
+_RECORD = struct.Struct("<dH")
+
+
+def _tag_hash(tag: str) -> int:
+    return int.from_bytes(hashlib.blake2b(tag.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _clean(field: str) -> str:
+    """구분자(탭/줄바꿈)를 공백으로 치환"""
+    return field.replace("\t", " ").replace("\n", " ")
+
+
+def _encode_record(tag: str, fetched_at: float, limit: int, tracks: list[tuple[str, str]]) -> bytes:
+    lines = [tag] + [f"{_clean(artist)}\t{_clean(title)}" for artist, title in tracks]
+    return _RECORD.pack(fetched_at, min(limit, 0xFFFF)) + "\n".join(lines).encode("utf-8")
+
+
+def _decode_record(data: bytes) -> tuple[str, float, int, list[tuple[str, str]]]:
+    fetched_at, limit = _RECORD.unpack_from(data)
+    lines = data[_RECORD.size:].decode("utf-8").split("\n")
+    tracks = [tuple(line.split("\t", 1)) for line in lines[1:] if "\t" in line]
+    return lines[0], fetched_at, limit, tracks
+
+
+def _read_entries(path: Path) -> dict[str, tuple[float, int, list[tuple[str, str]]]]:
+    """인덱스 파일 전체 읽기 (저장 시 병합용, 읽을 수 없는 파일/레코드는 건너뜀)"""
+    try:
+        data = path.read_bytes()
+        magic, count = _HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return {}
+    if magic != _MAGIC or len(data) < _HEADER.size + count * _ENTRY.size:
+        return {}
+
+    entries = {}
+    for i in range(count):
+        _, offset, length = _ENTRY.unpack_from(data, _HEADER.size + i * _ENTRY.size)
+        try:
+            tag, fetched_at, limit, tracks = _decode_record(data[offset:offset + length])
+        except (struct.error, UnicodeDecodeError, ValueError):
+            continue
+        entries[tag] = (fetched_at, limit, tracks)
+    return entries
+
+
+class TagIndex:
+    """태그 → 곡 목록 역색인
+
+    Args:
+        path: 인덱스 파일 경로
+        refresh_after: 이 시간(초)이 지난 항목은 반환하되 백그라운드에서 갱신
+    """
+
+    def __init__(self, path: Path, refresh_after: float = 7 * 86400):
+        self.path = Path(path)
+        self.refresh_after = refresh_after
+        # 메모리 항목: tag -> (fetched_at, limit, tracks)
+        self._memory: dict[str, tuple[float, int, list[tuple[str, str]]]] = {}
+        self._dirty = False
+        self._mmap: mmap.mmap | None = None
+        self._count = 0
+        self._loaded = False
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._autosave_task: asyncio.Task | None = None
+        self.hits = 0
+        self.misses = 0
+
+    # --------------------------------------------------------
+    # 조회 / 저장
+    # --------------------------------------------------------
+
+    def get(self, keyword: str, limit: int) -> tuple[list[tuple[str, str]], bool] | None:
+        """키워드 조회
+
+        Returns:
+            (곡 목록, 갱신 필요 여부) 또는 None (없거나 limit보다 적게 저장된 경우)
+        """
+        tag = normalize_text(keyword)
+        entry = self._memory.get(tag)
+        if entry is None:
+            entry = self._lookup_file(tag)
+        if entry is None or entry[1] < limit:
+            self.misses += 1
+            return None
+
+        fetched_at, _, tracks = entry
+        self.hits += 1
+        stale = time.time() - fetched_at > self.refresh_after
+        return tracks[:limit], stale
+
+    def put(self, keyword: str, limit: int, tracks: list[tuple[str, str]]) -> None:
+        self._memory[normalize_text(keyword)] = (time.time(), limit, list(tracks))
+        self._dirty = True
+
+    def refresh(self, keyword: str, fetch) -> None:
+        """백그라운드 갱신 예약 (키워드당 하나만 실행)
+
+        Args:
+            keyword: 갱신할 키워드
+            fetch: 새 결과를 가져와 put까지 수행하는 코루틴 팩토리
+        """
+        tag = normalize_text(keyword)
+        if tag in self._refreshing:
+            return
+        task = asyncio.ensure_future(fetch())
+        self._refreshing[tag] = task
+        task.add_done_callback(lambda t: self._refresh_done(tag, t))
+
+    def _refresh_done(self, tag: str, task: asyncio.Task) -> None:
+        self._refreshing.pop(tag, None)
+        if not task.cancelled():
+            task.exception()  # 갱신 실패는 무시 (기존 항목 계속 사용)
+
+    # --------------------------------------------------------
+    # 디스크 (mmap)
+    # --------------------------------------------------------
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError, OSError):
+            return  # 파일이 없거나 비어 있음
+
+        try:
+            magic, count = _HEADER.unpack_from(mapped)
+        except struct.error:
+            magic, count = None, 0
+        if magic != _MAGIC or len(mapped) < _HEADER.size + count * _ENTRY.size:
+            mapped.close()
+            return  # 형식이 다르거나 잘린 파일 → 빈 인덱스
+        self._mmap = mapped
+        self._count = count
+
+    def _read_record(self, offset: int, length: int):
+        """레코드 디코딩 (손상된 레코드는 None)"""
+        try:
+            return _decode_record(self._mmap[offset:offset + length])
+        except (struct.error, UnicodeDecodeError, ValueError):
+            return None
+
+    def _lookup_file(self, tag: str):
+        self._load()
+        if self._mmap is None:
+            return None
+
+        target = _tag_hash(tag)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry_hash, offset, length = _ENTRY.unpack_from(self._mmap, _HEADER.size + mid * _ENTRY.size)
+            if entry_hash < target:
+                lo = mid + 1
+            elif entry_hash > target:
+                hi = mid
+            else:
+                record = self._read_record(offset, length)
+                if record is None or record[0] != tag:
+                    return None
+                return record[1:]
+        return None
+
+    def _unmap(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = None
+        self._loaded = False
+
+    async def save(self) -> None:
+        """메모리 항목을 디스크 파일과 병합하여 원자적으로 다시 쓰기
+
+        잠금 대기와 병합/쓰기는 스레드에서 실행하고, 저장하는 동안 들어온 put은 메모리에 남깁니다.
+        """
+        if not self._dirty:
+            return
+
+        snapshot = dict(self._memory)
+        await asyncio.to_thread(self._write, snapshot)
+
+        # 새 파일로 다시 매핑하고, 저장한 뒤 바뀌지 않은 항목만 메모리에서 제거
+        self._unmap()
+        for tag, entry in snapshot.items():
+            if self._memory.get(tag) is entry:
+                del self._memory[tag]
+        self._dirty = bool(self._memory)
+
+    def _write(self, memory: dict) -> None:
+        """현재 디스크 파일 + memory 병합 결과로 파일 교체 (스레드에서 실행)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)  # 다른 워커의 저장이 끝날 때까지 대기
+            # 잠금 사이에 다른 워커가 저장했을 수 있으므로 현재 파일을 다시 읽어 병합
+            merged = _read_entries(self.path)
+            merged.update(memory)
+            self._replace(merged)
+
+    def _replace(self, entries: dict) -> None:
+        records = sorted(
+            (_tag_hash(tag), _encode_record(tag, *entry))
+            for tag, entry in entries.items()
+        )
+        offset = _HEADER.size + len(records) * _ENTRY.size
+        table, blobs = [], []
+        for tag_hash, blob in records:
+            table.append(_ENTRY.pack(tag_hash, offset, len(blob)))
+            blobs.append(blob)
+            offset += len(blob)
+
+        # 프로세스별 임시 파일 (워커끼리 같은 임시 파일에 섞어 쓰지 않도록)
+        f = tempfile.NamedTemporaryFile(
+            "wb", dir=self.path.parent, prefix=self.path.name + ".", suffix=".tmp", delete=False
+        )
+        try:
+            with f:
+                f.write(_HEADER.pack(_MAGIC, len(records)))
+                f.writelines(table)
+                f.writelines(blobs)
+            os.replace(f.name, self.path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+    # --------------------------------------------------------
+    # lifespan 연동
+    # --------------------------------------------------------
+
+    def start_autosave(self, interval: float = 300) -> None:
+        """interval(초)마다 변경 사항을 디스크에 저장"""
+        async def _loop():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.save()
+                except OSError:
+                    pass
+
+        self._autosave_task = asyncio.ensure_future(_loop())
+
+    async def close(self) -> None:
+        if self._autosave_task is not None:
+            self._autosave_task.cancel()
+            self._autosave_task = None
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        try:
+            await self.save()
+        except OSError:
+            pass
+        self._unmap()
@@ -0,0 +1,238 @@
+"""
+경량 트레이싱: 툴 호출 / 파이프라인 단계 / 업스트림 요청 span
+
+    with start_span("recommend.candidates", keywords=12) as span:
+        ...
+        span.set_attribute("candidates", len(result))
+
+부모 span은 contextvar로 전달되므로 asyncio.gather로 만든 Task 안의 span도
+호출한 span의 자식으로 연결됩니다. 샘플링은 루트 span(툴 호출)에서 한 번 결정하고,
+샘플링되지 않은 요청의 하위 span은 객체를 만들지 않는 no-op입니다.
+
+내보내기 (TRACE_EXPORT):
+- jsonl: span마다 JSON 한 줄 (TRACE_FILE)
+- otlp: OTLP/HTTP JSON으로 TRACE_OTLP_ENDPOINT에 전송 (예: http://localhost:4318/v1/traces)
+"""
+import asyncio
+import contextvars
+import json
+import os
+import random
+import time
+
+import httpx
+from fastmcp.server.middleware import Middleware as MCPMiddleware
+
+from hyukebox.config import get_settings
+
+_current: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+
+# 루트 종료 전에도 이만큼 쌓이면 내보내기
+_FLUSH_SPANS = 256
+
+
+class Span:
+    """샘플링된 span (with 문으로 사용)"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes",
+                 "start_ns", "end_ns", "error", "_token")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: str | None = None
+        self._token = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current.reset(self._token)
+        if exc is not None and not isinstance(exc, asyncio.CancelledError):
+            self.error = f"{exc_type.__name__}: {exc}"
+        _tracer.finish(self)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """트레이싱 비활성 또는 샘플링되지 않은 요청의 하위 span"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _UnsampledRoot(_NoopSpan):
+    """샘플링되지 않은 루트: 하위 span도 건너뛰도록 표시만 남김"""
+
+    __slots__ = ("_token",)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Tracer:
+    def __init__(self):
+        self.configured = False
+        self.exporter: str | None = None
+        self.sample_rate = 0.0
+        self.path = None
+        self.endpoint = None
+        self._pending: list[Span] = []
+        self._client: httpx.AsyncClient | None = None
+        self._exports: set[asyncio.Task] = set()
+
+    def configure(self) -> None:
+        settings = get_settings()
+        self.exporter = settings.trace_export
+        self.sample_rate = settings.trace_sample_rate if self.exporter else 0.0
+        self.path = settings.trace_file
+        self.endpoint = settings.trace_otlp_endpoint
+        self.configured = True
+
+    def start(self, name: str, attributes: dict):
+        parent = _current.get()
+        if parent is None:
+            if not self.configured:
+                self.configure()
+            if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+                return _UnsampledRoot() if self.sample_rate > 0 else _NOOP
+            return Span(name, os.urandom(16).hex(), None, attributes)
+        if not isinstance(parent, Span):
+            return _NOOP
+        return Span(name, parent.trace_id, parent.span_id, attributes)
+
+    def finish(self, span: Span) -> None:
+        self._pending.append(span)
+        if span.parent_id is None or len(self._pending) >= _FLUSH_SPANS:
+            self.flush()
+
+    def flush(self) -> None:
+        spans, self._pending = self._pending, []
+        if not spans:
+            return
+        if self.exporter == "jsonl":
+            self._write_jsonl(spans)
+        elif self.exporter == "otlp":
+            try:
+                task = asyncio.get_running_loop().create_task(self._send_otlp(spans))
+            except RuntimeError:
+                return  # 이벤트 루프 밖 (종료 중)
+            self._exports.add(task)
+            task.add_done_callback(self._exports.discard)
+
+    def _write_jsonl(self, spans: list[Span]) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n" for s in spans)
+        except OSError:
+            pass  # 트레이스 기록 실패는 요청에 영향 주지 않음
+
+    async def _send_otlp(self, spans: list[Span]) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=5.0)
+        try:
+            await self._client.post(self.endpoint, json=_otlp_payload(spans))
+        except httpx.HTTPError:
+            pass
+
+    async def close(self) -> None:
+        self.flush()
+        if self._exports:
+            await asyncio.gather(*self._exports, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_payload(spans: list[Span]) -> dict:
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "hyukebox"}}]},
+        "scopeSpans": [{
+            "scope": {"name": "hyukebox"},
+            "spans": [
+                {
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                    "name": s.name,
+                    "kind": 1 if s.parent_id else 2,  # INTERNAL / SERVER
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                    "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+                }
+                for s in spans
+            ],
+        }],
+    }]}
+
+
+_tracer = _Tracer()
+
+
+def start_span(name: str, **attributes):
+    """span 시작 (with 문으로 사용, 비활성/미샘플링이면 no-op)"""
+    return _tracer.start(name, attributes)
+
+
+async def close_tracing() -> None:
+    """남은 span 내보내기 (서버 종료 시)"""
+    await _tracer.close()
+
+
+class TracingMiddleware(MCPMiddleware):
+    """FastMCP 미들웨어: 툴 호출마다 루트 span 생성"""
+
+    async def on_call_tool(self, context, call_next):
+        with start_span(f"tool {context.message.name}", tool=context.message.name):
+            return await call_next(context)
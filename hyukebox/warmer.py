@@ -0,0 +1,195 @@
+"""
+차트 기반 캐시 워머 (WARMER_ENABLED)
+
+WARMER_INTERVAL마다 Last.fm 차트(global → chart.getTopTracks, 나라 이름 → geo.getTopTracks)의
+상위 WARMER_TOP_N곡에 대해 search_song 데이터(Last.fm 캐시)와 describe_song 서사(서사 영구 캐시)를
+미리 채워, 차트에 있는 곡은 첫 요청부터 캐시에서 응답합니다.
+
+- 업스트림 호출은 모두 BACKGROUND 우선순위 (대화형 요청이 먼저 출발)
+- 곡 단위 속도 제한 WARMER_RATE, 워머의 OpenAI 토큰은 24시간당 WARMER_OPENAI_DAILY_TOKENS까지
+- 실행 중인 툴 호출이 WARMER_BUSY_INFLIGHT개 이상이면 한가해질 때까지 물러남 (지수 백오프)
+- 워커가 여러 개면 공유 캐시(CACHE_BACKEND)의 lease를 가진 워커 하나만 실행
+"""
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Callable
+
+from hyukebox.metrics import TOOL_INFLIGHT, Counter, count_openai_tokens
+from hyukebox.ratelimit import parse_rate
+from hyukebox.scheduler import background_priority
+from hyukebox.shared_cache import get_shared_cache
+from hyukebox.tracing import start_span
+
+WARMER_SONGS = Counter(
+    "hyukebox_warmer_songs", "Songs processed by the cache warmer by outcome",
+    ("kind", "outcome"),
+)
+WARMER_OPENAI_TOKENS = Counter("hyukebox_warmer_openai_tokens", "OpenAI tokens spent by the cache warmer")
+
+_LEASE_KEY = "warmer:lease"
+# 서버 시작 직후(클라이언트 예열, 첫 요청)와 겹치지 않도록 첫 실행 지연(초)
+_START_DELAY = 30.0
+_MAX_BACKOFF = 60.0
+# 서사 1개 토큰 추정치 초기값 (프롬프트 + 최대 출력), 이후 실제 사용량 평균
+_NARRATIVE_TOKENS_GUESS = 3000.0
+
+
+class CacheWarmer:
+    """차트 상위 곡 캐시를 주기적으로 채우는 백그라운드 작업
+
+    Args:
+        fetch_chart: 차트 이름, 곡 수 → [(아티스트, 제목), ...] 코루틴
+        warm_song: 곡 데이터(Last.fm 캐시)를 채우는 코루틴
+        narrative_cached: 서사가 이미 캐시에 있는지 (OpenAI 예산 판단용)
+        warm_narrative: 서사(서사 영구 캐시)를 채우는 코루틴, None이면 서사는 채우지 않음
+        charts: 차트 목록 ("global" 또는 나라 이름)
+        top_n: 차트별 곡 수
+        interval: 실행 주기(초)
+        rate_limit: 곡 처리 속도 ("20/minute" 형식)
+        daily_tokens: 24시간당 OpenAI 토큰 예산
+        busy_inflight: 이 수 이상의 툴 호출이 실행 중이면 대기
+    """
+
+    def __init__(
+        self,
+        fetch_chart: Callable[[str, int], Awaitable[list[tuple[str, str]]]],
+        warm_song: Callable[[str, str], Awaitable[object]],
+        narrative_cached: Callable[[str, str], bool],
+        warm_narrative: Callable[[str, str], Awaitable[object]] | None,
+        charts: list[str],
+        top_n: int = 50,
+        interval: float = 1800.0,
+        rate_limit: str = "20/minute",
+        daily_tokens: int = 200000,
+        busy_inflight: int = 2,
+    ):
+        self.fetch_chart = fetch_chart
+        self.warm_song = warm_song
+        self.narrative_cached = narrative_cached
+        self.warm_narrative = warm_narrative
+        self.charts = charts
+        self.top_n = top_n
+        self.interval = interval
+        self.busy_inflight = busy_inflight
+        self.daily_tokens = daily_tokens
+        _, self._rate = parse_rate(rate_limit)
+
+        self._next_at = 0.0
+        self._budget_since = time.monotonic()
+        self._tokens_used = 0
+        self._narrative_tokens = _NARRATIVE_TOKENS_GUESS
+        self._lease_id = f"{os.getpid()}:{id(self)}".encode()
+        self._task: asyncio.Task | None = None
+
+    # --------------------------------------------------------
+    # lifespan 연동
+    # --------------------------------------------------------
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self) -> None:
+        await asyncio.sleep(_START_DELAY)
+        while True:
+            try:
+                if await self._acquire_lease():
+                    await self.run_once()
+            except Exception:
+                pass  # 차트 조회 실패 등은 다음 주기에 재시도
+            await asyncio.sleep(self.interval)
+
+    async def _acquire_lease(self) -> bool:
+        """공유 캐시가 있으면 lease를 가진 워커만 실행 (다른 워커가 가진 lease는 만료까지 존중)"""
+        shared = get_shared_cache()
+        if shared is None:
+            return True
+        owner = await shared.get(_LEASE_KEY)
+        if owner is not None and owner != self._lease_id:
+            return False
+        await shared.set(_LEASE_KEY, self._lease_id, self.interval * 1.5)
+        if owner is None:
+            # 동시에 시작한 워커끼리는 마지막에 기록한 워커만 실행
+            await asyncio.sleep(1.0)
+            return await shared.get(_LEASE_KEY) == self._lease_id
+        return True
+
+    # --------------------------------------------------------
+    # 실행
+    # --------------------------------------------------------
+
+    async def run_once(self) -> int:
+        """차트 곡 캐시 채우기 1회 → 처리한 곡 수"""
+        with background_priority(), start_span("warmer.run", charts=",".join(self.charts)) as span:
+            songs: dict[tuple[str, str], tuple[str, str]] = {}
+            for chart in self.charts:
+                try:
+                    tracks = await self.fetch_chart(chart, self.top_n)
+                except Exception:
+                    continue
+                for artist, title in tracks:
+                    songs.setdefault((artist.casefold(), title.casefold()), (artist, title))
+
+            for artist, title in songs.values():
+                await self._wait_turn()
+                await self._warm(artist, title)
+
+            span.set_attribute("songs", len(songs))
+            return len(songs)
+
+    async def _wait_turn(self) -> None:
+        """속도 제한 + 대화형 요청이 많으면 지수 백오프"""
+        backoff = 1.0
+        while self._busy():
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, _MAX_BACKOFF)
+
+        now = time.monotonic()
+        if self._next_at > now:
+            await asyncio.sleep(self._next_at - now)
+        self._next_at = max(now, self._next_at) + 1 / self._rate
+
+    def _busy(self) -> bool:
+        return TOOL_INFLIGHT.total() >= self.busy_inflight
+
+    async def _warm(self, artist: str, title: str) -> None:
+        try:
+            await self.warm_song(artist, title)
+            WARMER_SONGS.labels("song", "ok").inc()
+        except Exception:
+            WARMER_SONGS.labels("song", "error").inc()
+            return  # Last.fm에서 찾지 못한 곡은 서사도 건너뜀
+
+        if self.warm_narrative is None:
+            return
+        if self.narrative_cached(artist, title):
+            WARMER_SONGS.labels("narrative", "cached").inc()
+            return
+        if not self._within_budget():
+            WARMER_SONGS.labels("narrative", "budget").inc()
+            return
+
+        with count_openai_tokens() as used:
+            try:
+                await self.warm_narrative(artist, title)
+                outcome = "ok"
+            except Exception:
+                outcome = "error"
+        WARMER_SONGS.labels("narrative", outcome).inc()
+        if used[0]:
+            self._tokens_used += used[0]
+            self._narrative_tokens = 0.8 * self._narrative_tokens + 0.2 * used[0]
+            WARMER_OPENAI_TOKENS.labels().inc(used[0])
+
+    def _within_budget(self) -> bool:
+        """다음 서사 1개(추정치)를 만들어도 24시간 토큰 예산 안인지"""
+        now = time.monotonic()
+        if now - self._budget_since >= 86400:
+            self._budget_since = now
+            self._tokens_used = 0
+        return self._tokens_used + self._narrative_tokens <= self.daily_tokens
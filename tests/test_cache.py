@@ -0,0 +1,24 @@
+"""TTL + LRU 캐시 테스트"""
+from hyukebox.cache import TTLCache
+
+
+def test_peek_has_no_side_effects():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.peek("a") == 1
+    assert cache.peek("missing") is None
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    cache.set("c", 3)  # peek은 LRU 순서를 바꾸지 않으므로 "a"가 축출됨
+    assert cache.peek("a") is None
+    assert cache.peek("b") == 2
+
+
+def test_peek_returns_stale_until_hard_expiry():
+    cache = TTLCache()
+    cache.set("a", 1, ttl=0, stale_ttl=60)
+    assert cache.get("a") is None
+    assert cache.peek("a") == 1
+    cache.set("b", 1, ttl=0)
+    assert cache.peek("b") is None
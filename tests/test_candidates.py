@@ -0,0 +1,20 @@
+"""키워드 후보곡 검색 테스트"""
+import asyncio
+
+from hyukebox import server
+
+
+def test_single_track_dict_is_not_dropped(monkeypatch):
+    """곡이 하나면 Last.fm은 리스트 대신 dict 하나를 반환"""
+    responses = {
+        "tag.getTopTracks": {"tracks": {"track": {"name": "T", "artist": {"name": "A"}}, "@attr": {"totalPages": "1"}}},
+        "track.search": {"results": {"trackmatches": {"track": {"name": "S", "artist": "B"}}}},
+    }
+
+    async def fake_get(method, **params):
+        return responses[method]
+
+    monkeypatch.setattr(server, "_lastfm_get", fake_get)
+    candidates, complete = asyncio.run(server._fetch_candidates_for_keyword("rare tag", 15))
+    assert complete
+    assert candidates == [{"artist": "A", "title": "T"}, {"artist": "B", "title": "S"}]
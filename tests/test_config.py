@@ -0,0 +1,53 @@
+"""설정 검증 테스트"""
+import importlib.util
+
+from hyukebox.config import Settings
+
+
+def _without(monkeypatch, *missing):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *a: None if name in missing else find_spec(name, *a))
+
+
+def test_redis_cache_backend_requires_redis_package(monkeypatch):
+    monkeypatch.setenv("LASTFM_API_KEY", "x")
+    monkeypatch.setenv("CACHE_BACKEND", "redis")
+    monkeypatch.setenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    _without(monkeypatch, "redis")
+    assert any("redis 패키지" in error for error in Settings().validate())
+
+
+def test_rate_limit_redis_requires_redis_package(monkeypatch):
+    monkeypatch.setenv("LASTFM_API_KEY", "x")
+    monkeypatch.setenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    _without(monkeypatch, "redis")
+    assert any("RATE_LIMIT_REDIS_URL" in error for error in Settings().validate())
+
+
+def test_malformed_numbers_are_reported_not_raised(monkeypatch):
+    monkeypatch.setenv("LASTFM_API_KEY", "x")
+    monkeypatch.setenv("HTTP_POOL_MAX_CONNECTIONS", "many")
+    monkeypatch.setenv("LASTFM_RETRY_BACKOFF", "0.5s")
+    settings = Settings()
+    assert settings.http_pool_max_connections == 100
+    assert settings.upstream("lastfm").retry_backoff == 0.25
+    errors = settings.validate()
+    assert any("HTTP_POOL_MAX_CONNECTIONS" in error for error in errors)
+    assert any("LASTFM_RETRY_BACKOFF" in error for error in errors)
+
+
+def test_malformed_rates_are_reported(monkeypatch):
+    monkeypatch.setenv("LASTFM_API_KEY", "x")
+    monkeypatch.setenv("RATE_LIMIT", "lots")
+    monkeypatch.setenv("OPENAI_RATE", "10/fortnight")
+    errors = Settings().validate()
+    assert any(error.startswith("RATE_LIMIT ") for error in errors)
+    assert any(error.startswith("OPENAI_RATE ") for error in errors)
+
+
+def test_upstream_settings(monkeypatch):
+    monkeypatch.setenv("TAVILY_MAX_CONCURRENCY", "3")
+    settings = Settings()
+    assert settings.upstream("tavily").max_concurrency == 3
+    assert settings.upstream("lastfm").rate == "5/second"
+    assert settings.upstream("other").rate == "10/second"
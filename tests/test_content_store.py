@@ -0,0 +1,83 @@
+"""가사 검색 결과 저장소 테스트"""
+import asyncio
+import sqlite3
+
+from hyukebox import content_store
+from hyukebox.content_store import ContentStore, clean_search_results
+
+
+def test_set_get_roundtrip(tmp_path):
+    async def run():
+        store = ContentStore(tmp_path / "search_content.sqlite3")
+        assert store.get("곡 가사") is None
+        await store.set("곡 가사", [("제목", "내용")])
+        assert store.get(" 곡  가사 ") == [("제목", "내용")]
+        assert (store.hits, store.misses) == (1, 1)
+        store.close()
+
+    asyncio.run(run())
+
+
+def test_locked_database_does_not_block_event_loop(tmp_path):
+    path = tmp_path / "search_content.sqlite3"
+
+    async def run():
+        store = ContentStore(path)
+        await store.set("a", [("t", "c")])
+
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN EXCLUSIVE")
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        store.get("b")
+        write = asyncio.ensure_future(store.set("b", [("t", "c")]))
+        await asyncio.sleep(0.2)
+        assert loop.time() - start < 0.5
+        assert not write.done()
+        other.execute("ROLLBACK")
+        other.close()
+        await write
+        assert store.get("b") == [("t", "c")]
+        store.close()
+
+    asyncio.run(run())
+
+
+def test_clean_removes_boilerplate_and_urls():
+    results = [{
+        "title": "  곡  제목 ",
+        "content": "첫 번째 가사 줄입니다. Copyright 2024 All rights reserved. 자세히 https://example.com/x 보기\n로그인",
+    }]
+    assert clean_search_results(results) == [("곡 제목", "첫 번째 가사 줄입니다. 자세히 보기")]
+
+
+def test_clean_drops_repeated_sentences_across_results():
+    chorus = "너를 다시 만날 수 있다면 모든 걸 다 줄게."
+    results = [
+        {"title": "a", "content": f"{chorus} {chorus} 다른 가사 한 줄이에요."},
+        {"title": "b", "content": f"{chorus}"},  # 내용이 남지 않으면 결과에서 제외
+        {"title": "c", "content": "새로운 배경 설명입니다."},
+    ]
+    assert clean_search_results(results) == [
+        ("a", f"{chorus} 다른 가사 한 줄이에요."),
+        ("c", "새로운 배경 설명입니다."),
+    ]
+
+
+def test_clean_truncates_at_word_boundary():
+    results = [
+        {"title": "a", "content": "하나 둘 셋 넷 다섯"},
+        {"title": "b", "content": "여섯"},
+        {"title": "c", "content": "일곱"},
+    ]
+    # 남은 글자 수는 다음 결과로 이어지고, 다 쓰면 나머지 결과는 버림
+    assert clean_search_results(results, max_chars=8) == [("a", "하나 둘 셋"), ("b", "여섯")]
+
+
+def test_long_sentence_with_boilerplate_word_is_kept():
+    sentence = (
+        "이 노래는 저작권 분쟁 이후에 다시 녹음된 버전으로, 원곡보다 느린 템포와 피아노 반주가 특징이며 "
+        "후렴의 가사도 일부 바뀌어 첫 발매 당시와는 분위기가 꽤 다르다."
+    )
+    assert len(sentence) > content_store._BOILERPLATE_MAX_CHARS
+    assert clean_search_results([{"title": "a", "content": sentence}]) == [("a", sentence)]
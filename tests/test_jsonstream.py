@@ -0,0 +1,45 @@
+"""스트리밍 서사 JSON 파서 테스트"""
+import json
+
+from hyukebox.jsonstream import NarrativeStreamParser
+
+_STAGES = [
+    {"step": 1, "title": "시작 {괄호}", "description": 'say "hi"\\n', "keywords": ["a", "b"]},
+    {"step": 2, "title": "끝 ]", "description": "이모지 ❤ \\u0041", "keywords": []},
+]
+_DOCUMENT = "설명 문장\n```json\n" + json.dumps(
+    {"summary": "요약 \"인용\"", "narrative": {"stage_count": 2, "stages": _STAGES}},
+    ensure_ascii=False,
+) + "\n```\n뒤 설명 {무시}"
+
+_EXPECTED = [("summary", '요약 "인용"')] + [("stage", stage) for stage in _STAGES]
+
+
+def _parse(chunks) -> tuple[list, bool]:
+    parser = NarrativeStreamParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events, parser.done
+
+
+def test_whole_document():
+    assert _parse([_DOCUMENT]) == (_EXPECTED, True)
+
+
+def test_every_split_point():
+    """조각 경계가 문자열/이스케이프/키 중간에 걸려도 같은 결과"""
+    for cut in range(1, len(_DOCUMENT)):
+        assert _parse([_DOCUMENT[:cut], _DOCUMENT[cut:]]) == (_EXPECTED, True), cut
+
+
+def test_single_character_chunks():
+    assert _parse(list(_DOCUMENT)) == (_EXPECTED, True)
+
+
+def test_events_arrive_as_soon_as_stage_closes():
+    parser = NarrativeStreamParser()
+    end_of_first = _DOCUMENT.index('"step": 2') - 2
+    events = parser.feed(_DOCUMENT[:end_of_first])
+    assert events == _EXPECTED[:2]
+    assert not parser.done
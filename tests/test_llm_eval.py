@@ -0,0 +1,58 @@
+"""후보곡 배치 LLM 평가 테스트 (청크 분할, 점수 행렬 파싱)"""
+import asyncio
+import json
+
+import httpx
+
+from hyukebox import clients, server
+from hyukebox.config import get_settings
+
+_STAGES = [{"step": 1, "title": "a"}, {"step": 2, "title": "b"}]
+
+
+def _candidates(n: int) -> list[dict]:
+    return [{"artist": f"artist {i}", "title": f"title {i}"} for i in range(n)]
+
+
+def test_chunks_respect_token_budget(monkeypatch):
+    monkeypatch.setattr(get_settings(), "llm_eval_token_budget", 100)
+    candidates = _candidates(40)
+    chunks = server._chunk_candidates_for_budget(candidates, base_tokens=50, stage_count=2)
+
+    assert [c for chunk in chunks for c in chunk] == candidates  # 순서 유지, 누락/중복 없음
+    assert len(chunks) > 1
+    for chunk in chunks:
+        cost = sum(server._estimate_tokens(f"{i}. {c['artist']} - {c['title']}\n") for i, c in enumerate(chunk, 1))
+        assert 50 + cost <= 100
+
+
+def test_chunks_respect_output_limit(monkeypatch):
+    monkeypatch.setattr(get_settings(), "llm_eval_token_budget", 10**9)
+    stage_count = 7
+    per_candidate = 12 + 4 * stage_count + 40
+    chunks = server._chunk_candidates_for_budget(_candidates(200), base_tokens=0, stage_count=stage_count)
+    assert max(len(chunk) for chunk in chunks) == server.LLM_EVAL_MAX_OUTPUT_TOKENS // per_candidate
+
+
+def test_oversized_candidate_still_gets_its_own_chunk(monkeypatch):
+    monkeypatch.setattr(get_settings(), "llm_eval_token_budget", 10)
+    chunks = server._chunk_candidates_for_budget(_candidates(3), base_tokens=50, stage_count=2)
+    assert [len(chunk) for chunk in chunks] == [1, 1, 1]
+
+
+def test_batch_response_parsing(monkeypatch):
+    rows = [
+        {"id": 2, "scores": [10, "90", 55], "reason": "둘"},  # 단계 수보다 많은 점수는 잘라냄
+        {"id": "1", "scores": [70, 20]},                      # 이유 없음
+        {"id": 9, "scores": [1, 2]},                          # 범위 밖
+        {"id": 3, "scores": ["x", 2]},                        # 숫자가 아님
+        {"scores": [1, 2]},                                   # id 없음
+    ]
+    content = "```json\n" + json.dumps({"scores": rows}) + "\n```"
+
+    def handler(request):
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    monkeypatch.setitem(clients._clients, "openai", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    matrix = asyncio.run(server._llm_evaluate_batch(_STAGES, _candidates(3), "요약"))
+    assert matrix == [([70.0, 20.0], ""), ([10.0, 90.0], "둘"), None]
@@ -0,0 +1,63 @@
+"""메트릭 테스트"""
+import asyncio
+
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.tools.tool import ToolResult
+from mcp.types import TextContent
+
+from hyukebox.metrics import TOOL_CALLS, Gauge, ToolMetricsMiddleware, is_error_result
+
+
+def test_gauge_total_sums_label_children():
+    gauge = Gauge("hyukebox_test_inflight", "test", ("tool",))
+    assert gauge.total() == 0
+    gauge.labels("a").inc()
+    gauge.labels("b").inc(2)
+    gauge.labels("a").dec()
+    assert gauge.total() == 2
+
+
+@pytest.mark.parametrize("text", [
+    "Error: LASTFM_API_KEY가 .env 파일에 설정되지 않았습니다.",
+    "HTTP Error: 503 - unavailable",
+    "OpenAI API Error (status 500): boom",
+    "Tavily API Error (status 429): slow down",
+    "서사 생성에 실패했습니다.",
+    "OpenAI API 요청 한도 초과. 잠시 후 다시 시도해주세요.",
+    "검색된 후보곡이 너무 적습니다 (3곡). 다른 곡으로 시도해주세요.",
+])
+def test_failure_texts_are_errors(text):
+    assert is_error_result(TextContent(type="text", text=text))
+
+
+@pytest.mark.parametrize("text", [
+    "=== 곡 정보 ===\n곡명: Trial and Error\n아티스트: A",
+    "=== A - Error ===\n\n요약: ...",
+    "총 3곡 조회 (성공 2, 실패 1)\n\n##### [1/3] A - T #####",
+])
+def test_normal_texts_are_ok(text):
+    assert not is_error_result(TextContent(type="text", text=text))
+
+
+def test_tool_calls_metric_counts_failure_text():
+    mcp = FastMCP("test")
+    mcp.add_middleware(ToolMetricsMiddleware())
+
+    @mcp.tool()
+    async def flaky(fail: bool) -> TextContent:
+        return TextContent(type="text", text="Error: upstream" if fail else "=== ok ===\n...")
+
+    async def run():
+        async with Client(mcp) as client:
+            await client.call_tool("flaky", {"fail": True})
+            await client.call_tool("flaky", {"fail": False})
+
+    asyncio.run(run())
+    assert TOOL_CALLS.labels("flaky", "error").value == 1
+    assert TOOL_CALLS.labels("flaky", "ok").value == 1
+
+
+def test_structured_result_is_ok():
+    result = ToolResult(content=[TextContent(type="text", text='{"name":"Error"}')], structured_content={"name": "Error"})
+    assert not is_error_result(result)
@@ -0,0 +1,9 @@
+"""ASGI 미들웨어 테스트"""
+from hyukebox import config
+from hyukebox.middleware import OAuthMiddleware
+
+
+def test_jwt_algorithms_are_stripped(monkeypatch):
+    monkeypatch.setenv("OAUTH_JWT_ALGORITHMS", " RS256, ES256 ,,")
+    monkeypatch.setattr(config, "_settings", config.Settings())
+    assert OAuthMiddleware(None).jwt_algorithms == ["RS256", "ES256"]
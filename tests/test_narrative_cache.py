@@ -0,0 +1,44 @@
+"""서사 영구 캐시 테스트"""
+import asyncio
+import sqlite3
+
+from hyukebox.narrative_cache import NarrativeCache
+
+
+def test_set_get_contains(tmp_path):
+    async def run():
+        cache = NarrativeCache(tmp_path / "narratives.sqlite3", "fp")
+        assert cache.get("A", "T") is None
+        await cache.set("A", "T", {"summary": "요약"})
+        assert cache.get(" a ", "t") == {"summary": "요약"}
+        assert cache.contains("A", "T")
+        assert NarrativeCache(tmp_path / "narratives.sqlite3", "other").get("A", "T") is None
+        cache.close()
+
+    asyncio.run(run())
+
+
+def test_locked_database_does_not_block_event_loop(tmp_path):
+    """다른 워커가 쓰기 잠금을 잡고 있어도 읽기는 바로 miss, 쓰기는 루프 밖에서 대기"""
+    path = tmp_path / "narratives.sqlite3"
+
+    async def run():
+        cache = NarrativeCache(path, "fp")
+        await cache.set("A", "T", {"summary": "요약"})
+
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN EXCLUSIVE")
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        cache.get("B", "T")
+        write = asyncio.ensure_future(cache.set("B", "T", {"summary": "둘"}))
+        await asyncio.sleep(0.2)
+        assert loop.time() - start < 0.5
+        assert not write.done()  # 잠금이 풀릴 때까지 스레드에서 대기
+        other.execute("ROLLBACK")
+        other.close()
+        await write
+        assert cache.get("B", "T") == {"summary": "둘"}
+        cache.close()
+
+    asyncio.run(run())
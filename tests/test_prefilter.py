@@ -0,0 +1,57 @@
+"""로컬 TF-IDF 사전 필터 테스트"""
+import math
+from collections import Counter
+
+from hyukebox.prefilter import _features, candidate_text, rank_candidates_by_stage, stage_text
+
+_CANDIDATES = [
+    {"artist": "A", "title": "Party Night", "tags": ["dance", "party"]},
+    {"artist": "B", "title": "Goodbye", "tags": ["sadness", "이별노래"]},
+    {"artist": "C", "title": "Morning", "tags": ["hope", "morning"]},
+    {"artist": "D", "title": "Rainy Day", "tags": ["rain", "lonely"]},
+]
+_STAGES = [
+    {"title": "이별", "description": "헤어진 뒤", "keywords": ["sad", "이별"]},
+    {"title": "새 출발", "description": "희망", "keywords": ["hope", "morning"]},
+    {"title": "파티", "description": "", "keywords": ["party", "dance"]},
+]
+
+
+def _reference(stages, candidates, top_k):
+    """희소 계산 없이 전체 벡터 코사인 유사도로 계산한 기준값"""
+    docs = [_features(candidate_text(c)) for c in candidates]
+    df = Counter(bucket for doc in docs for bucket in doc)
+    idf = {b: math.log((1 + len(docs)) / (1 + f)) + 1.0 for b, f in df.items()}
+    default_idf = math.log(1 + len(docs)) + 1.0
+
+    def vector(counts):
+        v = {b: (1.0 + math.log(c)) * idf.get(b, default_idf) for b, c in counts.items()}
+        norm = math.sqrt(sum(x * x for x in v.values())) or 1.0
+        return {b: x / norm for b, x in v.items()}
+
+    doc_vectors = [vector(doc) for doc in docs]
+    result = []
+    for stage in stages:
+        query = vector(_features(stage_text(stage)))
+        scores = [sum(w * dv.get(b, 0.0) for b, w in query.items()) for dv in doc_vectors]
+        result.append(sorted(range(len(docs)), key=lambda i: -scores[i])[:top_k])
+    return result
+
+
+def test_best_match_per_stage():
+    rankings = rank_candidates_by_stage(_STAGES, _CANDIDATES, top_k=2)
+    assert [ranking[0] for ranking in rankings] == [1, 2, 0]  # sad↔sadness, 이별↔이별노래도 일치
+    assert all(len(ranking) == 2 for ranking in rankings)
+
+
+def test_matches_dense_cosine_reference():
+    assert rank_candidates_by_stage(_STAGES, _CANDIDATES, top_k=4) == _reference(_STAGES, _CANDIDATES, 4)
+
+
+def test_no_overlap_keeps_original_order():
+    stages = [{"title": "", "description": "", "keywords": ["zzzz"]}]
+    assert rank_candidates_by_stage(stages, _CANDIDATES, top_k=3) == [[0, 1, 2]]
+
+
+def test_empty_candidates():
+    assert rank_candidates_by_stage(_STAGES, [], top_k=5) == [[], [], []]
@@ -0,0 +1,59 @@
+"""토큰 버킷 Rate Limiting 테스트"""
+import asyncio
+import types
+
+import httpx
+from starlette.responses import PlainTextResponse
+
+from hyukebox import ratelimit
+from hyukebox.middleware import RateLimitMiddleware
+from hyukebox.ratelimit import MemoryBucketStore
+
+
+def _clock(monkeypatch, start: float = 1000.0):
+    clock = types.SimpleNamespace(now=start)
+    monkeypatch.setattr(ratelimit, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_take_and_retry_after(monkeypatch):
+    clock = _clock(monkeypatch)
+    store = MemoryBucketStore()
+    assert store.take("a", capacity=2, rate=1) == (True, 0.0)
+    assert store.take("a", capacity=2, rate=1) == (True, 0.0)
+    allowed, retry_after = store.take("a", capacity=2, rate=1)
+    assert not allowed and retry_after == 1.0
+
+    clock.now += 0.5
+    allowed, retry_after = store.take("a", capacity=2, rate=1)
+    assert not allowed and retry_after == 0.5
+
+
+def test_idle_full_buckets_are_evicted(monkeypatch):
+    clock = _clock(monkeypatch)
+    store = MemoryBucketStore()
+    store.take("idle", capacity=2, rate=1)
+    clock.now += 10  # 가득 찬 상태로 복구 → 새 버킷과 같으므로 제거 대상
+    store.take("active", capacity=2, rate=1)
+    assert len(store) == 1
+
+
+def test_max_keys_evicts_least_recently_used(monkeypatch):
+    _clock(monkeypatch)
+    store = MemoryBucketStore(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        store.take(key, capacity=5, rate=0.001)
+    assert len(store) == 2
+    assert list(store._buckets) == ["a", "c"]
+
+
+def test_middleware_returns_429_with_retry_after():
+    async def run():
+        app = RateLimitMiddleware(PlainTextResponse("ok"), rate_limit="1/minute", store=MemoryBucketStore())
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/mcp")).status_code == 200
+            response = await client.get("/mcp")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "60"
+
+    asyncio.run(run())
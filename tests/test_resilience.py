@@ -0,0 +1,71 @@
+"""서킷 브레이커 회귀 테스트"""
+import asyncio
+
+import httpx
+import pytest
+
+from hyukebox.resilience import HALF_OPEN, CircuitBreaker, CircuitOpenError, ResilientTransport, UpstreamPolicy
+
+
+def _open_policy() -> UpstreamPolicy:
+    """reset_timeout이 지나 다음 요청이 확인 요청이 되는 정책"""
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    return UpstreamPolicy("test", retries=0, breaker=breaker)
+
+
+def test_cancelled_probe_does_not_wedge_breaker():
+    async def run():
+        started = asyncio.Event()
+
+        async def slow(request):
+            started.set()
+            await asyncio.sleep(10)
+            return httpx.Response(200)
+
+        policy = _open_policy()
+        client = httpx.AsyncClient(transport=ResilientTransport(httpx.MockTransport(slow), policy))
+        probe = asyncio.ensure_future(client.get("http://upstream/"))
+        await started.wait()
+        assert policy.breaker.state == HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        # 취소된 확인 요청 뒤에도 다음 요청이 확인 요청으로 나가야 함
+        client._transport._transport = httpx.MockTransport(lambda request: httpx.Response(200))
+        response = await client.get("http://upstream/")
+        assert response.status_code == 200
+        assert policy.breaker.state == "closed"
+
+    asyncio.run(run())
+
+
+def test_probe_unexpected_error_reopens_breaker():
+    async def run():
+        def broken(request):
+            raise RuntimeError("boom")
+
+        policy = _open_policy()
+        client = httpx.AsyncClient(transport=ResilientTransport(httpx.MockTransport(broken), policy))
+        with pytest.raises(RuntimeError):
+            await client.get("http://upstream/")
+        assert policy.breaker.state == "open"
+        # reset_timeout=0이므로 다시 확인 요청 허용 (CircuitOpenError가 아니어야 함)
+        with pytest.raises(RuntimeError):
+            await client.get("http://upstream/")
+
+    asyncio.run(run())
+
+
+def test_open_breaker_fails_fast():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    policy = UpstreamPolicy("test", retries=0, breaker=breaker)
+
+    async def run():
+        client = httpx.AsyncClient(transport=ResilientTransport(httpx.MockTransport(lambda r: httpx.Response(200)), policy))
+        with pytest.raises(CircuitOpenError):
+            await client.get("http://upstream/")
+
+    asyncio.run(run())
@@ -0,0 +1,53 @@
+"""단계별 가중치 샘플링 테스트 (NumPy / 표준 라이브러리 구현 모두)"""
+import math
+import random
+
+from hyukebox import sampling
+from hyukebox.sampling import make_rng, sample_by_stage
+
+_STAGE_IDS = [1, 2, 1, 3, 1, 2, 1, 1, 2, 1]
+_SCORES = [90, 80, 70, 60, 50, 40, 30, 20, 10, 0]
+
+
+def _rngs(seed: int):
+    """표준 라이브러리 구현 + (설치되어 있으면) NumPy 구현"""
+    rngs = [random.Random(seed)]
+    if sampling._numpy() is not None:
+        rngs.append(make_rng(seed))
+    return rngs
+
+
+def test_same_seed_same_result():
+    for first_rng, second_rng in zip(_rngs(42), _rngs(42)):
+        first = sample_by_stage(_STAGE_IDS, _SCORES, [1, 2, 3], k=2, rng=first_rng)
+        second = sample_by_stage(_STAGE_IDS, _SCORES, [1, 2, 3], k=2, rng=second_rng)
+        assert first == second
+
+
+def test_selection_constraints():
+    for seed in range(20):
+        for rng in _rngs(seed):
+            result = sample_by_stage(_STAGE_IDS, _SCORES, [1, 2, 3, 4], k=3, top_n=4, rng=rng)
+            assert set(result) == {1, 2, 3}  # 후보가 없는 단계는 제외
+            assert len(result[1]) == 3 and len(result[2]) == 3 and result[3] == [3]
+            for stage, picked in result.items():
+                assert len(set(picked)) == len(picked)
+                assert all(_STAGE_IDS[i] == stage for i in picked)
+            # 단계 1의 상위 4곡(점수 90, 70, 50, 30)만 대상
+            assert set(result[1]) <= {0, 2, 4, 6}
+
+
+def test_low_temperature_picks_top_scores():
+    for rng in _rngs(0):
+        result = sample_by_stage(_STAGE_IDS, _SCORES, [1], k=2, temperature=0.001, top_n=None, rng=rng)
+        assert result[1] == [0, 2]
+
+
+def test_first_pick_follows_weights():
+    """첫 번째 선택 확률은 exp(score / 100 / T) 비례 (Gumbel-max)"""
+    scores = [100, 0]
+    expected = math.exp(1) / (math.exp(1) + 1)
+    for rng in _rngs(7):
+        trials = 4000
+        first = sum(sample_by_stage([1, 1], scores, [1], k=1, rng=rng)[1] == [0] for _ in range(trials))
+        assert abs(first / trials - expected) < 0.03
@@ -0,0 +1,16 @@
+"""업스트림 스케줄러 회귀 테스트"""
+import asyncio
+
+from hyukebox.scheduler import UpstreamScheduler, _worker_share
+
+
+def test_worker_share_below_one_token_still_dispatches():
+    """워커 수가 요청률보다 많아도 (버스트 < 1) 요청이 출발해야 함"""
+    async def run():
+        scheduler = UpstreamScheduler("lastfm", _worker_share("5/second", 8))
+        assert scheduler.capacity >= 1
+        for _ in range(2):
+            await asyncio.wait_for(scheduler.acquire(), timeout=2)
+            scheduler.release()
+
+    asyncio.run(run())
@@ -0,0 +1,14 @@
+"""Last.fm 응답 → 구조화 스키마 테스트"""
+from hyukebox.schemas import SongInfo
+
+
+def test_from_lastfm_single_item_dict():
+    """항목이 하나면 Last.fm은 리스트 대신 dict 하나를 반환"""
+    info = SongInfo.from_lastfm({
+        "track_info": {"track": {"name": "T", "artist": {"name": "A"}, "playcount": "10"}},
+        "top_tags": {"toptags": {"tag": {"name": "kpop"}}},
+        "similar_tracks": {"similartracks": {"track": {"name": "S", "artist": {"name": "B"}, "match": "0.5"}}},
+    })
+    assert info.tags == ["kpop"]
+    assert [(s.artist, s.title, s.match) for s in info.similar] == [("B", "S", 0.5)]
+
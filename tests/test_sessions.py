@@ -0,0 +1,36 @@
+"""세션 전달 시 클라이언트 주소 복원 테스트"""
+from hyukebox import sessions
+
+
+def _scope(server, client_header):
+    return {
+        "type": "http",
+        "server": server,
+        "client": ("127.0.0.1", 40000),
+        "headers": [(sessions.CLIENT_HEADER.encode(), client_header)],
+    }
+
+
+def test_restores_client_on_internal_socket(monkeypatch):
+    monkeypatch.setattr(sessions, "worker_address", "127.0.0.1:9001")
+    scope = _scope(("127.0.0.1", 9001), b"203.0.113.7:5555")
+    sessions._restore_client(scope)
+    assert scope["client"] == ("203.0.113.7", 5555)
+
+
+def test_ignores_client_header_on_public_socket(monkeypatch):
+    monkeypatch.setattr(sessions, "worker_address", "127.0.0.1:9001")
+    scope = _scope(("0.0.0.0", 8000), b"203.0.113.7:5555")
+    sessions._restore_client(scope)
+    assert scope["client"] == ("127.0.0.1", 40000)
+
+
+def test_expired_session_records_are_pruned():
+    middleware = sessions.SessionAffinityMiddleware(None)
+    middleware.ttl = 100
+    middleware._remember("old", 0.0)
+    middleware._remember("kept", 50.0)
+    middleware._remember("old2", 60.0)
+    middleware._remember("kept", 70.0)  # 다시 갱신하면 순서가 뒤로 이동
+    middleware._remember("new", 165.0)
+    assert list(middleware._refreshed) == ["kept", "new"]
@@ -0,0 +1,53 @@
+"""SQLite 공유 캐시 테스트"""
+import asyncio
+import sqlite3
+
+from hyukebox.shared_cache import SQLiteSharedCache
+
+
+def test_set_get_delete(tmp_path):
+    async def run():
+        cache = SQLiteSharedCache(tmp_path / "shared.sqlite3")
+        await cache.set("k", b"v", 60)
+        assert await cache.get("k") == b"v"
+        await cache.delete("k")
+        assert await cache.get("k") is None
+        await cache.close()
+
+    asyncio.run(run())
+
+
+def test_locked_database_does_not_block_event_loop(tmp_path):
+    """다른 프로세스가 쓰기 잠금을 잡고 있어도 루프가 멈추지 않아야 함"""
+    path = tmp_path / "shared.sqlite3"
+
+    async def run():
+        cache = SQLiteSharedCache(path)
+        await cache.set("k", b"v", 60)
+
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN EXCLUSIVE")
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await cache.get("k")  # 잠겨 있으면 기다리지 않고 miss
+        assert loop.time() - start < 0.1
+        write = asyncio.ensure_future(cache.set("k2", b"v", 60))
+        await asyncio.sleep(0.3)
+        assert ticks >= 10  # 쓰기가 잠금을 기다리는 동안에도 루프가 돌아감
+        other.execute("ROLLBACK")
+        other.close()
+        await write
+        assert await cache.get("k2") == b"v"
+        task.cancel()
+        await cache.close()
+
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+"""Single-flight 테스트"""
+import asyncio
+
+import pytest
+
+from hyukebox.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_task():
+    async def run():
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        assert results == ["ok"] * 5
+        assert calls == 1
+        assert len(flight) == 0
+
+    asyncio.run(run())
+
+
+def test_exception_reaches_every_waiter():
+    async def run():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream")
+
+        results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+        assert [type(r) for r in results] == [ValueError] * 3
+        assert len({id(r) for r in results}) == 1  # 같은 예외 객체
+        assert len(flight) == 0  # 실패한 작업은 다음 호출에서 다시 실행
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_leaves_shared_task_running():
+    async def run():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "ok"
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        release.set()
+        assert await second == "ok"
+
+    asyncio.run(run())
@@ -0,0 +1,65 @@
+"""키워드 역색인 디스크 파일 테스트"""
+import asyncio
+
+from hyukebox.tag_index import TagIndex
+
+
+def test_saves_from_two_processes_merge(tmp_path):
+    """같은 파일을 쓰는 두 인덱스(워커)의 항목이 모두 남아야 함"""
+    path = tmp_path / "tags.idx"
+    first, second = TagIndex(path), TagIndex(path)
+    first.put("발라드", 2, [("A", "a"), ("B", "b")])
+    second.put("힙합", 1, [("C", "c")])
+    asyncio.run(first.save())
+    asyncio.run(second.save())
+
+    index = TagIndex(path)
+    assert index.get("발라드", 2)[0] == [("A", "a"), ("B", "b")]
+    assert index.get("힙합", 1)[0] == [("C", "c")]
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_put_during_save_is_kept(tmp_path):
+    """저장(스레드)하는 동안 들어온 put은 메모리에 남아 다음 저장에 포함되어야 함"""
+    index = TagIndex(tmp_path / "tags.idx")
+    index.put("발라드", 1, [("A", "a")])
+    index.put("힙합", 1, [("C", "c")])
+    write = index._write
+
+    def slow_write(memory):
+        write(memory)
+        index.put("힙합", 1, [("D", "d")])  # 저장 중 갱신
+        index.put("재즈", 1, [("E", "e")])  # 저장 중 추가
+
+    index._write = slow_write
+    asyncio.run(index.save())
+    assert set(index._memory) == {"힙합", "재즈"}
+    assert index.get("힙합", 1)[0] == [("D", "d")]
+
+    index._write = write
+    asyncio.run(index.save())
+    reloaded = TagIndex(tmp_path / "tags.idx")
+    assert reloaded.get("발라드", 1)[0] == [("A", "a")]
+    assert reloaded.get("힙합", 1)[0] == [("D", "d")]
+    assert reloaded.get("재즈", 1)[0] == [("E", "e")]
+
+
+def test_corrupt_file_is_treated_as_empty(tmp_path):
+    path = tmp_path / "tags.idx"
+    index = TagIndex(path)
+    index.put("발라드", 1, [("A", "a")])
+    asyncio.run(index.save())
+
+    data = path.read_bytes()
+    path.write_bytes(data[:-3] + b"\xff\xfe\xfd")  # 레코드 손상
+    assert TagIndex(path).get("발라드", 1) is None
+
+    path.write_bytes(data[:20])  # 잘린 파일
+    assert TagIndex(path).get("발라드", 1) is None
+
+    path.write_bytes(b"\0")
+    assert TagIndex(path).get("발라드", 1) is None
+
+    index.put("힙합", 1, [("C", "c")])  # 손상된 파일 위에 저장
+    asyncio.run(index.save())
+    assert TagIndex(path).get("힙합", 1)[0] == [("C", "c")]